@@ -1,13 +1,12 @@
-from sqlalchemy.orm import Session
-from ..database import crud, models
+from datetime import datetime
 from typing import Optional
+from .writer import log_writer
 import logging as python_logging
 
 # Set up proper Python logging
 logger = python_logging.getLogger("hetznerdock")
 
 def log_action(
-    db: Session, 
     action: str, 
     details: Optional[str], 
     status: str, 
@@ -15,7 +14,9 @@ def log_action(
     user_id: int
 ):
     """
-    Store logs with FIFO mechanism - when count exceeds limit, oldest logs are deleted
+    Store logs with FIFO mechanism - when count exceeds limit, oldest logs are deleted.
+    The database write happens asynchronously in the log writer, which uses
+    its own session, so callers don't pass theirs.
     """
     # Log to Python's logging system as well
     if status == "failed":
@@ -23,22 +24,13 @@ def log_action(
     else:
         logger.info(f"Action: {action}, Details: {details}, Status: {status}")
     
-    # Create new log in database
-    db_log = crud.create_log(
-        db=db,
-        action=action,
-        details=details,
-        status=status,
-        project_id=project_id,
-        user_id=user_id
-    )
-    
-    # If project_id exists, check if log count exceeds limit and clean up old logs
-    if project_id:
-        try:
-            from ..config import settings
-            crud.delete_old_logs(db, project_id, settings.LOG_MAX_ENTRIES)
-        except Exception as e:
-            logger.error(f"Error cleaning up old logs: {str(e)}")
-    
-    return db_log
+    # Hand the record to the background writer, it is stored (and old logs
+    # are cleaned up) in a batch off the request path
+    log_writer.enqueue({
+        "action": action,
+        "details": details,
+        "status": status,
+        "project_id": project_id,
+        "user_id": user_id,
+        "created_at": datetime.utcnow()
+    })
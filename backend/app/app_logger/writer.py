@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from ..config import settings
+from ..database import crud
+from ..database.database import SessionLocal
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+_STOP = object()
+
+class LogWriter:
+    """
+    Background writer for audit log records. Handlers enqueue records and a
+    single thread inserts them in batched transactions. The queue is bounded:
+    when it is full, the record is written inline instead of being dropped.
+    Records still queued at shutdown are flushed before the thread exits.
+
+    Retention runs on the same thread every retention_interval seconds
+    instead of after each insert: projects that received logs since the last
+    run are trimmed to max_entries, and logs older than max_age_days are
+    deleted.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int,
+                 max_entries: int, max_age_days: int, retention_interval: int):
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.retention_interval = retention_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(max_queue, 1))
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        # Projects whose log count may exceed max_entries
+        self._untrimmed: Set[int] = set()
+        self._last_retention = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, record: Dict[str, Any]):
+        if self.running:
+            try:
+                self._queue.put_nowait(record)
+                return
+            except queue.Full:
+                logger.warning("Log queue is full, writing log record inline")
+        self._write([record])
+
+    def _write(self, records: List[Dict[str, Any]]):
+        # Serialized, so inline writes don't race the writer thread
+        with self._write_lock:
+            db = SessionLocal()
+            try:
+                crud.create_logs(db, records)
+                self._untrimmed.update(record["project_id"] for record in records if record["project_id"])
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error writing {len(records)} log records: {str(e)}")
+            finally:
+                db.close()
+        if not self.running and self._retention_due():
+            # Nobody runs the scheduled retention, apply it here on the same schedule
+            self.run_retention()
+
+    def run_retention(self):
+        """Trim projects to max_entries logs and delete logs past max_age_days"""
+        with self._write_lock:
+            self._last_retention = time.monotonic()
+            project_ids, self._untrimmed = self._untrimmed, set()
+            db = SessionLocal()
+            try:
+                for project_id in project_ids:
+                    crud.delete_old_logs(db, project_id, self.max_entries)
+                if self.max_age_days > 0:
+                    crud.delete_logs_before(db, datetime.utcnow() - timedelta(days=self.max_age_days))
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error cleaning up old logs: {str(e)}")
+            finally:
+                db.close()
+
+    def _retention_due(self) -> bool:
+        return time.monotonic() - self._last_retention >= self.retention_interval
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            if self._retention_due():
+                self.run_retention()
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            if first is _STOP:
+                stopping = True
+            else:
+                batch.append(first)
+            # Drain whatever else is queued, up to a batch
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    continue
+                batch.append(record)
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self._queue.task_done()
+        # Flush what was enqueued concurrently with the stop request
+        self._drain()
+        self.run_retention()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if record is not _STOP:
+                batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def flush(self):
+        """Block until every record enqueued so far has been written"""
+        if self.running:
+            self._queue.join()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the writer thread after flushing the queued records"""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        # The thread is gone (or stuck), write anything left from this thread
+        self._drain()
+
+log_writer = LogWriter(
+    batch_size=settings.LOG_WRITER_BATCH_SIZE,
+    flush_interval=settings.LOG_WRITER_FLUSH_INTERVAL,
+    max_queue=settings.LOG_WRITER_QUEUE_SIZE,
+    max_entries=settings.LOG_MAX_ENTRIES,
+    max_age_days=settings.LOG_MAX_AGE_DAYS,
+    retention_interval=settings.LOG_RETENTION_INTERVAL
+)
@@ -1,15 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Union
-from fastapi import Depends, HTTPException, status
+from typing import Optional, Dict, Any, Tuple, Union
+import hashlib
+import secrets
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
 from ..config import settings
-from ..database import crud, models
-from ..database.database import get_db
+from ..database import async_crud, models
+from ..database.database import AsyncSessionLocal
+from .stream_tickets import stream_tickets
+from .user_cache import user_cache
 from pydantic import BaseModel
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
+# Browsers can't set headers on an EventSource, so streams also take a stream ticket as a query parameter
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="api/auth/token", auto_error=False)
 
 class TokenData(BaseModel):
     username: Optional[str] = None
@@ -30,28 +35,40 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+def hash_refresh_token(token: str) -> str:
     """
-    Validate JWT token and extract user information
+    Digest under which a refresh token is stored and looked up. The tokens
+    are long random strings, so a fast hash is enough (unlike passwords).
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def create_refresh_token() -> Tuple[str, str]:
+    """
+    Create an opaque refresh token, returns the token and its hash
     """
-    credentials_exception = HTTPException(
+    token = secrets.token_urlsafe(48)
+    return token, hash_refresh_token(token)
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    
-    user = crud.get_user_by_username(db, username=token_data.username)
+
+async def load_active_user(username: str) -> models.User:
+    """
+    Load an authenticated user, raises 401 if it doesn't exist or is inactive
+    """
+    # Most requests are served from the user cache, a session is only opened on a miss
+    # (handlers that need the database get their own from get_db)
+    user = user_cache.get(username)
     if user is None:
-        raise credentials_exception
+        async with AsyncSessionLocal() as db:
+            user = await async_crud.get_user_by_username(db, username=username)
+        if user is None:
+            raise credentials_exception()
+        user_cache.put(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -61,3 +78,33 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         )
     
     return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> models.User:
+    """
+    Validate JWT token and extract user information
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            raise credentials_exception()
+        token_data = TokenData(username=username)
+    except JWTError:
+        raise credentials_exception()
+    
+    return await load_active_user(token_data.username)
+
+async def get_current_user_for_stream(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    ticket: Optional[str] = Query(None)
+) -> models.User:
+    """
+    Same as get_current_user, but also accepts a stream ticket as ?ticket=
+    (see POST /api/auth/stream-ticket)
+    """
+    if token:
+        return await get_current_user(token)
+    username = stream_tickets.redeem(ticket) if ticket else None
+    if username is None:
+        raise credentials_exception()
+    return await load_active_user(username)
@@ -1,4 +1,12 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
 from passlib.context import CryptContext
+from ..config import settings
+
+T = TypeVar("T")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -9,3 +17,88 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """Generate a password hash from a plain password"""
     return pwd_context.hash(password)
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password checks are already waiting for a worker"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated executor so a burst of logins neither
+    blocks the event loop nor takes over the threads used for other work.
+    At most `workers` hashes run at once and at most `max_queue` wait for a
+    worker; beyond that calls fail fast with PasswordHasherBusy.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._queued + self._running >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._queued += 1
+        submitted = time.perf_counter()
+
+        def task() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                wait = started - submitted
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+                    self.total_run += time.perf_counter() - started
+
+        try:
+            future = self._executor.submit(task)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._queued -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "avg_run_ms": round(self.total_run / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE
+)
@@ -2,21 +2,56 @@ from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from sqlalchemy.orm import Session
-from ..database import crud, models
-from ..database.database import get_db
-from .jwt import create_access_token, get_current_user
-from .password import get_password_hash, verify_password
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import crud, async_crud, models
+from ..database.database import get_async_db
+from .jwt import create_access_token, create_refresh_token, get_current_user, hash_refresh_token
+from .password import PasswordHasherBusy, password_hasher
+from .stream_tickets import stream_tickets
+from .user_cache import user_cache
 from ..config import settings
 from ..app_logger.logger import log_action
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+import secrets
 
 router = APIRouter()
 
+def password_hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress, try again shortly",
+        headers={"Retry-After": "1"}
+    )
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+async def issue_tokens(db: AsyncSession, user: models.User,
+                       rotated: Optional[models.RefreshToken] = None) -> Optional[dict]:
+    """
+    Create an access token and a refresh token for a user. With `rotated`,
+    that refresh token is revoked and replaced; returns None if it had
+    already been used.
+    """
+    refresh_token, token_hash = create_refresh_token()
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    if rotated is None:
+        await async_crud.create_refresh_token(db, user.id, token_hash, secrets.token_hex(16), expires_at)
+    elif not await async_crud.rotate_refresh_token(db, rotated, token_hash, expires_at):
+        return None
+    
+    access_token = create_access_token(
+        data={"sub": user.username},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 class UserCreate(BaseModel):
     username: str
@@ -39,14 +74,16 @@ class UserResponse(BaseModel):
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud.authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await async_crud.authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
     if not user:
         # Log failed login attempt
-        if user_db := crud.get_user_by_username(db, form_data.username):
+        if user_db := await async_crud.get_user_by_username(db, form_data.username):
             log_action(
-                db=db,
                 action="LOGIN",
                 details=f"Failed login attempt for user: {form_data.username}",
                 status="failed",
@@ -60,15 +97,10 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username},
-        expires_delta=access_token_expires
-    )
+    tokens = await issue_tokens(db, user)
     
     # Log successful login
     log_action(
-        db=db,
         action="LOGIN",
         details=f"User {user.username} logged in successfully",
         status="success",
@@ -76,7 +108,44 @@ async def login_for_access_token(
         user_id=user.id
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return tokens
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    request: RefreshRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Exchange a refresh token for a new access token and refresh token"""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    stored = await async_crud.get_refresh_token(db, hash_refresh_token(request.refresh_token))
+    if not stored or stored.expires_at <= datetime.utcnow():
+        raise invalid_token
+    
+    user = await async_crud.get_user(db, stored.user_id)
+    if not user or not user.is_active:
+        raise invalid_token
+    
+    tokens = None
+    if stored.revoked_at is None:
+        tokens = await issue_tokens(db, user, rotated=stored)
+    if tokens is None:
+        # A rotated token was presented again, so it may have leaked: end that whole session
+        await async_crud.revoke_refresh_tokens(db, user.id, family=stored.family)
+        log_action(
+            action="REFRESH_TOKEN",
+            details="Reused refresh token, session revoked",
+            status="failed",
+            project_id=None,
+            user_id=user.id
+        )
+        raise invalid_token
+    
+    return tokens
 
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(current_user: models.User = Depends(get_current_user)):
@@ -88,16 +157,30 @@ async def read_users_me(current_user: models.User = Depends(get_current_user)):
         "is_active": current_user.is_active
     }
 
+@router.post("/stream-ticket")
+async def issue_stream_ticket(current_user: models.User = Depends(get_current_user)):
+    """
+    Issue a single-use ticket for opening an event stream as ?ticket=,
+    since an EventSource can't send the Authorization header
+    """
+    return {
+        "ticket": stream_tickets.issue(current_user.username),
+        "expires_in": settings.STREAM_TICKET_TTL
+    }
+
 @router.post("/change-password")
 async def change_password(
     password_data: ChangePassword,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Verify old password
-    if not verify_password(password_data.old_password, current_user.hashed_password):
+    # Verify old password and store the new one, bcrypt runs off the event loop
+    try:
+        old_password_valid = await password_hasher.verify(password_data.old_password, current_user.hashed_password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
+    if not old_password_valid:
         log_action(
-            db=db,
             action="CHANGE_PASSWORD",
             details="Failed attempt to change password (incorrect old password)",
             status="failed",
@@ -109,17 +192,22 @@ async def change_password(
             detail="Incorrect old password"
         )
     
-    # Update to new password
-    updated_user = crud.update_password(db, current_user.id, password_data.new_password)
+    try:
+        updated_user = await async_crud.update_password(db, current_user.id, password_data.new_password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update password"
         )
+    # Tokens issued before the change must not be served the cached old row
+    user_cache.invalidate(current_user.username)
+    # Sessions opened with the old password can't be renewed anymore
+    await async_crud.revoke_refresh_tokens(db, current_user.id)
     
     # Log password change
     log_action(
-        db=db,
         action="CHANGE_PASSWORD",
         details="Password changed successfully",
         status="success",
@@ -129,6 +217,16 @@ async def change_password(
     
     return {"message": "Password updated successfully"}
 
+@router.get("/user-cache")
+async def get_user_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """Get the hit rate and size of the authenticated user cache"""
+    return user_cache.stats()
+
+@router.get("/password-hasher")
+async def get_password_hasher_stats(current_user: models.User = Depends(get_current_user)):
+    """Get the concurrency and queueing metrics of the password hashing executor"""
+    return password_hasher.stats()
+
 def setup_admin_user(db: Session):
     """Setup initial admin user if not exists"""
     # Check if admin user exists
@@ -0,0 +1,42 @@
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from ..config import settings
+
+class StreamTicketStore:
+    """
+    Single-use tickets that authenticate an EventSource. Browsers can't set
+    headers on an EventSource, so the credential ends up in the URL (and in
+    proxy and access logs); a ticket expires after `ttl` seconds and is
+    consumed on connect, unlike the access token it stands in for.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        # ticket -> (username, expires at)
+        self._tickets: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def issue(self, username: str) -> str:
+        ticket = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            self._tickets[ticket] = (username, now + self.ttl)
+        return ticket
+
+    def redeem(self, ticket: str) -> Optional[str]:
+        """Consume a ticket, returns its username or None if it's unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tickets.pop(ticket, None)
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+
+    def _purge(self, now: float):
+        for ticket in [ticket for ticket, (_, expires_at) in self._tickets.items() if expires_at <= now]:
+            del self._tickets[ticket]
+
+stream_tickets = StreamTicketStore(ttl=settings.STREAM_TICKET_TTL)
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from ..config import settings
+from ..database import models
+
+# Columns copied into the cache; each hit gets a fresh, session-less User built from them
+_USER_FIELDS = ("id", "username", "email", "hashed_password", "is_active", "created_at")
+
+class UserCache:
+    """
+    Short-lived cache of authenticated users keyed by username, so requests
+    with a valid JWT don't need a database query to load their user. Entries
+    expire after `ttl` seconds and are dropped whenever the user row is
+    updated or deleted (password change, deactivation).
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        # username -> (user fields, cached at)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, username: str) -> Optional[models.User]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return models.User(**entry[0])
+            if entry is not None:
+                del self._entries[username]
+            self.misses += 1
+            return None
+
+    def put(self, user: models.User):
+        if self.ttl <= 0:
+            return
+        fields = {name: getattr(user, name) for name in _USER_FIELDS}
+        with self._lock:
+            self._entries[user.username] = (fields, time.monotonic())
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > max(self.max_size, 1):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+user_cache = UserCache(ttl=settings.USER_CACHE_TTL, max_size=settings.USER_CACHE_SIZE)
+
+# Drop a user as soon as its row changes, and again once the change is
+# committed, so a request racing the commit can't keep the old row cached.
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_changed_user(mapper, connection, target):
+    user_cache.invalidate(target.username)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_usernames", set()).add(target.username)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session):
+    for username in session.info.pop("changed_usernames", ()):
+        user_cache.invalidate(username)
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_users(session):
+    session.info.pop("changed_usernames", None)
@@ -8,10 +8,83 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-replace-this-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+    # Authenticated user cache (TTL in seconds, 0 disables it)
+    USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", 30))
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", 1000))
+    # Lifetime (seconds) of the single-use tickets that authenticate event streams
+    STREAM_TICKET_TTL: int = int(os.getenv("STREAM_TICKET_TTL", 60))
+    # bcrypt executor (hashes running at once, extra calls allowed to wait)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    # Database connection pool and SQLite tuning (busy timeout in ms, cache size in KiB, mmap size in bytes)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 200))
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", 20000))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
     LOG_MAX_ENTRIES: int = int(os.getenv("LOG_MAX_ENTRIES", 1000))
+    # Log retention (age limit in days, 0 keeps logs regardless of age; seconds between retention runs)
+    LOG_MAX_AGE_DAYS: int = int(os.getenv("LOG_MAX_AGE_DAYS", 0))
+    LOG_RETENTION_INTERVAL: int = int(os.getenv("LOG_RETENTION_INTERVAL", 60))
+    # Background log writer (records per transaction, seconds between flushes, max queued records)
+    LOG_WRITER_BATCH_SIZE: int = int(os.getenv("LOG_WRITER_BATCH_SIZE", 200))
+    LOG_WRITER_FLUSH_INTERVAL: float = float(os.getenv("LOG_WRITER_FLUSH_INTERVAL", 0.5))
+    LOG_WRITER_QUEUE_SIZE: int = int(os.getenv("LOG_WRITER_QUEUE_SIZE", 10000))
     ADMIN_USERNAME: str = os.getenv("ADMIN_USERNAME", "admin")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "changeme")
+    # Hetzner client pool
+    HETZNER_CLIENT_POOL_SIZE: int = int(os.getenv("HETZNER_CLIENT_POOL_SIZE", 100))
+    HETZNER_CLIENT_IDLE_TIMEOUT: int = int(os.getenv("HETZNER_CLIENT_IDLE_TIMEOUT", 600))
+    HETZNER_CLIENT_MAX_CONNECTIONS: int = int(os.getenv("HETZNER_CLIENT_MAX_CONNECTIONS", 10))
+    HETZNER_TOKEN_VALIDATION_TTL: int = int(os.getenv("HETZNER_TOKEN_VALIDATION_TTL", 900))
+    HETZNER_MAX_CONCURRENT_CALLS: int = int(os.getenv("HETZNER_MAX_CONCURRENT_CALLS", 50))
+    # Shared connection pool of the async Hetzner client (fleet queries, status polling) and request timeout in seconds
+    HETZNER_ASYNC_MAX_CONNECTIONS: int = int(os.getenv("HETZNER_ASYNC_MAX_CONNECTIONS", 100))
+    HETZNER_API_TIMEOUT: float = float(os.getenv("HETZNER_API_TIMEOUT", 30))
+    # Hetzner request budget per project (requests/hour, share kept for interactive calls, max seconds a call waits)
+    HETZNER_RATE_LIMIT: int = int(os.getenv("HETZNER_RATE_LIMIT", 3600))
+    HETZNER_RATE_LIMIT_RESERVE: float = float(os.getenv("HETZNER_RATE_LIMIT_RESERVE", 0.2))
+    HETZNER_RATE_LIMIT_MAX_WAIT: float = float(os.getenv("HETZNER_RATE_LIMIT_MAX_WAIT", 30))
+    OVERVIEW_COLLECTION_TIMEOUT: float = float(os.getenv("OVERVIEW_COLLECTION_TIMEOUT", 5))
+    FLEET_MAX_CONCURRENCY: int = int(os.getenv("FLEET_MAX_CONCURRENCY", 8))
+    FLEET_PROJECT_TIMEOUT: float = float(os.getenv("FLEET_PROJECT_TIMEOUT", 15))
+    # Inventory sync (interval in seconds, 0 disables the background sync and the local mirror)
+    INVENTORY_SYNC_INTERVAL: int = int(os.getenv("INVENTORY_SYNC_INTERVAL", 60))
+    INVENTORY_STALE_AFTER: int = int(os.getenv("INVENTORY_STALE_AFTER", 180))
+    INVENTORY_SYNC_CONCURRENCY: int = int(os.getenv("INVENTORY_SYNC_CONCURRENCY", 4))
+    INVENTORY_FULL_SYNC_INTERVAL: int = int(os.getenv("INVENTORY_FULL_SYNC_INTERVAL", 3600))
+    # Live server event streams (poll interval when idle / while actions run, keep-alive interval; seconds)
+    SERVER_EVENTS_INTERVAL: float = float(os.getenv("SERVER_EVENTS_INTERVAL", 10))
+    SERVER_EVENTS_ACTIVE_INTERVAL: float = float(os.getenv("SERVER_EVENTS_ACTIVE_INTERVAL", 2))
+    SERVER_EVENTS_HEARTBEAT: float = float(os.getenv("SERVER_EVENTS_HEARTBEAT", 15))
+    # Servers changed at once by a bulk operation
+    BULK_MAX_CONCURRENCY: int = int(os.getenv("BULK_MAX_CONCURRENCY", 10))
+    # Batch server creation (servers created at once, retries of transient failures, max servers per batch, seconds finished jobs are kept)
+    BATCH_CREATE_CONCURRENCY: int = int(os.getenv("BATCH_CREATE_CONCURRENCY", 5))
+    BATCH_CREATE_RETRIES: int = int(os.getenv("BATCH_CREATE_RETRIES", 3))
+    BATCH_CREATE_MAX_SERVERS: int = int(os.getenv("BATCH_CREATE_MAX_SERVERS", 100))
+    BATCH_JOB_RETENTION: int = int(os.getenv("BATCH_JOB_RETENTION", 3600))
+    # Action tracker (seconds between batched polls: first, backoff factor and cap; seconds finished actions are kept)
+    ACTION_POLL_MIN_INTERVAL: float = float(os.getenv("ACTION_POLL_MIN_INTERVAL", 1))
+    ACTION_POLL_BACKOFF: float = float(os.getenv("ACTION_POLL_BACKOFF", 1.5))
+    ACTION_POLL_MAX_INTERVAL: float = float(os.getenv("ACTION_POLL_MAX_INTERVAL", 15))
+    ACTION_RETENTION: int = int(os.getenv("ACTION_RETENTION", 600))
+    # Rolling operations (seconds a server's action may take before it counts as failed, max servers per rollout)
+    ROLLOUT_ACTION_TIMEOUT: int = int(os.getenv("ROLLOUT_ACTION_TIMEOUT", 1800))
+    ROLLOUT_MAX_SERVERS: int = int(os.getenv("ROLLOUT_MAX_SERVERS", 500))
+    # Catalog cache (TTLs in seconds, empty file path keeps the cache in memory only)
+    CATALOG_CACHE_FILE: str = os.getenv("CATALOG_CACHE_FILE", "")
+    CATALOG_TTL_IMAGES: int = int(os.getenv("CATALOG_TTL_IMAGES", 3600))
+    CATALOG_TTL_SERVER_TYPES: int = int(os.getenv("CATALOG_TTL_SERVER_TYPES", 3600))
+    CATALOG_TTL_ISOS: int = int(os.getenv("CATALOG_TTL_ISOS", 3600))
+    CATALOG_TTL_LOCATIONS: int = int(os.getenv("CATALOG_TTL_LOCATIONS", 86400))
+    CATALOG_TTL_DATACENTERS: int = int(os.getenv("CATALOG_TTL_DATACENTERS", 86400))
+    # Minimum seconds between refetches of a catalog triggered by a name it doesn't contain
+    CATALOG_MISS_REFRESH_INTERVAL: int = int(os.getenv("CATALOG_MISS_REFRESH_INTERVAL", 60))
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,111 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+from datetime import datetime
+from . import models
+from ..auth.password import password_hasher
+from typing import List, Optional, Union
+
+# Database operations of the handlers that run on the event loop (auth,
+# fleet queries, event streams). Everything else lives in crud.py; only the
+# user and project lookups needed on both sides exist in both modules.
+
+# User operations
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    return await db.get(models.User, user_id)
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+async def update_password(db: AsyncSession, user_id: int, new_password: str) -> Optional[models.User]:
+    db_user = await get_user(db, user_id)
+    if not db_user:
+        return None
+    db_user.hashed_password = await password_hasher.hash(new_password)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Union[models.User, bool]:
+    user = await get_user_by_username(db, username)
+    if not user:
+        return False
+    if not await password_hasher.verify(password, user.hashed_password):
+        return False
+    return user
+
+# Refresh token operations
+async def create_refresh_token(db: AsyncSession, user_id: int, token_hash: str, family: str, expires_at: datetime) -> models.RefreshToken:
+    # Drop the user's expired tokens while we're writing anyway
+    await db.execute(
+        delete(models.RefreshToken).where(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.expires_at < datetime.utcnow()
+        )
+    )
+    db_token = models.RefreshToken(
+        user_id=user_id,
+        token_hash=token_hash,
+        family=family,
+        created_at=datetime.utcnow(),
+        expires_at=expires_at
+    )
+    db.add(db_token)
+    await db.commit()
+    return db_token
+
+async def get_refresh_token(db: AsyncSession, token_hash: str) -> Optional[models.RefreshToken]:
+    result = await db.execute(select(models.RefreshToken).where(models.RefreshToken.token_hash == token_hash))
+    return result.scalars().first()
+
+async def rotate_refresh_token(db: AsyncSession, db_token: models.RefreshToken, token_hash: str, expires_at: datetime) -> Optional[models.RefreshToken]:
+    """
+    Revoke a refresh token and issue its successor in the same family.
+    Returns None if the token was revoked concurrently (e.g. a parallel refresh).
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.id == db_token.id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        return None
+    new_token = models.RefreshToken(
+        user_id=db_token.user_id,
+        token_hash=token_hash,
+        family=db_token.family,
+        created_at=now,
+        expires_at=expires_at
+    )
+    db.add(new_token)
+    await db.commit()
+    return new_token
+
+async def revoke_refresh_tokens(db: AsyncSession, user_id: int, family: Optional[str] = None) -> int:
+    query = update(models.RefreshToken).where(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.revoked_at.is_(None)
+    )
+    if family is not None:
+        query = query.where(models.RefreshToken.family == family)
+    result = await db.execute(query.values(revoked_at=datetime.utcnow()))
+    await db.commit()
+    return result.rowcount
+
+# Project operations
+async def get_projects(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Project]:
+    result = await db.execute(
+        select(models.Project).where(models.Project.owner_id == user_id).offset(skip).limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def get_project(db: AsyncSession, project_id: int, user_id: int) -> Optional[models.Project]:
+    result = await db.execute(
+        select(models.Project).where(
+            models.Project.id == project_id,
+            models.Project.owner_id == user_id
+        )
+    )
+    return result.scalars().first()
@@ -1,13 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import String, and_, desc, func, or_, select, text, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime
+import json
 from . import models
-from ..auth.password import get_password_hash, verify_password
-from typing import List, Optional, Dict, Any, Union
+from .search import HIGHLIGHT_END, HIGHLIGHT_START, render_highlight, scope_match_query
+from ..auth.password import get_password_hash
+from typing import List, Optional, Dict, Any, Tuple, Union
 
 # User operations
-def get_user(db: Session, user_id: int) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.id == user_id).first()
-
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.username == username).first()
 
@@ -22,23 +23,6 @@ def create_user(db: Session, username: str, email: str, password: str) -> models
     db.refresh(db_user)
     return db_user
 
-def update_password(db: Session, user_id: int, new_password: str) -> Optional[models.User]:
-    db_user = get_user(db, user_id)
-    if not db_user:
-        return None
-    db_user.hashed_password = get_password_hash(new_password)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-def authenticate_user(db: Session, username: str, password: str) -> Union[models.User, bool]:
-    user = get_user_by_username(db, username)
-    if not user:
-        return False
-    if not verify_password(password, user.hashed_password):
-        return False
-    return user
-
 # Project operations
 def get_projects(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Project]:
     return db.query(models.Project).filter(models.Project.owner_id == user_id).offset(skip).limit(limit).all()
@@ -84,6 +68,9 @@ def delete_project(db: Session, project_id: int, user_id: int) -> bool:
     db.commit()
     return True
 
+def get_all_projects(db: Session) -> List[models.Project]:
+    return db.query(models.Project).all()
+
 # Log operations
 def get_logs(db: Session, project_id: int, user_id: int, skip: int = 0, limit: int = 100, 
             start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[models.Log]:
@@ -98,7 +85,71 @@ def get_logs(db: Session, project_id: int, user_id: int, skip: int = 0, limit: i
     if end_date:
         query = query.filter(models.Log.created_at <= end_date)
     
-    return query.order_by(desc(models.Log.created_at)).offset(skip).limit(limit).all()
+    return query.order_by(desc(models.Log.created_at), desc(models.Log.id)).offset(skip).limit(limit).all()
+
+def get_logs_page(db: Session, project_id: int, user_id: int, limit: int = 100,
+                  after: Optional[Tuple[str, int]] = None, start_date: Optional[str] = None,
+                  end_date: Optional[str] = None) -> Tuple[List[models.Log], Optional[Tuple[str, int]]]:
+    """
+    Keyset pagination over (created_at, id), newest first. `after` is the
+    position returned for the previous page; the position of the last row is
+    returned with the page, or None once there are no more rows.
+    """
+    # created_at compared as stored text, older rows lack the microseconds the
+    # DateTime type would add to a bound value
+    created_at = type_coerce(models.Log.created_at, String)
+    query = db.query(models.Log, created_at).filter(
+        models.Log.project_id == project_id,
+        models.Log.user_id == user_id
+    )
+    if start_date:
+        query = query.filter(models.Log.created_at >= start_date)
+    if end_date:
+        query = query.filter(models.Log.created_at <= end_date)
+    if after:
+        after_created_at, after_id = after
+        query = query.filter(or_(
+            created_at < after_created_at,
+            and_(created_at == after_created_at, models.Log.id < after_id)
+        ))
+    rows = query.order_by(desc(models.Log.created_at), desc(models.Log.id)).limit(limit).all()
+    logs = [log for log, _ in rows]
+    position = (rows[-1][1], rows[-1][0].id) if len(rows) == limit else None
+    return logs, position
+
+def search_logs(db: Session, project_id: int, user_id: int, match: str, limit: int = 50,
+                start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Full-text search over the logs of a project, best matches first (see database/search.py)"""
+    filters = ""
+    params: Dict[str, Any] = {
+        "match": scope_match_query(match, project_id), "project_id": project_id, "user_id": user_id, "limit": limit,
+        "mark_start": HIGHLIGHT_START, "mark_end": HIGHLIGHT_END
+    }
+    if start_date:
+        filters += " AND logs.created_at >= :start_date"
+        params["start_date"] = start_date
+    if end_date:
+        filters += " AND logs.created_at <= :end_date"
+        params["end_date"] = end_date
+    # Matches in the action weigh more than matches in the details
+    rows = db.execute(text(f"""
+        SELECT logs.id, logs.action, logs.details, logs.status, logs.created_at,
+               bm25(logs_fts, 2.0, 1.0, 0.0) AS rank,
+               highlight(logs_fts, 0, :mark_start, :mark_end) AS action_highlight,
+               highlight(logs_fts, 1, :mark_start, :mark_end) AS details_highlight
+        FROM logs_fts JOIN logs ON logs.id = logs_fts.rowid
+        WHERE logs_fts MATCH :match
+          AND logs.project_id = :project_id AND logs.user_id = :user_id{filters}
+        ORDER BY rank
+        LIMIT :limit
+    """), params).mappings().all()
+    results = []
+    for row in rows:
+        result = dict(row)
+        result["action_highlight"] = render_highlight(result["action_highlight"])
+        result["details_highlight"] = render_highlight(result["details_highlight"])
+        results.append(result)
+    return results
 
 def count_logs(db: Session, project_id: int) -> int:
     return db.query(models.Log).filter(models.Log.project_id == project_id).count()
@@ -116,28 +167,269 @@ def create_log(db: Session, action: str, details: Optional[str], status: str, pr
     db.refresh(db_log)
     return db_log
 
+def create_logs(db: Session, records: List[Dict[str, Any]]):
+    """Insert a batch of log records and update the hourly rollups in a single transaction"""
+    db.add_all([models.Log(**record) for record in records])
+    counts: Dict[Tuple[int, str, str, datetime], int] = {}
+    for record in records:
+        if not record.get("project_id"):
+            continue
+        bucket = (record.get("created_at") or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        key = (record["project_id"], record["action"], record["status"], bucket)
+        counts[key] = counts.get(key, 0) + 1
+    add_log_rollups(db, counts)
+    db.commit()
+
+def add_log_rollups(db: Session, counts: Dict[Tuple[int, str, str, datetime], int]):
+    """Add (project_id, action, status, hour) -> count to the rollups, without committing"""
+    if not counts:
+        return
+    statement = sqlite_insert(models.LogRollup).values([
+        {"project_id": project_id, "action": action, "status": status, "bucket": bucket, "count": count}
+        for (project_id, action, status, bucket), count in counts.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["project_id", "action", "status", "bucket"],
+        set_={"count": models.LogRollup.count + statement.excluded.count}
+    ))
+
+def backfill_log_rollups(db: Session) -> int:
+    """Build the rollups from the existing logs, if there are none yet"""
+    if db.query(models.LogRollup.id).first() is not None:
+        return 0
+    hour = func.strftime("%Y-%m-%d %H:00:00", models.Log.created_at)
+    rows = db.query(models.Log.project_id, models.Log.action, models.Log.status, hour, func.count())\
+        .filter(models.Log.project_id.isnot(None), models.Log.created_at.isnot(None))\
+        .group_by(models.Log.project_id, models.Log.action, models.Log.status, hour)\
+        .all()
+    counts = {
+        (project_id, action, status, datetime.strptime(bucket, "%Y-%m-%d %H:%M:%S")): count
+        for project_id, action, status, bucket, count in rows
+    }
+    add_log_rollups(db, counts)
+    db.commit()
+    return len(counts)
+
+def get_log_rollups(db: Session, project_id: int, start: datetime, end: datetime,
+                    action: Optional[str] = None, status: Optional[str] = None) -> List[models.LogRollup]:
+    query = db.query(models.LogRollup).filter(
+        models.LogRollup.project_id == project_id,
+        models.LogRollup.bucket >= start,
+        models.LogRollup.bucket < end
+    )
+    if action:
+        query = query.filter(models.LogRollup.action == action)
+    if status:
+        query = query.filter(models.LogRollup.status == status)
+    return query.all()
+
 def delete_old_logs(db: Session, project_id: int, max_entries: int) -> int:
-    # Count logs for this project
-    log_count = count_logs(db, project_id)
-    deleted_count = 0
-    
-    # If exceeds limit, delete oldest logs (FIFO)
-    if log_count > max_entries:
-        # Number of logs to delete
-        excess = log_count - max_entries
-        
-        # Find oldest logs
-        oldest_logs = db.query(models.Log)\
-            .filter(models.Log.project_id == project_id)\
-            .order_by(models.Log.created_at)\
-            .limit(excess)\
-            .all()
-        
-        # Delete old logs
-        for log in oldest_logs:
-            db.delete(log)
-            deleted_count += 1
-        
-        db.commit()
-    
+    """Keep only the newest max_entries logs of a project (FIFO), in a single DELETE"""
+    # Everything past the newest max_entries rows, found through the (project_id, created_at) index
+    excess = db.query(models.Log.id)\
+        .filter(models.Log.project_id == project_id)\
+        .order_by(desc(models.Log.created_at), desc(models.Log.id))\
+        .offset(max_entries)\
+        .subquery()
+    deleted_count = db.query(models.Log)\
+        .filter(models.Log.id.in_(select(excess.c.id)))\
+        .delete(synchronize_session=False)
+    db.commit()
+    return deleted_count
+
+def delete_logs_before(db: Session, cutoff: datetime) -> int:
+    """Delete every log created before the cutoff"""
+    deleted_count = db.query(models.Log)\
+        .filter(models.Log.created_at < cutoff)\
+        .delete(synchronize_session=False)
+    db.commit()
     return deleted_count
+
+# Inventory mirror operations
+def get_sync_state(db: Session, project_id: int, resource_type: str) -> Optional[models.SyncState]:
+    return db.query(models.SyncState).filter(
+        models.SyncState.project_id == project_id,
+        models.SyncState.resource_type == resource_type
+    ).first()
+
+def get_mirrored_resources(db: Session, project_id: int, resource_type: str) -> List[Dict[str, Any]]:
+    rows = db.query(models.MirroredResource.data).filter(
+        models.MirroredResource.project_id == project_id,
+        models.MirroredResource.resource_type == resource_type
+    ).order_by(models.MirroredResource.resource_id).all()
+    return [json.loads(row.data) for row in rows]
+
+def get_mirrored_resource(db: Session, project_id: int, resource_type: str, resource_id: int) -> Optional[Dict[str, Any]]:
+    row = db.query(models.MirroredResource.data).filter(
+        models.MirroredResource.project_id == project_id,
+        models.MirroredResource.resource_type == resource_type,
+        models.MirroredResource.resource_id == resource_id
+    ).first()
+    return json.loads(row.data) if row else None
+
+def replace_mirrored_resources(db: Session, project_id: int, resource_type: str,
+                               items: List[Dict[str, Any]]) -> models.SyncState:
+    """Replace the mirror of a resource type with a full listing from the API"""
+    now = datetime.utcnow()
+    existing = {
+        row.resource_id: row
+        for row in db.query(models.MirroredResource).filter(
+            models.MirroredResource.project_id == project_id,
+            models.MirroredResource.resource_type == resource_type
+        )
+    }
+    for item in items:
+        row = existing.pop(item["id"], None)
+        if row is None:
+            row = models.MirroredResource(
+                project_id=project_id,
+                resource_type=resource_type,
+                resource_id=item["id"]
+            )
+            db.add(row)
+        row.name = item.get("name")
+        row.data = json.dumps(item)
+        row.synced_at = now
+    # Whatever is left no longer exists upstream
+    for row in existing.values():
+        db.delete(row)
+    state = get_sync_state(db, project_id, resource_type)
+    if state is None:
+        state = models.SyncState(project_id=project_id, resource_type=resource_type)
+        db.add(state)
+    state.synced_at = now
+    state.last_error = None
+    db.commit()
+    return state
+
+def upsert_mirrored_resource(db: Session, project_id: int, resource_type: str, item: Dict[str, Any]):
+    row = db.query(models.MirroredResource).filter(
+        models.MirroredResource.project_id == project_id,
+        models.MirroredResource.resource_type == resource_type,
+        models.MirroredResource.resource_id == item["id"]
+    ).first()
+    if row is None:
+        row = models.MirroredResource(project_id=project_id, resource_type=resource_type, resource_id=item["id"])
+        db.add(row)
+    row.name = item.get("name")
+    row.data = json.dumps(item)
+    row.synced_at = datetime.utcnow()
+    db.commit()
+
+def set_sync_error(db: Session, project_id: int, resource_type: str, error: str):
+    state = get_sync_state(db, project_id, resource_type)
+    if state is None:
+        state = models.SyncState(project_id=project_id, resource_type=resource_type)
+        db.add(state)
+    state.last_error = error
+    db.commit()
+
+def delete_mirrored_resource(db: Session, project_id: int, resource_type: str, resource_id: int):
+    db.query(models.MirroredResource).filter(
+        models.MirroredResource.project_id == project_id,
+        models.MirroredResource.resource_type == resource_type,
+        models.MirroredResource.resource_id == resource_id
+    ).delete()
+    db.commit()
+
+def touch_sync_states(db: Session, project_id: int, resource_types: List[str]):
+    """Mark already mirrored resource types as up to date"""
+    db.query(models.SyncState).filter(
+        models.SyncState.project_id == project_id,
+        models.SyncState.resource_type.in_(resource_types),
+        models.SyncState.synced_at.isnot(None)
+    ).update({"synced_at": datetime.utcnow(), "last_error": None}, synchronize_session=False)
+    db.commit()
+
+def get_sync_cursor(db: Session, project_id: int) -> Optional[models.SyncCursor]:
+    return db.query(models.SyncCursor).filter(models.SyncCursor.project_id == project_id).first()
+
+def save_sync_cursor(db: Session, project_id: int, last_action_id: Optional[int],
+                     full_sync: bool = False) -> models.SyncCursor:
+    cursor = get_sync_cursor(db, project_id)
+    if cursor is None:
+        cursor = models.SyncCursor(project_id=project_id)
+        db.add(cursor)
+    now = datetime.utcnow()
+    if last_action_id is not None:
+        cursor.last_action_id = last_action_id
+    if full_sync:
+        cursor.full_synced_at = now
+    cursor.updated_at = now
+    db.commit()
+    return cursor
+
+# Rollout operations
+def create_rollout(db: Session, project_id: int, user_id: int, operation: str, params: Dict[str, Any],
+                   wave_size: int, max_unavailable: int, max_failures: int, wave_delay: int,
+                   servers: List[Tuple[int, Optional[str]]]) -> models.Rollout:
+    now = datetime.utcnow()
+    rollout = models.Rollout(
+        project_id=project_id,
+        user_id=user_id,
+        operation=operation,
+        params=json.dumps(params),
+        wave_size=wave_size,
+        max_unavailable=max_unavailable,
+        max_failures=max_failures,
+        wave_delay=wave_delay,
+        status="running",
+        current_wave=0,
+        created_at=now,
+        updated_at=now
+    )
+    rollout.items = [
+        models.RolloutItem(
+            position=position,
+            wave=position // wave_size,
+            server_id=server_id,
+            server_name=server_name,
+            status="pending",
+            step=0
+        )
+        for position, (server_id, server_name) in enumerate(servers)
+    ]
+    db.add(rollout)
+    db.commit()
+    db.refresh(rollout)
+    return rollout
+
+def get_rollout(db: Session, rollout_id: int, project_id: Optional[int] = None) -> Optional[models.Rollout]:
+    query = db.query(models.Rollout).filter(models.Rollout.id == rollout_id)
+    if project_id is not None:
+        query = query.filter(models.Rollout.project_id == project_id)
+    return query.first()
+
+def get_rollouts(db: Session, project_id: int, limit: int = 50) -> List[models.Rollout]:
+    return db.query(models.Rollout).filter(
+        models.Rollout.project_id == project_id
+    ).order_by(desc(models.Rollout.id)).limit(limit).all()
+
+def get_rollout_ids_by_status(db: Session, status: str) -> List[int]:
+    return [row.id for row in db.query(models.Rollout.id).filter(models.Rollout.status == status).all()]
+
+def update_rollout(db: Session, rollout_id: int, **fields):
+    fields["updated_at"] = datetime.utcnow()
+    db.query(models.Rollout).filter(models.Rollout.id == rollout_id).update(fields)
+    db.commit()
+
+def update_rollout_item(db: Session, item_id: int, **fields):
+    db.query(models.RolloutItem).filter(models.RolloutItem.id == item_id).update(fields)
+    db.commit()
+
+def start_rollout_item(db: Session, item_id: int) -> bool:
+    """Move a pending item to running, returns False if it's no longer pending (skipped by an abort)"""
+    count = db.query(models.RolloutItem).filter(
+        models.RolloutItem.id == item_id,
+        models.RolloutItem.status == "pending"
+    ).update({"status": "running", "started_at": datetime.utcnow()})
+    db.commit()
+    return count > 0
+
+def skip_pending_rollout_items(db: Session, rollout_id: int) -> int:
+    count = db.query(models.RolloutItem).filter(
+        models.RolloutItem.rollout_id == rollout_id,
+        models.RolloutItem.status == "pending"
+    ).update({"status": "skipped"})
+    db.commit()
+    return count
@@ -1,9 +1,16 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from ..config import settings
+import asyncio
 import os
+import threading
 from pathlib import Path
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
 
 # Ensure database directory exists
 db_file_path = settings.DATABASE_URL.replace("sqlite:///", "")
@@ -11,11 +18,124 @@ os.makedirs(os.path.dirname(os.path.abspath(db_file_path)), exist_ok=True)
 
 # Using SQLite for easy setup and personal use
 DATABASE_URL = settings.DATABASE_URL
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+# Same database through an asyncio driver, for handlers that stay on the event loop
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1) if IS_SQLITE else DATABASE_URL
 
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        # Seconds the driver waits for a lock held by another connection
+        "timeout": settings.SQLITE_BUSY_TIMEOUT / 1000
+    } if IS_SQLITE else {},
+    # Requests keep their session while waiting on the Hetzner API, so the
+    # pool has to cover the upstream executor; SQLite connections are cheap
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT / 1000} if IS_SQLITE else {},
+    # aiosqlite defaults to a new connection per session
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers run alongside the (single) writer
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+# SQLite allows a single writer at a time. Sessions take this lock before
+# their first write and release it when the transaction ends (commit,
+# rollback or close), so writers in this process queue up here instead of
+# failing with "database is locked". Async sessions wait for it on a worker
+# thread, so the event loop keeps running meanwhile.
+write_lock = threading.Lock()
+
+def _acquire_write_lock(session):
+    if session.info.get("holds_write_lock"):
+        return
+    # The end of the transaction releases the lock, so make sure there is one
+    if not session.in_transaction():
+        session.begin()
+    # Bounded, so a thread that nests two writing sessions degrades to
+    # SQLite's own busy handling instead of deadlocking
+    if write_lock.acquire(timeout=settings.SQLITE_BUSY_TIMEOUT / 1000):
+        session.info["holds_write_lock"] = True
+    else:
+        logger.warning("Timed out waiting for the database write lock")
+
+def _release_write_lock(session, transaction):
+    # Savepoints end inside the transaction that did the writing
+    if transaction.parent is None and session.info.pop("holds_write_lock", False):
+        write_lock.release()
+
+class WriteLockedSession(Session):
+    """Session that holds the write lock from its first write until its transaction ends"""
+
+class WriteLockedAsyncSession(AsyncSession):
+    """
+    Async session taking the write lock before it writes. The lock is awaited
+    on a worker thread; the sync session events below then find it held.
+    """
+
+    async def _lock_for_write(self):
+        if IS_SQLITE and not self.sync_session.info.get("holds_write_lock"):
+            await asyncio.to_thread(_acquire_write_lock, self.sync_session)
+
+    def _has_changes(self) -> bool:
+        return bool(self.sync_session.new or self.sync_session.dirty or self.sync_session.deleted)
+
+    async def flush(self, objects=None):
+        if self._has_changes():
+            await self._lock_for_write()
+        await super().flush(objects)
+
+    async def commit(self):
+        if self._has_changes():
+            await self._lock_for_write()
+        await super().commit()
+
+    async def execute(self, statement, *args, **kwargs):
+        if getattr(statement, "is_dml", False):
+            await self._lock_for_write()
+        return await super().execute(statement, *args, **kwargs)
+
+SessionLocal = sessionmaker(class_=WriteLockedSession, autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit, async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=WriteLockedAsyncSession,
+    sync_session_class=WriteLockedSession,
+    expire_on_commit=False,
+    autoflush=False
+)
+
+if IS_SQLITE:
+    @event.listens_for(WriteLockedSession, "before_flush")
+    def lock_before_flush(session, flush_context, instances):
+        _acquire_write_lock(session)
+
+    @event.listens_for(WriteLockedSession, "do_orm_execute")
+    def lock_before_bulk_write(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            _acquire_write_lock(orm_execute_state.session)
+
+    # Fires on commit, rollback and close alike, so a session closed without either can't keep the lock
+    event.listen(WriteLockedSession, "after_transaction_end", _release_write_lock)
 
 Base = declarative_base()
 
@@ -26,3 +146,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
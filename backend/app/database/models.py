@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -14,6 +14,20 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
+    refresh_tokens = relationship("RefreshToken", cascade="all, delete-orphan")
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # SHA-256 of the opaque token, the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True)
+    # Tokens rotated from the same login share a family, so a replayed token revokes them all
+    family = Column(String(32), index=True)
+    created_at = Column(DateTime)
+    expires_at = Column(DateTime)
+    revoked_at = Column(DateTime, nullable=True)
 
 class Project(Base):
     __tablename__ = "projects"
@@ -27,9 +41,16 @@ class Project(Base):
     
     owner = relationship("User", back_populates="projects")
     logs = relationship("Log", back_populates="project", cascade="all, delete-orphan")
+    mirrored_resources = relationship("MirroredResource", cascade="all, delete-orphan")
+    sync_states = relationship("SyncState", cascade="all, delete-orphan")
+    sync_cursor = relationship("SyncCursor", uselist=False, cascade="all, delete-orphan")
+    log_rollups = relationship("LogRollup", cascade="all, delete-orphan")
+    rollouts = relationship("Rollout", cascade="all, delete-orphan")
 
 class Log(Base):
     __tablename__ = "logs"
+    # Serves the per-project listing and the retention cutoff queries
+    __table_args__ = (Index("ix_logs_project_id_created_at", "project_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     action = Column(String)
@@ -41,3 +62,91 @@ class Log(Base):
     
     project = relationship("Project", back_populates="logs")
     user = relationship("User")
+
+# Hourly log counts per project, action and status, maintained by the log writer.
+# Kept independently of log retention, so analytics cover more than the raw logs.
+class LogRollup(Base):
+    __tablename__ = "log_rollups"
+    __table_args__ = (
+        UniqueConstraint("project_id", "action", "status", "bucket"),
+        Index("ix_log_rollups_project_id_bucket", "project_id", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    action = Column(String)
+    status = Column(String)
+    bucket = Column(DateTime)  # Start of the hour (UTC)
+    count = Column(Integer, default=0)
+
+# Local copy of a Hetzner resource, kept up to date by the inventory sync
+class MirroredResource(Base):
+    __tablename__ = "mirrored_resources"
+    __table_args__ = (UniqueConstraint("project_id", "resource_type", "resource_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    resource_type = Column(String)  # servers, volumes, networks, ...
+    resource_id = Column(Integer)
+    name = Column(String, nullable=True)
+    data = Column(Text)  # Serialized resource as returned by the API (JSON)
+    synced_at = Column(DateTime(timezone=True))
+
+# When a resource type of a project was last mirrored
+class SyncState(Base):
+    __tablename__ = "sync_states"
+    __table_args__ = (UniqueConstraint("project_id", "resource_type"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    resource_type = Column(String)
+    synced_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+# Position of the inventory sync in a project's actions feed
+class SyncCursor(Base):
+    __tablename__ = "sync_cursors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), unique=True, index=True)
+    last_action_id = Column(Integer, nullable=True)  # Newest action already applied to the mirror
+    full_synced_at = Column(DateTime(timezone=True), nullable=True)  # Last full reconcile
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+
+# Rolling operation over many servers, persisted so it survives restarts
+class Rollout(Base):
+    __tablename__ = "rollouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    operation = Column(String)  # rebuild, change_type, reboot
+    params = Column(Text)  # Operation parameters (JSON)
+    wave_size = Column(Integer)
+    max_unavailable = Column(Integer)
+    max_failures = Column(Integer, default=0)
+    wave_delay = Column(Integer, default=0)  # Seconds between waves
+    status = Column(String, index=True)  # running, paused, aborted, completed, failed
+    current_wave = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+    items = relationship("RolloutItem", cascade="all, delete-orphan", order_by="RolloutItem.position")
+
+# A server of a rollout; step and action_id record how far it got
+class RolloutItem(Base):
+    __tablename__ = "rollout_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rollout_id = Column(Integer, ForeignKey("rollouts.id"), index=True)
+    position = Column(Integer)
+    wave = Column(Integer)
+    server_id = Column(Integer)
+    server_name = Column(String, nullable=True)
+    status = Column(String)  # pending, running, succeeded, failed, skipped
+    step = Column(Integer, default=0)
+    action_id = Column(Integer, nullable=True)  # Action of the current step, while it runs
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,107 @@
+import html
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from typing import Optional
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+# External-content FTS5 index over the action and details of the logs table.
+# It stores only the index (the text stays in logs) and is kept in sync by
+# triggers, so every insert path, retention delete and cascade is covered.
+# The scope column indexes a "p<project_id>" token, so a search only walks
+# the postings of its own project instead of every project's matches.
+LOG_SEARCH_DDL = [
+    """
+    CREATE VIEW IF NOT EXISTS logs_fts_content AS
+    SELECT id, action, details, 'p' || project_id AS scope FROM logs
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+        action, details, scope, content='logs_fts_content', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+        INSERT INTO logs_fts(rowid, action, details, scope)
+        VALUES (new.id, new.action, new.details, 'p' || new.project_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, action, details, scope)
+        VALUES ('delete', old.id, old.action, old.details, 'p' || old.project_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE OF action, details, project_id ON logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, action, details, scope)
+        VALUES ('delete', old.id, old.action, old.details, 'p' || old.project_id);
+        INSERT INTO logs_fts(rowid, action, details, scope)
+        VALUES (new.id, new.action, new.details, 'p' || new.project_id);
+    END
+    """,
+]
+
+# Objects of the index before it had the scope column, dropped on upgrade
+LOG_SEARCH_OBJECTS = [
+    "DROP TRIGGER IF EXISTS logs_fts_insert",
+    "DROP TRIGGER IF EXISTS logs_fts_delete",
+    "DROP TRIGGER IF EXISTS logs_fts_update",
+    "DROP TABLE IF EXISTS logs_fts",
+]
+
+def setup_log_search(engine: Engine) -> bool:
+    """
+    Create the log search index (indexing existing logs on first run).
+    Returns False when the database doesn't support FTS5.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as conn:
+            existing = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'logs_fts'")
+            ).scalar()
+            exists = existing is not None and "scope" in existing
+            if existing is not None and not exists:
+                for statement in LOG_SEARCH_OBJECTS:
+                    conn.execute(text(statement))
+            for statement in LOG_SEARCH_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')"))
+        return True
+    except Exception as e:
+        logger.warning(f"Log search is unavailable, could not set up FTS5: {str(e)}")
+        return False
+
+# highlight() markers: control characters that don't occur in log text, so
+# the text can be HTML-escaped before they are turned into <mark> tags
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+def render_highlight(value: Optional[str]) -> Optional[str]:
+    """HTML-escape a highlight() result and wrap the matched words in <mark> tags"""
+    if value is None:
+        return None
+    return html.escape(value).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, quoted so
+    characters like '-' or ':' are not read as query syntax. A trailing
+    '*' on a word keeps prefix matching.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if not word:
+            continue
+        terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+def scope_match_query(match: str, project_id: int) -> str:
+    """Restrict a build_match_query() result to the logs of a project"""
+    return f'scope:"p{project_id}" AND {{action details}}:({match})'
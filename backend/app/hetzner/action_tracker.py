@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from hcloud.actions.client import BoundAction
+from ..config import settings
+from ..database import models
+from ..database.database import AsyncSessionLocal
+from .async_api import hetzner_api, model_client
+from .rate_limit import background_priority
+from .serializers import serialize_action
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+# Ids per request to the actions endpoint (its page size limit)
+ACTIONS_PER_REQUEST = 50
+
+def is_finished(action: Dict[str, Any]) -> bool:
+    return action["status"] not in ("running", "unknown")
+
+class ActionTracker:
+    """
+    Follows Hetzner actions until they finish. Mutating endpoints register
+    the actions they start, and a single background loop polls the pending
+    actions of each project in batches (one request covers up to 50 ids),
+    backing off while nothing changes. Callers wait for or subscribe to
+    completion here instead of polling every action on their own.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, backoff: float, retention: int):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = max(backoff, 1.0)
+        self.retention = retention
+        # (project_id, action_id) -> serialized action
+        self._actions: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        # (project_id, action_id) -> monotonic time the action finished
+        self._finished_at: Dict[Tuple[int, int], float] = {}
+        # project_id -> ids of the actions still running
+        self._pending: Dict[int, Set[int]] = {}
+        # project_id -> (current poll interval, monotonic time of the next poll)
+        self._schedule: Dict[int, Tuple[float, float]] = {}
+        # (project_id, action ids, queue) of every active watcher
+        self._watchers: List[Tuple[int, Set[int], asyncio.Queue]] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _store(self, project_id: int, action: Dict[str, Any]):
+        """Record an action state, caller holds the lock"""
+        key = (project_id, action["id"])
+        self._actions[key] = action
+        if is_finished(action):
+            self._finished_at.setdefault(key, time.monotonic())
+            pending = self._pending.get(project_id)
+            if pending is not None:
+                pending.discard(action["id"])
+                if not pending:
+                    del self._pending[project_id]
+                    self._schedule.pop(project_id, None)
+        else:
+            self._pending.setdefault(project_id, set()).add(action["id"])
+
+    def _poll_soon(self, project_id: int):
+        """Reset a project's backoff and wake the poll loop (thread-safe)"""
+        with self._lock:
+            if project_id in self._pending:
+                self._schedule[project_id] = (self.min_interval, time.monotonic() + self.min_interval)
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def track(self, project_id: int, action) -> Dict[str, Any]:
+        """Register an action returned by the Hetzner API, returns it serialized"""
+        data = serialize_action(action)
+        with self._lock:
+            self._store(project_id, data)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._notify, project_id, data)
+        self._poll_soon(project_id)
+        return data
+
+    def track_ids(self, project_id: int, action_ids: Iterable[int]):
+        """Start following actions known only by id (their state is fetched on the next poll)"""
+        added = False
+        with self._lock:
+            for action_id in action_ids:
+                if (project_id, action_id) not in self._actions:
+                    self._store(project_id, {"id": action_id, "status": "unknown"})
+                    added = True
+        if added:
+            self._poll_soon(project_id)
+
+    def get(self, project_id: int, action_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                self._actions.get((project_id, action_id), {"id": action_id, "status": "unknown"})
+                for action_id in action_ids
+            ]
+
+    def _notify(self, project_id: int, action: Dict[str, Any]):
+        for watcher_project_id, action_ids, queue in self._watchers:
+            if watcher_project_id == project_id and action["id"] in action_ids:
+                queue.put_nowait(action)
+
+    async def watch(self, project_id: int, action_ids: List[int]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the current state of the actions, then every change, until all have finished"""
+        queue: asyncio.Queue = asyncio.Queue()
+        watcher = (project_id, set(action_ids), queue)
+        self._watchers.append(watcher)
+        try:
+            self.track_ids(project_id, action_ids)
+            latest = {action["id"]: action for action in self.get(project_id, action_ids)}
+            for action in latest.values():
+                yield action
+            while not all(is_finished(action) for action in latest.values()):
+                action = await queue.get()
+                if latest.get(action["id"]) != action:
+                    latest[action["id"]] = action
+                    yield action
+        finally:
+            self._watchers.remove(watcher)
+
+    async def wait(self, project_id: int, action_ids: List[int], timeout: float) -> Dict[str, Any]:
+        """Wait until all actions have finished or the timeout expires"""
+        async def consume():
+            async for _ in self.watch(project_id, action_ids):
+                pass
+        try:
+            await asyncio.wait_for(consume(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        actions = self.get(project_id, action_ids)
+        return {"actions": actions, "done": all(is_finished(action) for action in actions)}
+
+    @staticmethod
+    async def _fetch(project_id: int, action_ids: List[int]) -> List[Dict[str, Any]]:
+        """Fetch the given actions of a project in batches"""
+        async with AsyncSessionLocal() as db:
+            project = await db.get(models.Project, project_id)
+        if project is None:
+            raise LookupError("Project not found")
+        await hetzner_api.validate(project)
+        actions = []
+        for start in range(0, len(action_ids), ACTIONS_PER_REQUEST):
+            batch = action_ids[start:start + ACTIONS_PER_REQUEST]
+            response = await hetzner_api.request(
+                project, "GET", "/actions",
+                params={"id": batch, "per_page": ACTIONS_PER_REQUEST}
+            )
+            actions.extend(serialize_action(BoundAction(model_client.actions, data)) for data in response["actions"])
+        # Ids the API doesn't know (other account, typo) are finished as not found
+        found = {action["id"] for action in actions}
+        actions.extend({"id": action_id, "status": "not_found"} for action_id in action_ids if action_id not in found)
+        return actions
+
+    async def _poll_project(self, project_id: int, action_ids: List[int], interval: float):
+        changed = False
+        try:
+            with background_priority():
+                actions = await self._fetch(project_id, action_ids)
+        except LookupError:
+            # Project was deleted, stop following its actions
+            actions = [{"id": action_id, "status": "not_found"} for action_id in action_ids]
+        except Exception as e:
+            logger.warning(f"Polling actions of project {project_id} failed: {str(e)}")
+            actions = []
+        updates = []
+        with self._lock:
+            for action in actions:
+                if self._actions.get((project_id, action["id"])) != action:
+                    self._store(project_id, action)
+                    updates.append(action)
+                    changed = True
+            if project_id in self._pending:
+                # Back off while nothing moves, poll quickly again once something does
+                interval = self.min_interval if changed else min(interval * self.backoff, self.max_interval)
+                self._schedule[project_id] = (interval, time.monotonic() + interval)
+        for action in updates:
+            self._notify(project_id, action)
+
+    def _purge(self, now: float):
+        with self._lock:
+            for key, finished_at in list(self._finished_at.items()):
+                if now - finished_at > self.retention:
+                    del self._finished_at[key]
+                    self._actions.pop(key, None)
+
+    async def _run(self):
+        while True:
+            # Cleared before looking at the schedule, so actions tracked from now on wake us up
+            self._wakeup.clear()
+            now = time.monotonic()
+            self._purge(now)
+            with self._lock:
+                due = []
+                for project_id, action_ids in self._pending.items():
+                    interval, next_poll = self._schedule.setdefault(project_id, (self.min_interval, now))
+                    if next_poll <= now:
+                        due.append((project_id, sorted(action_ids), interval))
+            if due:
+                await asyncio.gather(*(self._poll_project(*entry) for entry in due))
+            with self._lock:
+                next_polls = [next_poll for _, next_poll in self._schedule.values()]
+            timeout = max(min(next_polls) - time.monotonic(), 0) if next_polls else self.retention
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": sum(len(action_ids) for action_ids in self._pending.values()),
+                "projects": len(self._pending),
+                "tracked": len(self._actions),
+                "watchers": len(self._watchers),
+                "intervals": {project_id: interval for project_id, (interval, _) in self._schedule.items()}
+            }
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+
+action_tracker = ActionTracker(
+    min_interval=settings.ACTION_POLL_MIN_INTERVAL,
+    max_interval=settings.ACTION_POLL_MAX_INTERVAL,
+    backoff=settings.ACTION_POLL_BACKOFF,
+    retention=settings.ACTION_RETENTION
+)
@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Optional
+import httpx
+from hcloud import APIException, Client
+from ..config import settings
+from ..database import models
+from .client_pool import client_pool
+from .rate_limit import rate_limiter
+from .single_flight import AsyncSingleFlight, request_key
+from .token_cache import token_cache
+
+API_ENDPOINT = "https://api.hetzner.cloud/v1"
+# Items per page when listing a collection (the API maximum)
+PER_PAGE = 50
+
+class ModelClient(Client):
+    """
+    hcloud client used only to build domain models (BoundServer, ...) from
+    payloads fetched by AsyncHetznerAPI, so the existing serializers apply.
+    It never sends requests: lazy loading would block the event loop.
+    """
+
+    def __init__(self):
+        super().__init__(token="")
+
+    def request(self, method, url, tries=1, **kwargs):
+        raise RuntimeError(f"Lazy loading {url} is not available on asynchronously fetched models")
+
+model_client = ModelClient()
+
+class AsyncHetznerAPI:
+    """
+    asyncio client for the Hetzner REST API, used by the paths that fan out
+    to many calls (fleet queries, action and server status polling). All
+    projects share one connection pool, so concurrent calls cost sockets
+    and coroutines instead of upstream executor threads. Calls draw from
+    the same rate limit budget, coalesce identical reads and notify the
+    same write listeners as the pooled hcloud clients.
+    """
+
+    def __init__(self, endpoint: str, max_connections: int, timeout: float):
+        self.endpoint = endpoint
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._http: Optional[httpx.AsyncClient] = None
+        self._reads = AsyncSingleFlight()
+        # project_id -> writes sent, so reads issued after a write never join a read started before it
+        self._write_generation: Dict[int, int] = {}
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.endpoint,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._http
+
+    async def request(self, project: models.Project, method: str, url: str,
+                      params: Optional[Dict[str, Any]] = None, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send an API request for a project and return the decoded response"""
+        if method.upper() == "GET":
+            key = request_key(project.id, project.api_key, url, params, self._write_generation.get(project.id, 0))
+            return await self._reads.do(key, self._send, project, method, url, params, json)
+        return await self._send(project, method, url, params, json)
+
+    async def _send(self, project: models.Project, method: str, url: str,
+                    params: Optional[Dict[str, Any]], json: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        await rate_limiter.acquire_async(project.id)
+        try:
+            response = await self._client().request(
+                method, url, params=params, json=json,
+                headers={"Authorization": f"Bearer {project.api_key}"}
+            )
+        finally:
+            if method.upper() != "GET":
+                self._write_generation[project.id] = self._write_generation.get(project.id, 0) + 1
+                client_pool.notify_write(project.id, method, url)
+        rate_limiter.update(project.id, response.headers)
+        try:
+            payload = response.json() if response.content else {}
+        except ValueError:
+            payload = {}
+        if response.status_code >= 400:
+            error = payload.get("error") or {}
+            if response.status_code == 401:
+                token_cache.mark_invalid(project.id, project.api_key)
+            # Same exception as the hcloud SDK, so callers handle both transports alike
+            raise APIException(
+                code=error.get("code", response.status_code),
+                message=error.get("message", response.reason_phrase),
+                details=error.get("details")
+            )
+        return payload
+
+    async def get_all(self, project: models.Project, url: str, key: str,
+                      params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch every page of a collection, returns the items under `key`"""
+        items: List[Dict[str, Any]] = []
+        page = 1
+        while page:
+            response = await self.request(project, "GET", url, params={**(params or {}), "page": page, "per_page": PER_PAGE})
+            items.extend(response.get(key, []))
+            pagination = (response.get("meta") or {}).get("pagination") or {}
+            page = pagination.get("next_page")
+        return items
+
+    async def validate(self, project: models.Project):
+        """Probe the API key unless it was validated within the TTL, raises if it's rejected"""
+        if not token_cache.is_valid(project.id, project.api_key):
+            await self.request(project, "GET", "/server_types", params={"per_page": 1})
+            token_cache.mark_valid(project.id, project.api_key)
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+hetzner_api = AsyncHetznerAPI(
+    endpoint=API_ENDPOINT,
+    max_connections=settings.HETZNER_ASYNC_MAX_CONNECTIONS,
+    timeout=settings.HETZNER_API_TIMEOUT
+)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from hcloud import Client
+from .action_tracker import action_tracker
+from .rate_limit import retry_after
+from .transport import run_upstream
+
+def _merge_labels(client: Client, server, labels: Dict[str, Optional[str]]):
+    # Merged into the existing labels, a null value removes the label
+    merged = dict(server.labels or {})
+    for key, value in labels.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    client.servers.update(server, labels=merged)
+    return None
+
+def _protection(enabled: bool, params: Dict[str, Any]) -> Dict[str, Optional[bool]]:
+    # Only the selected protection kinds are changed
+    return {
+        "delete": enabled if params.get("delete") else None,
+        "rebuild": enabled if params.get("rebuild") else None
+    }
+
+# operation -> function applying it to one server, returns the action it started (if any)
+BULK_OPERATIONS: Dict[str, Callable[[Client, Any, Dict[str, Any]], Any]] = {
+    "power_on": lambda client, server, params: client.servers.power_on(server),
+    "power_off": lambda client, server, params: client.servers.power_off(server),
+    "reboot": lambda client, server, params: client.servers.reboot(server),
+    "reset": lambda client, server, params: client.servers.reset(server),
+    "shutdown": lambda client, server, params: client.servers.shutdown(server),
+    "enable_protection": lambda client, server, params: client.servers.change_protection(server, **_protection(True, params)),
+    "disable_protection": lambda client, server, params: client.servers.change_protection(server, **_protection(False, params)),
+    "labels": lambda client, server, params: _merge_labels(client, server, params["labels"]),
+}
+
+def select_servers(client: Client, server_ids: Optional[List[int]], label_selector: Optional[str]) -> Tuple[List[Any], List[int]]:
+    """
+    Resolve the target servers with a single listing. Returns the servers
+    and the requested ids that don't exist.
+    """
+    if label_selector is not None:
+        return client.servers.get_all(label_selector=label_selector), []
+    wanted = set(server_ids)
+    servers = [server for server in client.servers.get_all() if server.id in wanted]
+    found = {server.id for server in servers}
+    return servers, [server_id for server_id in dict.fromkeys(server_ids) if server_id not in found]
+
+async def run_bulk(project_id: int, client: Client, servers: List[Any], operation: str,
+                   params: Dict[str, Any], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Apply an operation to servers, at most `concurrency` at a time, and
+    yield a result per server in the order they complete. Started actions
+    are registered with the action tracker.
+    """
+    apply_operation = BULK_OPERATIONS[operation]
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def apply(server) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.monotonic()
+            result = {"server_id": server.id, "name": server.name}
+            try:
+                action = await run_upstream(apply_operation, client, server, params)
+                result.update(
+                    status="success",
+                    action=action_tracker.track(project_id, action) if action is not None else None
+                )
+            except Exception as e:
+                result.update(status="failed", error=str(e))
+                wait = retry_after(e)
+                if wait is not None:
+                    result["retry_after"] = wait
+            result["elapsed"] = round(time.monotonic() - started, 3)
+            return result
+
+    for completed in asyncio.as_completed([apply(server) for server in servers]):
+        yield await completed
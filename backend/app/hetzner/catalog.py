@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from hcloud import Client
+from ..config import settings
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+def _isoformat(value):
+    return value.isoformat() if value is not None and hasattr(value, "isoformat") else value
+
+def _serialize_image(image) -> Dict[str, Any]:
+    return {
+        "id": image.id,
+        "name": image.name,
+        "description": image.description,
+        "type": image.type,
+        "os_flavor": image.os_flavor
+    }
+
+def _serialize_server_type(st) -> Dict[str, Any]:
+    server_type_data = {
+        "id": st.id,
+        "name": st.name,
+        "description": st.description or "",
+        "cores": st.cores,
+        "memory": st.memory,
+        "disk": st.disk,
+        "prices": []
+    }
+    # Safely handle prices
+    if hasattr(st, 'prices') and st.prices:
+        try:
+            for price in st.prices:
+                try:
+                    # Safely access price attributes
+                    location_name = "unknown"
+                    if isinstance(price, dict):
+                        location_name = price.get("location") or "unknown"
+                    elif hasattr(price, 'location') and price.location:
+                        location_name = price.location.name if hasattr(price.location, 'name') else "unknown"
+                    price_monthly = 0
+                    monthly = price.get("price_monthly") if isinstance(price, dict) else getattr(price, 'price_monthly', None)
+                    # Try multiple paths to get the price
+                    if isinstance(monthly, dict):
+                        try:
+                            price_monthly = float(monthly.get("gross") or monthly.get("net") or 0)
+                        except (ValueError, TypeError):
+                            pass
+                    elif hasattr(monthly, 'gross'):
+                        price_monthly = float(monthly.gross)
+                    elif hasattr(monthly, 'net'):
+                        price_monthly = float(monthly.net)
+                    elif isinstance(monthly, (int, float, str)):
+                        try:
+                            price_monthly = float(monthly)
+                        except (ValueError, TypeError):
+                            pass
+                    # Also try direct pricing info if it exists
+                    if hasattr(price, 'gross') and price_monthly == 0:
+                        try:
+                            price_monthly = float(price.gross)
+                        except (ValueError, TypeError):
+                            pass
+                    server_type_data["prices"].append({
+                        "location": location_name,
+                        "price_monthly": price_monthly
+                    })
+                except Exception as e:
+                    logger.warning(f"Error processing price: {str(e)}")
+                    continue
+        except Exception as e:
+            logger.warning(f"Error iterating prices: {str(e)}")
+    return server_type_data
+
+def _serialize_iso(iso) -> Dict[str, Any]:
+    return {
+        "id": iso.id,
+        "name": iso.name,
+        "description": iso.description,
+        "type": iso.type,
+        "architecture": getattr(iso, 'architecture', None),
+        "deprecated": _isoformat(iso.deprecated),
+        "size": getattr(iso, 'size', None)
+    }
+
+def _serialize_location(location) -> Dict[str, Any]:
+    return {
+        "id": location.id,
+        "name": location.name,
+        "description": location.description,
+        "country": location.country,
+        "city": location.city,
+        "network_zone": location.network_zone
+    }
+
+def _serialize_datacenter(datacenter) -> Dict[str, Any]:
+    server_types = datacenter.server_types
+    return {
+        "id": datacenter.id,
+        "name": datacenter.name,
+        "description": datacenter.description,
+        "location": datacenter.location.name if datacenter.location else None,
+        "server_types": {
+            "supported": [st.id for st in server_types.supported or []],
+            "available": [st.id for st in server_types.available or []]
+        } if server_types else None
+    }
+
+def _load_images(client: Client) -> List[Dict[str, Any]]:
+    # Unnamed images are project snapshots/backups, only named ones are shared
+    return [_serialize_image(image) for image in client.images.get_all() if image.name is not None]
+
+def _load_server_types(client: Client) -> List[Dict[str, Any]]:
+    return [_serialize_server_type(st) for st in client.server_types.get_all()]
+
+def _load_isos(client: Client) -> List[Dict[str, Any]]:
+    return [_serialize_iso(iso) for iso in client.isos.get_all()]
+
+def _load_locations(client: Client) -> List[Dict[str, Any]]:
+    return [_serialize_location(location) for location in client.locations.get_all()]
+
+def _load_datacenters(client: Client) -> List[Dict[str, Any]]:
+    return [_serialize_datacenter(dc) for dc in client.datacenters.get_all()]
+
+# name -> (loader, shared between projects)
+CATALOG_LOADERS: Dict[str, Tuple[Callable[[Client], List[Dict[str, Any]]], bool]] = {
+    "images": (_load_images, True),
+    "server_types": (_load_server_types, True),
+    # ISO listings include the project's private ISOs, so they are cached per project
+    "isos": (_load_isos, False),
+    "locations": (_load_locations, True),
+    "datacenters": (_load_datacenters, True),
+}
+
+class CatalogCache:
+    """
+    TTL cache for the near-static Hetzner catalogs (images, server types,
+    ISOs, locations, datacenters). Concurrent misses for the same catalog
+    wait for a single upstream fetch, and the cache can optionally be
+    persisted to a JSON file so it survives restarts.
+    """
+
+    def __init__(self, ttls: Dict[str, int], persist_path: Optional[str] = None):
+        self.ttls = ttls
+        self.persist_path = persist_path or None
+        # cache key -> {"fetched_at": epoch seconds, "data": [...]}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._save_lock = threading.Lock()
+        self._load_from_disk()
+
+    @staticmethod
+    def _key(name: str, project_id: Optional[int]) -> str:
+        shared = CATALOG_LOADERS[name][1]
+        return name if shared else f"{name}:{project_id}"
+
+    def _is_fresh(self, name: str, entry: Optional[Dict[str, Any]], max_age: Optional[float] = None) -> bool:
+        ttl = self.ttls.get(name, 0) if max_age is None else max_age
+        return entry is not None and time.time() - entry["fetched_at"] < ttl
+
+    def _fetch_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def get(self, name: str, client: Client, project_id: Optional[int] = None,
+            force: bool = False, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return a catalog, fetching it from the API when missing or expired.
+        max_age overrides the TTL, e.g. to re-check a catalog that lacks an
+        entry without refetching it on every request.
+        """
+        if name not in CATALOG_LOADERS:
+            raise KeyError(f"Unknown catalog '{name}'")
+        if force:
+            max_age = 0
+        key = self._key(name, project_id)
+        with self._lock:
+            entry = self._entries.get(key)
+        if self._is_fresh(name, entry, max_age):
+            return entry["data"]
+        # Only one caller fetches, the others wait and reuse its result
+        with self._fetch_lock(key):
+            with self._lock:
+                current = self._entries.get(key)
+            if current is not entry and self._is_fresh(name, current, max_age):
+                return current["data"]
+            loader = CATALOG_LOADERS[name][0]
+            try:
+                data = loader(client)
+            except Exception as e:
+                if current is not None and not force:
+                    logger.warning(f"Serving stale '{name}' catalog after fetch error: {str(e)}")
+                    return current["data"]
+                raise
+            with self._lock:
+                self._entries[key] = {"fetched_at": time.time(), "data": data}
+            self._save_to_disk()
+            return data
+
+    def refresh(self, client: Client, project_id: Optional[int] = None,
+                names: Optional[List[str]] = None) -> Dict[str, int]:
+        """Force a re-fetch of the given catalogs (all by default)"""
+        refreshed = {}
+        for name in names or list(CATALOG_LOADERS):
+            refreshed[name] = len(self.get(name, client, project_id, force=True))
+        return refreshed
+
+    def invalidate_project(self, project_id: int):
+        """Drop the per-project catalogs of a project"""
+        suffix = f":{project_id}"
+        with self._lock:
+            for key in [k for k in self._entries if k.endswith(suffix)]:
+                del self._entries[key]
+        self._save_to_disk()
+
+    def _load_from_disk(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries.update(entries)
+        except Exception as e:
+            logger.warning(f"Could not load catalog cache from {self.persist_path}: {str(e)}")
+
+    def _save_to_disk(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            snapshot = json.dumps(self._entries)
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with self._save_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.warning(f"Could not persist catalog cache to {self.persist_path}: {str(e)}")
+
+catalog_cache = CatalogCache(
+    ttls={
+        "images": settings.CATALOG_TTL_IMAGES,
+        "server_types": settings.CATALOG_TTL_SERVER_TYPES,
+        "isos": settings.CATALOG_TTL_ISOS,
+        "locations": settings.CATALOG_TTL_LOCATIONS,
+        "datacenters": settings.CATALOG_TTL_DATACENTERS,
+    },
+    persist_path=settings.CATALOG_CACHE_FILE
+)
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from hcloud import Client, APIException
+from requests.adapters import HTTPAdapter
+from ..config import settings
+from ..database import models
+from .token_cache import token_cache
+from .rate_limit import rate_limiter
+from .single_flight import upstream_reads, request_key
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+class PooledClient(Client):
+    """
+    hcloud client bound to a project that reports rejected tokens to the
+    token cache, draws every request from the project's rate limit budget
+    and coalesces identical concurrent reads
+    """
+
+    # hcloud retries rate limited requests after a fixed sleep, the rate
+    # limiter already waits for budget before each attempt
+    _retry_wait_time = 0
+
+    def __init__(self, token: str, project_id: int, on_write: Optional[Callable[[int, str, str], None]] = None, **kwargs):
+        super().__init__(token=token, **kwargs)
+        self.project_id = project_id
+        self.on_write = on_write
+        # Bumped by every write, so reads issued after a write never join a read started before it
+        self._write_generation = 0
+        self._requests_session.hooks["response"].append(self._record_rate_limit)
+
+    def _record_rate_limit(self, response, *args, **kwargs):
+        rate_limiter.update(self.project_id, response.headers)
+
+    def request(self, method, url, tries=1, **kwargs):
+        # Identical reads in flight share one upstream call (retries run inside it)
+        if method.upper() == "GET" and tries == 1:
+            key = request_key(self.project_id, self.token, url, kwargs.get("params"), self._write_generation)
+            return upstream_reads.do(key, self._send, method, url, tries, **kwargs)
+        return self._send(method, url, tries, **kwargs)
+
+    def _send(self, method, url, tries=1, **kwargs):
+        rate_limiter.acquire(self.project_id)
+        try:
+            return super().request(method, url, tries, **kwargs)
+        except APIException as e:
+            if e.code in ("unauthorized", 401):
+                token_cache.mark_invalid(self.project_id, self.token)
+            raise
+        finally:
+            if method.upper() != "GET":
+                self._write_generation += 1
+                if self.on_write is not None:
+                    self.on_write(self.project_id, method, url)
+
+class _PoolEntry:
+    __slots__ = ("client", "api_key", "last_used")
+
+    def __init__(self, client: Client, api_key: str):
+        self.client = client
+        self.api_key = api_key
+        self.last_used = time.monotonic()
+
+class ClientPool:
+    """
+    Process-wide registry of hcloud clients keyed by project id.
+    Each client keeps its own requests session, so reusing it keeps the
+    keep-alive connections to the Hetzner API open between requests.
+    """
+
+    def __init__(self, max_size: int, idle_timeout: int, max_connections: int):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self._entries: "OrderedDict[int, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_listeners: List[Callable[[int, str, str], None]] = []
+
+    def _build_client(self, project_id: int, api_key: str) -> Client:
+        client = PooledClient(token=api_key, project_id=project_id, on_write=self.notify_write)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+        client._requests_session.mount("https://", adapter)
+        return client
+
+    def add_write_listener(self, listener: Callable[[int, str, str], None]):
+        """Register a callback run with (project_id, method, url) after every non-GET API call"""
+        self._write_listeners.append(listener)
+
+    def notify_write(self, project_id: int, method: str, url: str):
+        for listener in self._write_listeners:
+            try:
+                listener(project_id, method, url)
+            except Exception as e:
+                logger.warning(f"Error in write listener: {str(e)}")
+
+    @staticmethod
+    def _close(entry: _PoolEntry):
+        try:
+            entry.client._requests_session.close()
+        except Exception as e:
+            logger.warning(f"Error closing Hetzner client session: {str(e)}")
+
+    def _evict_idle(self, now: float):
+        if self.idle_timeout <= 0:
+            return
+        # Entries are kept in LRU order, so idle ones are at the front
+        while self._entries:
+            project_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used < self.idle_timeout:
+                break
+            del self._entries[project_id]
+            self._close(entry)
+
+    def get(self, project: models.Project) -> Client:
+        """Return the pooled client for a project, creating it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(project.id)
+            if entry is not None and entry.api_key != project.api_key:
+                # API key changed behind our back, drop the stale client
+                del self._entries[project.id]
+                self._close(entry)
+                entry = None
+            if entry is None:
+                entry = _PoolEntry(self._build_client(project.id, project.api_key), project.api_key)
+                self._entries[project.id] = entry
+                while len(self._entries) > max(self.max_size, 1):
+                    _, oldest = self._entries.popitem(last=False)
+                    self._close(oldest)
+            else:
+                self._entries.move_to_end(project.id)
+            entry.last_used = now
+            return entry.client
+
+    def invalidate(self, project_id: int):
+        """Drop the pooled client of a project (after its API key changed or it was deleted)"""
+        with self._lock:
+            entry = self._entries.pop(project_id, None)
+        if entry is not None:
+            self._close(entry)
+
+    def clear(self):
+        """Close every pooled client"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "idle_timeout": self.idle_timeout,
+                "max_connections": self.max_connections
+            }
+
+def probe_api_key(client: Client):
+    """Make a lightweight call to check that an API key is accepted"""
+    client.server_types.get_list(per_page=1)
+
+def get_validated_client(project: models.Project) -> Client:
+    """
+    Return the pooled client of a project, probing the API first when the
+    token hasn't been validated within the TTL. Raises if the probe fails.
+    """
+    client = client_pool.get(project)
+    if not token_cache.is_valid(project.id, project.api_key):
+        probe_api_key(client)
+        token_cache.mark_valid(project.id, project.api_key)
+    return client
+
+client_pool = ClientPool(
+    max_size=settings.HETZNER_CLIENT_POOL_SIZE,
+    idle_timeout=settings.HETZNER_CLIENT_IDLE_TIMEOUT,
+    max_connections=settings.HETZNER_CLIENT_MAX_CONNECTIONS
+)
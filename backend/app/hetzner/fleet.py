@@ -0,0 +1,174 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import time
+from hcloud.floating_ips.client import BoundFloatingIP
+from hcloud.servers.client import BoundServer
+from hcloud.volumes.client import BoundVolume
+from ..config import settings
+from ..database import async_crud, models
+from ..database.database import get_async_db
+from ..auth.jwt import get_current_user
+from ..app_logger.logger import log_action
+from .async_api import hetzner_api, model_client
+from .client_pool import get_validated_client
+from .transport import run_upstream
+from .serializers import serialize_server, serialize_volume, serialize_floating_ip, serialize_firewall
+
+router = APIRouter()
+
+# Upper bound on the number of projects a fleet query fans out to
+MAX_FLEET_PROJECTS = 1000
+
+def _async_loader(url: str, key: str, model: Callable, serializer: Callable) -> Callable:
+    """Loader listing a collection through the async API"""
+    async def load(project: models.Project) -> List[Dict[str, Any]]:
+        await hetzner_api.validate(project)
+        return [serializer(model(data)) for data in await hetzner_api.get_all(project, url, key)]
+    return load
+
+def _load_firewalls(project: models.Project) -> List[Dict[str, Any]]:
+    client = get_validated_client(project)
+    return [serialize_firewall(fw) for fw in client.firewalls.get_all()]
+
+async def _load_firewalls_async(project: models.Project) -> List[Dict[str, Any]]:
+    # The serializer lazy-loads the servers a firewall applies to, so this stays on the hcloud SDK
+    return await run_upstream(_load_firewalls, project)
+
+# resource -> (log action, coroutine function returning serialized items of one project)
+FLEET_RESOURCES: Dict[str, tuple] = {
+    "servers": ("FLEET_SERVERS_LIST", _async_loader(
+        "/servers", "servers", lambda data: BoundServer(model_client.servers, data), serialize_server)),
+    "volumes": ("FLEET_VOLUMES_LIST", _async_loader(
+        "/volumes", "volumes", lambda data: BoundVolume(model_client.volumes, data), serialize_volume)),
+    "floating_ips": ("FLEET_FLOATING_IPS_LIST", _async_loader(
+        "/floating_ips", "floating_ips", lambda data: BoundFloatingIP(model_client.floating_ips, data), serialize_floating_ip)),
+    "firewalls": ("FLEET_FIREWALLS_LIST", _load_firewalls_async),
+}
+
+def _sort_key(field: str):
+    def key(item: Dict[str, Any]):
+        value = item.get(field)
+        # Keep items without the field at the end, compare mixed types as strings
+        return (value is None, value if isinstance(value, (int, float)) else str(value or ""))
+    return key
+
+async def _fleet_query(
+    resource: str,
+    name: Optional[str],
+    sort: str,
+    page: int,
+    per_page: int,
+    db: AsyncSession,
+    current_user: models.User
+) -> Dict[str, Any]:
+    action, loader = FLEET_RESOURCES[resource]
+    projects = await async_crud.get_projects(db, current_user.id, 0, MAX_FLEET_PROJECTS)
+    semaphore = asyncio.Semaphore(max(settings.FLEET_MAX_CONCURRENCY, 1))
+
+    async def fetch(project: models.Project):
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                items = await asyncio.wait_for(
+                    loader(project),
+                    timeout=settings.FLEET_PROJECT_TIMEOUT
+                )
+                error = None
+            except asyncio.TimeoutError:
+                items, error = [], f"No response within {settings.FLEET_PROJECT_TIMEOUT:g}s"
+            except Exception as e:
+                items, error = [], str(e)
+            report = {
+                "id": project.id,
+                "name": project.name,
+                "status": "failed" if error else "success",
+                "count": len(items),
+                "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                "error": error
+            }
+            for item in items:
+                item["project_id"] = project.id
+                item["project_name"] = project.name
+            return items, report
+
+    results = await asyncio.gather(*(fetch(project) for project in projects))
+    merged = [item for items, _ in results for item in items]
+    reports = [report for _, report in results]
+    if name:
+        needle = name.lower()
+        merged = [item for item in merged if needle in str(item.get("name") or item.get("ip") or "").lower()]
+    field, _, direction = sort.partition(":")
+    merged.sort(key=_sort_key(field), reverse=direction == "desc")
+    start = (page - 1) * per_page
+    failed = [report for report in reports if report["error"]]
+    # Log fleet query
+    log_action(
+        action=action,
+        details=f"Retrieved {len(merged)} {resource} from {len(reports) - len(failed)}/{len(reports)} projects",
+        status="failed" if failed and len(failed) == len(reports) else "success",
+        project_id=None,
+        user_id=current_user.id
+    )
+    return {
+        resource: merged[start:start + per_page],
+        "meta": {
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "total_entries": len(merged)
+            }
+        },
+        "projects": reports
+    }
+
+SORT_PATTERN = "^[a-z_]+(:(asc|desc))?$"
+
+@router.get("/fleet/servers")
+async def list_fleet_servers(
+    name: Optional[str] = None,
+    sort: str = Query("name:asc", regex=SORT_PATTERN),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the servers of every project of the current user"""
+    return await _fleet_query("servers", name, sort, page, per_page, db, current_user)
+
+@router.get("/fleet/volumes")
+async def list_fleet_volumes(
+    name: Optional[str] = None,
+    sort: str = Query("name:asc", regex=SORT_PATTERN),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the volumes of every project of the current user"""
+    return await _fleet_query("volumes", name, sort, page, per_page, db, current_user)
+
+@router.get("/fleet/floating_ips")
+async def list_fleet_floating_ips(
+    name: Optional[str] = None,
+    sort: str = Query("ip:asc", regex=SORT_PATTERN),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the floating IPs of every project of the current user"""
+    return await _fleet_query("floating_ips", name, sort, page, per_page, db, current_user)
+
+@router.get("/fleet/firewalls")
+async def list_fleet_firewalls(
+    name: Optional[str] = None,
+    sort: str = Query("name:asc", regex=SORT_PATTERN),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the firewalls of every project of the current user"""
+    return await _fleet_query("firewalls", name, sort, page, per_page, db, current_user)
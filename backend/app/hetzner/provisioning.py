@@ -0,0 +1,188 @@
+import asyncio
+import secrets
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from hcloud import APIException, Client
+from hcloud.images.domain import Image
+from hcloud.locations.domain import Location
+from hcloud.server_types.domain import ServerType
+from hcloud.ssh_keys.domain import SSHKey
+from ..config import settings
+from ..app_logger.logger import log_action
+from .action_tracker import action_tracker
+from .rate_limit import RateLimitExceeded, background_priority, retry_after
+from .transport import run_upstream
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+# Hetzner error codes worth retrying, other API errors (invalid input, name taken, ...) fail right away
+TRANSIENT_ERROR_CODES = {"rate_limit_exceeded", "locked", "conflict", "server_error", "timeout", "unavailable", "maintenance"}
+
+def is_transient(e: Exception) -> bool:
+    if isinstance(e, RateLimitExceeded):
+        return True
+    if isinstance(e, APIException):
+        return e.code in TRANSIENT_ERROR_CODES
+    # Connection errors, timeouts, ...
+    return True
+
+def image_ref(image: str) -> Image:
+    """Image given by id or name"""
+    return Image(id=int(image)) if str(image).isdigit() else Image(name=image)
+
+def build_create_params(template: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments of servers.create for a template (everything but the name)"""
+    params = {
+        "server_type": ServerType(name=template["server_type"]),
+        "image": image_ref(template["image"]),
+        "start_after_create": template.get("start_after_create", True)
+    }
+    if template.get("location"):
+        params["location"] = Location(name=template["location"])
+    if template.get("ssh_keys"):
+        params["ssh_keys"] = [SSHKey(id=key_id) for key_id in template["ssh_keys"]]
+    if template.get("labels"):
+        params["labels"] = template["labels"]
+    if template.get("user_data"):
+        params["user_data"] = template["user_data"]
+    return params
+
+class ProvisioningJobs:
+    """
+    Runs batch server creations in the background and keeps their progress
+    for polling by job id. Creations run concurrently (bounded), share the
+    project's request budget at background priority and retry transient
+    failures with backoff. Jobs hold root passwords, so they only live in
+    memory and are dropped `retention` seconds after finishing.
+    """
+
+    def __init__(self, concurrency: int, retries: int, retention: int):
+        self.concurrency = max(concurrency, 1)
+        self.retries = retries
+        self.retention = retention
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def start(self, project_id: int, user_id: int, client: Client, template: Dict[str, Any],
+              names: List[str], concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """Create a job for the given server names and start it"""
+        job = {
+            "id": secrets.token_hex(8),
+            "project_id": project_id,
+            "user_id": user_id,
+            "status": "running",
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "template": {key: value for key, value in template.items() if key != "user_data"},
+            "servers": [
+                {"name": name, "status": "pending", "attempts": 0, "server_id": None,
+                 "ip": None, "root_password": None, "action": None, "error": None}
+                for name in names
+            ]
+        }
+        self._jobs[job["id"]] = job
+        limit = min(concurrency or self.concurrency, self.concurrency)
+        task = asyncio.get_running_loop().create_task(self._run(job, client, template, limit))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            servers = [dict(entry) for entry in job["servers"]]
+        # Current state of each creation action from the action tracker
+        for entry in servers:
+            if entry["action"] is not None:
+                entry["action"] = action_tracker.get(job["project_id"], [entry["action"]["id"]])[0]
+        counts: Dict[str, int] = {}
+        for entry in servers:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {**job, "servers": servers, "counts": counts}
+
+    @staticmethod
+    def _create(client: Client, name: str, params: Dict[str, Any], retrying: bool):
+        try:
+            return client.servers.create(name=name, **params), None
+        except APIException as e:
+            # An earlier attempt may have created the server before failing on our side
+            if retrying and e.code == "uniqueness_error":
+                server = client.servers.get_by_name(name)
+                if server is not None:
+                    return None, server
+            raise
+
+    async def _create_one(self, job: Dict[str, Any], entry: Dict[str, Any], client: Client,
+                          params: Dict[str, Any], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            for attempt in range(1, self.retries + 2):
+                with self._lock:
+                    entry.update(status="creating", attempts=attempt)
+                try:
+                    with background_priority():
+                        response, existing = await run_upstream(self._create, client, entry["name"], params, attempt > 1)
+                except Exception as e:
+                    if attempt <= self.retries and is_transient(e):
+                        with self._lock:
+                            entry.update(status="retrying", error=str(e))
+                        await asyncio.sleep(retry_after(e) or min(2 ** attempt, 30))
+                        continue
+                    with self._lock:
+                        entry.update(status="failed", error=str(e))
+                    return
+                server = response.server if response is not None else existing
+                with self._lock:
+                    entry.update(
+                        status="created",
+                        error=None,
+                        server_id=server.id,
+                        ip=server.public_net.ipv4.ip if server.public_net and server.public_net.ipv4 else None,
+                        root_password=response.root_password if response is not None else None,
+                        action=action_tracker.track(job["project_id"], response.action) if response is not None and response.action else None
+                    )
+                return
+
+    async def _run(self, job: Dict[str, Any], client: Client, template: Dict[str, Any], concurrency: int):
+        semaphore = asyncio.Semaphore(concurrency)
+        try:
+            params = build_create_params(template)
+            await asyncio.gather(*(
+                self._create_one(job, entry, client, params, semaphore) for entry in job["servers"]
+            ))
+        except Exception as e:
+            logger.error(f"Batch create job {job['id']} failed: {str(e)}")
+            with self._lock:
+                for entry in job["servers"]:
+                    if entry["status"] not in ("created", "failed"):
+                        entry.update(status="failed", error=str(e))
+        created = sum(1 for entry in job["servers"] if entry["status"] == "created")
+        failed = len(job["servers"]) - created
+        job["status"] = "completed" if not failed else ("failed" if not created else "partial")
+        job["finished_at"] = datetime.utcnow().isoformat()
+        # Drop the job (and its root passwords) once the retention is over, even if nobody polls it again
+        asyncio.get_running_loop().call_later(self.retention, self._jobs.pop, job["id"], None)
+        # Log batch result
+        log_action(
+            action="SERVER_BATCH_CREATE",
+            details=f"Batch create job {job['id']} finished: {created} created, {failed} failed",
+            status="success" if not failed else "failed",
+            project_id=job["project_id"],
+            user_id=job["user_id"]
+        )
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+provisioning_jobs = ProvisioningJobs(
+    concurrency=settings.BATCH_CREATE_CONCURRENCY,
+    retries=settings.BATCH_CREATE_RETRIES,
+    retention=settings.BATCH_JOB_RETENTION
+)
@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Mapping, Optional
+from fastapi import HTTPException
+from hcloud import APIException
+from ..config import settings
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+# Priority of the Hetzner calls made in the current context. Background work
+# (inventory sync, ...) yields to interactive requests when budget runs low.
+call_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "hetzner_call_priority", default=PRIORITY_INTERACTIVE
+)
+
+@contextmanager
+def background_priority():
+    """Run the enclosed Hetzner calls with background priority"""
+    token = call_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        call_priority.reset(token)
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than allowed for request budget"""
+
+    def __init__(self, project_id: int, retry_after: float):
+        super().__init__(f"Hetzner API rate limit reached, retry in {retry_after:.0f}s")
+        self.project_id = project_id
+        self.retry_after = retry_after
+
+class _Bucket:
+    __slots__ = ("limit", "tokens", "reset_at", "updated", "known", "waiting", "throttled")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.tokens = float(limit)
+        self.reset_at: Optional[float] = None  # Epoch seconds the budget is full again
+        self.updated = time.monotonic()
+        self.known = False  # Whether the API has reported the budget yet
+        self.waiting = 0
+        self.throttled = 0
+
+class RateLimiter:
+    """
+    Per-project token bucket mirroring the Hetzner API request budget. The
+    bucket refills at limit/hour and is corrected from the RateLimit-* headers
+    of every response. Background calls keep a reserve free for interactive
+    ones, and calls wait for budget up to max_wait seconds before failing.
+    """
+
+    def __init__(self, default_limit: int, reserve: float, max_wait: float):
+        self.default_limit = default_limit
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._buckets: Dict[int, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, project_id: int) -> _Bucket:
+        bucket = self._buckets.get(project_id)
+        if bucket is None:
+            bucket = self._buckets[project_id] = _Bucket(self.default_limit)
+        return bucket
+
+    @staticmethod
+    def _refill(bucket: _Bucket, now: float):
+        rate = bucket.limit / 3600
+        bucket.tokens = min(bucket.limit, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+
+    def _take(self, project_id: int, background: bool, deadline: float) -> float:
+        """Take one request if the budget allows it (returns 0), else return the seconds to wait"""
+        with self._lock:
+            bucket = self._bucket(project_id)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            floor = bucket.limit * self.reserve if background else 0
+            if bucket.tokens - 1 >= floor:
+                bucket.tokens -= 1
+                return 0
+            wait = (floor + 1 - bucket.tokens) / (bucket.limit / 3600)
+            if now + wait > deadline:
+                bucket.throttled += 1
+                raise RateLimitExceeded(project_id, wait)
+            return wait
+
+    def _count_waiting(self, project_id: int, delta: int):
+        with self._lock:
+            self._bucket(project_id).waiting += delta
+
+    def acquire(self, project_id: int):
+        """Take one request from the project's budget, waiting for it if needed"""
+        background = call_priority.get() == PRIORITY_BACKGROUND
+        deadline = time.monotonic() + self.max_wait
+        waiting = False
+        try:
+            while True:
+                wait = self._take(project_id, background, deadline)
+                if not wait:
+                    return
+                if not waiting:
+                    self._count_waiting(project_id, 1)
+                    waiting = True
+                time.sleep(min(wait, 1.0))
+        finally:
+            if waiting:
+                self._count_waiting(project_id, -1)
+
+    async def acquire_async(self, project_id: int):
+        """Same as acquire, for calls made from the event loop"""
+        background = call_priority.get() == PRIORITY_BACKGROUND
+        deadline = time.monotonic() + self.max_wait
+        waiting = False
+        try:
+            while True:
+                wait = self._take(project_id, background, deadline)
+                if not wait:
+                    return
+                if not waiting:
+                    self._count_waiting(project_id, 1)
+                    waiting = True
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            if waiting:
+                self._count_waiting(project_id, -1)
+
+    def update(self, project_id: int, headers: Mapping[str, str]):
+        """Correct the bucket from the RateLimit-* headers of an API response"""
+        try:
+            limit = int(headers["RateLimit-Limit"])
+            remaining = int(headers["RateLimit-Remaining"])
+        except (KeyError, TypeError, ValueError):
+            return
+        reset = headers.get("RateLimit-Reset")
+        with self._lock:
+            bucket = self._bucket(project_id)
+            bucket.limit = max(limit, 1)
+            bucket.tokens = float(remaining)
+            bucket.updated = time.monotonic()
+            bucket.reset_at = float(reset) if reset and reset.isdigit() else None
+            bucket.known = True
+
+    def reset(self, project_id: int):
+        """Forget the budget of a project (after its API key changed or it was deleted)"""
+        with self._lock:
+            self._buckets.pop(project_id, None)
+
+    def status(self, project_id: int) -> Dict[str, Any]:
+        with self._lock:
+            bucket = self._bucket(project_id)
+            self._refill(bucket, time.monotonic())
+            return {
+                "limit": bucket.limit,
+                "remaining": int(bucket.tokens),
+                "reset_at": bucket.reset_at,
+                "refill_per_second": round(bucket.limit / 3600, 4),
+                "background_reserve": int(bucket.limit * self.reserve),
+                "reported_by_api": bucket.known,
+                "waiting_calls": bucket.waiting,
+                "throttled_calls": bucket.throttled
+            }
+
+def retry_after(e: Exception) -> Optional[float]:
+    """Seconds to wait before retrying, if the error is a rate limit error"""
+    if isinstance(e, RateLimitExceeded):
+        return e.retry_after
+    if isinstance(e, APIException) and e.code in ("rate_limit_exceeded", 429):
+        return 1.0
+    return None
+
+def http_error(e: Exception, detail: str, status_code: int = 500) -> HTTPException:
+    """HTTP error for a failed Hetzner call, 429 with Retry-After when rate limited"""
+    wait = retry_after(e)
+    if wait is not None:
+        return HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(int(wait + 0.999), 1))}
+        )
+    return HTTPException(status_code=status_code, detail=detail)
+
+rate_limiter = RateLimiter(
+    default_limit=settings.HETZNER_RATE_LIMIT,
+    reserve=settings.HETZNER_RATE_LIMIT_RESERVE,
+    max_wait=settings.HETZNER_RATE_LIMIT_MAX_WAIT
+)
@@ -0,0 +1,406 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+from hcloud import APIException, Client
+from hcloud.servers.domain import Server
+from hcloud.server_types.domain import ServerType
+from ..config import settings
+from ..database import crud, models
+from ..database.database import SessionLocal
+from ..app_logger.logger import log_action
+from .action_tracker import action_tracker
+from .client_pool import get_validated_client
+from .provisioning import TRANSIENT_ERROR_CODES, image_ref
+from .rate_limit import RateLimitExceeded, background_priority, retry_after
+from .serializers import serialize_action
+from .transport import run_upstream
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+def _power_off(client: Client, server: Server, params: Dict[str, Any]):
+    # Nothing to do (no action) if the server is already off
+    if client.servers.get_by_id(server.id).status == "off":
+        return None
+    return client.servers.power_off(server)
+
+# operation -> steps run one after another on each server; every step starts
+# an action (or returns None) that must succeed before the next step
+ROLLOUT_STEPS: Dict[str, List[Callable[[Client, Server, Dict[str, Any]], Any]]] = {
+    "reboot": [
+        lambda client, server, params: client.servers.reboot(server),
+    ],
+    "rebuild": [
+        lambda client, server, params: client.servers.rebuild(server, image_ref(params["image"])),
+    ],
+    "change_type": [
+        _power_off,
+        lambda client, server, params: client.servers.change_type(
+            server, ServerType(name=params["server_type"]), upgrade_disk=params.get("upgrade_disk", True)
+        ),
+        lambda client, server, params: client.servers.power_on(server),
+    ],
+}
+
+# operation -> how to put a server back in service when a step fails after
+# `from_step` (change_type powered it off, don't leave it off)
+ROLLOUT_RECOVERY: Dict[str, Dict[str, Any]] = {
+    "change_type": {
+        "from_step": 1,
+        "run": lambda client, server, params: client.servers.power_on(server),
+        "done": "the server was powered back on",
+        "failed": "powering the server back on failed, the server is still off",
+    },
+}
+
+# Statuses of rollouts that still have work to do
+ACTIVE_STATUSES = ("running", "paused")
+
+# Attempts to start a step that the API rejected for a transient reason
+STEP_ATTEMPTS = 3
+
+def is_rejected(e: Exception) -> bool:
+    """
+    Whether the API refused to start a step for a transient reason. Unlike
+    connection errors, these never started anything, so retrying can't run
+    the step twice.
+    """
+    if isinstance(e, RateLimitExceeded):
+        return True
+    return isinstance(e, APIException) and e.code in TRANSIENT_ERROR_CODES
+
+def serialize_rollout(rollout: models.Rollout, with_items: bool = True) -> Dict[str, Any]:
+    counts: Dict[str, int] = {}
+    for item in rollout.items:
+        counts[item.status] = counts.get(item.status, 0) + 1
+    data = {
+        "id": rollout.id,
+        "project_id": rollout.project_id,
+        "operation": rollout.operation,
+        "params": json.loads(rollout.params or "{}"),
+        "wave_size": rollout.wave_size,
+        "max_unavailable": rollout.max_unavailable,
+        "max_failures": rollout.max_failures,
+        "wave_delay": rollout.wave_delay,
+        "status": rollout.status,
+        "current_wave": rollout.current_wave,
+        "waves": (len(rollout.items) + rollout.wave_size - 1) // rollout.wave_size,
+        "error": rollout.error,
+        "created_at": rollout.created_at.isoformat() if rollout.created_at else None,
+        "updated_at": rollout.updated_at.isoformat() if rollout.updated_at else None,
+        "counts": counts
+    }
+    if with_items:
+        data["items"] = [
+            {
+                "server_id": item.server_id,
+                "server_name": item.server_name,
+                "wave": item.wave,
+                "status": item.status,
+                "step": item.step,
+                "steps": len(ROLLOUT_STEPS.get(rollout.operation, [])),
+                "action_id": item.action_id,
+                "error": item.error,
+                "started_at": item.started_at.isoformat() if item.started_at else None,
+                "finished_at": item.finished_at.isoformat() if item.finished_at else None
+            }
+            for item in rollout.items
+        ]
+    return data
+
+def _snapshot(rollout: models.Rollout) -> Dict[str, Any]:
+    """Plain copy of a rollout and its items for the runner"""
+    return {
+        "id": rollout.id,
+        "project_id": rollout.project_id,
+        "user_id": rollout.user_id,
+        "operation": rollout.operation,
+        "params": json.loads(rollout.params or "{}"),
+        "max_unavailable": rollout.max_unavailable,
+        "max_failures": rollout.max_failures,
+        "wave_delay": rollout.wave_delay,
+        "status": rollout.status,
+        "items": [
+            {"id": item.id, "server_id": item.server_id, "wave": item.wave, "status": item.status,
+             "step": item.step or 0, "action_id": item.action_id}
+            for item in rollout.items
+        ]
+    }
+
+class RolloutOrchestrator:
+    """
+    Runs rollouts: an operation applied to servers in waves of wave_size,
+    at most max_unavailable servers at a time, and the next wave only starts
+    once every action of the current one has finished. State lives in the
+    database (rollouts, rollout_items), each step and action id is recorded
+    before it is awaited, so running rollouts pick up where they stopped
+    after a restart. Pausing or aborting stops new servers from starting;
+    servers already in progress finish their steps.
+    """
+
+    def __init__(self, action_timeout: int):
+        self.action_timeout = action_timeout
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # Rollouts resumed while their task was still winding down
+        self._restart: Set[int] = set()
+
+    # Database access, run on worker threads
+    @staticmethod
+    def _load(rollout_id: int) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            rollout = crud.get_rollout(db, rollout_id)
+            return _snapshot(rollout) if rollout is not None else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update(rollout_id: int, **fields):
+        db = SessionLocal()
+        try:
+            crud.update_rollout(db, rollout_id, **fields)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update_item(item_id: int, **fields):
+        db = SessionLocal()
+        try:
+            crud.update_rollout_item(db, item_id, **fields)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _start_item(item_id: int) -> bool:
+        db = SessionLocal()
+        try:
+            return crud.start_rollout_item(db, item_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _skip_pending(rollout_id: int):
+        db = SessionLocal()
+        try:
+            crud.skip_pending_rollout_items(db, rollout_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _running_ids() -> List[int]:
+        db = SessionLocal()
+        try:
+            return crud.get_rollout_ids_by_status(db, "running")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _client(project_id: int) -> Client:
+        db = SessionLocal()
+        try:
+            project = db.get(models.Project, project_id)
+            if project is None:
+                raise LookupError("Project not found")
+            return get_validated_client(project)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _start_step(project_id: int, server_id: int, operation: str, step: int,
+                    params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        client = RolloutOrchestrator._client(project_id)
+        action = ROLLOUT_STEPS[operation][step](client, Server(id=server_id), params)
+        return serialize_action(action) if action is not None else None
+
+    @staticmethod
+    def _start_recovery(project_id: int, server_id: int, operation: str,
+                        params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        client = RolloutOrchestrator._client(project_id)
+        action = ROLLOUT_RECOVERY[operation]["run"](client, Server(id=server_id), params)
+        return serialize_action(action) if action is not None else None
+
+    async def _status(self, rollout_id: int) -> Optional[str]:
+        rollout = await run_upstream(self._load, rollout_id)
+        return rollout["status"] if rollout is not None else None
+
+    async def _start_with_retry(self, start: Callable[..., Optional[Dict[str, Any]]], *args) -> Optional[Dict[str, Any]]:
+        """Run _start_step or _start_recovery, retrying when the API rejects it for a transient reason"""
+        for attempt in range(1, STEP_ATTEMPTS + 1):
+            try:
+                with background_priority():
+                    return await run_upstream(start, *args)
+            except Exception as e:
+                if attempt == STEP_ATTEMPTS or not is_rejected(e):
+                    raise
+                await asyncio.sleep(retry_after(e) or 2 ** attempt)
+
+    async def _recover(self, rollout: Dict[str, Any], item: Dict[str, Any], step: int) -> Optional[str]:
+        """
+        Put a server back in service after step `step` failed, returns a note
+        on the outcome (None if the operation needs no recovery at that step)
+        """
+        recovery = ROLLOUT_RECOVERY.get(rollout["operation"])
+        if recovery is None or step < recovery["from_step"]:
+            return None
+        project_id = rollout["project_id"]
+        try:
+            action = await self._start_with_retry(
+                self._start_recovery, project_id, item["server_id"], rollout["operation"], rollout["params"]
+            )
+            if action is not None:
+                result = await action_tracker.wait(project_id, [action["id"]], self.action_timeout)
+                if not result["done"] or result["actions"][0]["status"] != "success":
+                    raise RuntimeError(f"action {action['id']} did not succeed")
+        except Exception as e:
+            note = f"{recovery['failed']} ({str(e)})"
+            # Log failed recovery
+            log_action(
+                action="ROLLOUT",
+                details=f"Rollout {rollout['id']}: server {item['server_id']} failed during {rollout['operation']}, {note}",
+                status="failed",
+                project_id=project_id,
+                user_id=rollout["user_id"]
+            )
+            return note
+        return recovery["done"]
+
+    async def _fail_item(self, rollout: Dict[str, Any], item: Dict[str, Any], step: int, error: str):
+        note = await self._recover(rollout, item, step)
+        if note:
+            error = f"{error}; {note}"
+        await run_upstream(
+            self._update_item, item["id"], status="failed", error=error, finished_at=datetime.utcnow()
+        )
+
+    async def _run_item(self, rollout: Dict[str, Any], item: Dict[str, Any]):
+        project_id = rollout["project_id"]
+        steps = ROLLOUT_STEPS[rollout["operation"]]
+        step, action_id = item["step"], item["action_id"]
+        if item["status"] == "pending":
+            # Conditional, so an item skipped by an abort since the status check is never started
+            if not await run_upstream(self._start_item, item["id"]):
+                return
+        elif action_id is None and step < len(steps):
+            # Interrupted between starting a step and recording its action, its outcome is unknown
+            await self._fail_item(
+                rollout, item, step,
+                f"Interrupted during step {step + 1} of {len(steps)}, check the server before retrying"
+            )
+            return
+        while step < len(steps):
+            if action_id is None:
+                try:
+                    action = await self._start_with_retry(
+                        self._start_step, project_id, item["server_id"], rollout["operation"], step, rollout["params"]
+                    )
+                except Exception as e:
+                    await self._fail_item(rollout, item, step, str(e))
+                    return
+                if action is None:
+                    step += 1
+                    await run_upstream(self._update_item, item["id"], step=step)
+                    continue
+                action_id = action["id"]
+                await run_upstream(self._update_item, item["id"], action_id=action_id)
+            # Wait for the step's action before moving on
+            result = await action_tracker.wait(project_id, [action_id], self.action_timeout)
+            action = result["actions"][0]
+            if not result["done"] or action["status"] != "success":
+                if not result["done"]:
+                    error = f"Action {action_id} did not finish within {self.action_timeout}s"
+                else:
+                    error = f"Action {action_id} ({action.get('command')}) ended with {action['status']}"
+                    if action.get("error"):
+                        error += f": {action['error'].get('message')}"
+                await self._fail_item(rollout, item, step, error)
+                return
+            step, action_id = step + 1, None
+            await run_upstream(self._update_item, item["id"], step=step, action_id=None)
+        await run_upstream(self._update_item, item["id"], status="succeeded", finished_at=datetime.utcnow())
+
+    async def _run_wave(self, rollout: Dict[str, Any], items: List[Dict[str, Any]]):
+        semaphore = asyncio.Semaphore(max(rollout["max_unavailable"], 1))
+
+        async def run(item: Dict[str, Any]):
+            async with semaphore:
+                # Paused or aborted rollouts don't start new servers (in-flight ones always finish)
+                if item["status"] == "pending" and await self._status(rollout["id"]) != "running":
+                    return
+                await self._run_item(rollout, item)
+
+        await asyncio.gather(*(run(item) for item in items))
+
+    def _finish(self, rollout: Dict[str, Any], status: str, error: Optional[str] = None) -> Dict[str, Any]:
+        # Log rollout result
+        log_action(
+            action="ROLLOUT",
+            details=f"Rollout {rollout['id']} ({rollout['operation']}) {status}" + (f": {error}" if error else ""),
+            status="success" if status == "completed" else "failed",
+            project_id=rollout["project_id"],
+            user_id=rollout["user_id"]
+        )
+        return {"status": status, "error": error}
+
+    async def _run(self, rollout_id: int):
+        while True:
+            rollout = await run_upstream(self._load, rollout_id)
+            if rollout is None or rollout["status"] != "running":
+                return
+            items = rollout["items"]
+            failures = sum(1 for item in items if item["status"] == "failed")
+            if failures > rollout["max_failures"]:
+                await run_upstream(self._skip_pending, rollout_id)
+                await run_upstream(self._update, rollout_id, **self._finish(
+                    rollout, "failed", f"{failures} servers failed (max_failures is {rollout['max_failures']})"
+                ))
+                return
+            remaining = [item for item in items if item["status"] in ("pending", "running")]
+            if not remaining:
+                await run_upstream(self._update, rollout_id, **self._finish(rollout, "completed"))
+                return
+            wave = min(item["wave"] for item in remaining)
+            await run_upstream(self._update, rollout_id, current_wave=wave)
+            await self._run_wave(rollout, [item for item in remaining if item["wave"] == wave])
+            # Let the next wave wait unless this one was cut short by a pause or abort
+            if rollout["wave_delay"] and await self._status(rollout_id) == "running":
+                await asyncio.sleep(rollout["wave_delay"])
+
+    async def _run_guarded(self, rollout_id: int):
+        try:
+            await self._run(rollout_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Rollout {rollout_id} failed: {str(e)}")
+            await run_upstream(self._update, rollout_id, status="failed", error=str(e))
+        finally:
+            self._tasks.pop(rollout_id, None)
+            if rollout_id in self._restart:
+                self._restart.discard(rollout_id)
+                self.start(rollout_id)
+
+    def start(self, rollout_id: int):
+        """Run (or continue) a rollout in the background"""
+        if rollout_id in self._tasks:
+            # The running task may already have seen the rollout paused, look again once it ends
+            self._restart.add(rollout_id)
+        else:
+            self._tasks[rollout_id] = asyncio.get_running_loop().create_task(self._run_guarded(rollout_id))
+
+    def is_running(self, rollout_id: int) -> bool:
+        return rollout_id in self._tasks
+
+    async def resume_all(self):
+        """Continue the rollouts that were running when the backend stopped"""
+        for rollout_id in await run_upstream(self._running_ids):
+            self.start(rollout_id)
+
+    async def stop(self):
+        self._restart.clear()
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+rollout_orchestrator = RolloutOrchestrator(action_timeout=settings.ROLLOUT_ACTION_TIMEOUT)
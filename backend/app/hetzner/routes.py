@@ -1,14 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, Body, Path, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import OperationalError
 from typing import List, Optional, Dict, Any, Union
 from hcloud import Client
 from hcloud.servers.domain import Server as HetznerServer
 from pydantic import BaseModel, Field
-from datetime import datetime
-from ..database import crud, models
-from ..database.database import get_db
-from ..auth.jwt import get_current_user
+from datetime import datetime, timedelta, timezone
+import asyncio
+import base64
+import csv
+import io
+import json
+import time
+from ..config import settings
+from ..database import async_crud, crud, models
+from ..database.database import SessionLocal, get_async_db, get_db
+from ..database.search import build_match_query
+from ..auth.jwt import get_current_user, get_current_user_for_stream
 from ..app_logger.logger import log_action
+from ..app_logger.writer import log_writer
+from .client_pool import client_pool, get_validated_client, probe_api_key
+from .token_cache import token_cache
+from .catalog import catalog_cache
+from .rate_limit import rate_limiter, http_error
+from .transport import offload, run_upstream
+from .sync import inventory_sync
+from .server_events import format_event, server_events
+from .action_tracker import action_tracker
+from .bulk import BULK_OPERATIONS, run_bulk, select_servers
+from .provisioning import provisioning_jobs
+from .rollout import ACTIVE_STATUSES, ROLLOUT_STEPS, rollout_orchestrator, serialize_rollout
+from .serializers import (
+    serialize_server, serialize_ssh_key, serialize_floating_ip,
+    serialize_volume, serialize_firewall, serialize_network
+)
 router = APIRouter()
 
 # Request and response models
@@ -220,6 +247,51 @@ class ServerRdnsSettings(BaseModel):
 class ServerLabels(BaseModel):
     labels: Dict[str, str]
 
+class ServerBulkOperation(BaseModel):
+    operation: str = Field(..., regex="^(" + "|".join(BULK_OPERATIONS) + ")$")
+    # Target servers: either ids or a label selector
+    server_ids: Optional[List[int]] = Field(None, min_items=1, max_items=1000)
+    label_selector: Optional[str] = None
+    # Protection kinds changed by enable_protection / disable_protection
+    delete: Optional[bool] = True
+    rebuild: Optional[bool] = True
+    # Labels merged into each server's labels by the labels operation (null removes a label)
+    labels: Optional[Dict[str, Optional[str]]] = None
+    concurrency: Optional[int] = Field(None, ge=1)
+
+class ServerBatchCreate(BaseModel):
+    server_type: str
+    image: str
+    location: Optional[str] = None
+    ssh_keys: Optional[List[int]] = None
+    labels: Optional[Dict[str, str]] = None
+    user_data: Optional[str] = None
+    start_after_create: bool = True
+    # Either explicit names, or a count and a name pattern containing {n} (e.g. "web-{n:02d}")
+    names: Optional[List[str]] = Field(None, min_items=1)
+    count: Optional[int] = Field(None, ge=1)
+    name_pattern: Optional[str] = None
+    start_index: int = Field(1, ge=0)
+    concurrency: Optional[int] = Field(None, ge=1)
+
+class RolloutCreate(BaseModel):
+    operation: str = Field(..., regex="^(" + "|".join(ROLLOUT_STEPS) + ")$")
+    # Target servers: either ids (rolled out in this order) or a label selector
+    server_ids: Optional[List[int]] = Field(None, min_items=1)
+    label_selector: Optional[str] = None
+    # Image id or name for rebuild
+    image: Optional[str] = None
+    # New server type for change_type
+    server_type: Optional[str] = None
+    upgrade_disk: bool = True
+    # Servers per wave, of which at most max_unavailable are changed at once
+    wave_size: int = Field(1, ge=1)
+    max_unavailable: Optional[int] = Field(None, ge=1)
+    # Failed servers tolerated before the rollout stops
+    max_failures: int = Field(0, ge=0)
+    # Seconds to wait between waves
+    wave_delay: int = Field(0, ge=0, le=86400)
+
 class ServerImage(BaseModel):
     type: Optional[str] = "snapshot"  # snapshot یا backup
     description: Optional[str] = None
@@ -231,24 +303,47 @@ def get_hetzner_client(project_id: int, db: Session, user: models.User):
     if not project:
         raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
     try:
-        client = Client(token=project.api_key)
-        # Test connection with a lightweight call
-        client.server_types.get_all()
+        # Only probes the API when the token hasn't been validated recently
+        client = get_validated_client(project)
         return client, project
     except Exception as e:
         # Log connection error
         log_action(
-            db=db,
             action="API_CONNECTION",
             details=f"Error connecting to Hetzner API: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=user.id
         )
-        raise HTTPException(status_code=401, detail=f"API connection error: {str(e)}")
+        raise http_error(e, f"API connection error: {str(e)}", status_code=401)
+
+def read_from_mirror(project_id: int, resource_type: str, db: Session, user: models.User,
+                     resource_id: Optional[int] = None):
+    """
+    Serve a resource list (or a single resource) from the inventory mirror.
+    Returns (data, freshness), or None when it has to be fetched from the API.
+    """
+    if not inventory_sync.enabled:
+        return None
+    project = crud.get_project(db, project_id, user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    if inventory_sync.is_dirty(project.id, resource_type):
+        return None
+    state = crud.get_sync_state(db, project.id, resource_type)
+    if state is None or state.synced_at is None:
+        return None
+    if resource_id is None:
+        data = crud.get_mirrored_resources(db, project.id, resource_type)
+    else:
+        data = crud.get_mirrored_resource(db, project.id, resource_type, resource_id)
+        if data is None:
+            return None
+    return data, inventory_sync.freshness(state.synced_at)
 
 # Projects endpoints
 @router.get("/projects", response_model=List[ProjectResponse])
+@offload
 def list_projects(
     skip: int = 0,
     limit: int = 100,
@@ -260,6 +355,7 @@ def list_projects(
     return projects
 
 @router.get("/projects/{project_id}", response_model=ProjectResponse)
+@offload
 def get_project(
     project_id: int,
     db: Session = Depends(get_db),
@@ -272,6 +368,7 @@ def get_project(
     return project
 
 @router.post("/projects", response_model=ProjectResponse)
+@offload
 def create_project(
     project: ProjectCreate,
     db: Session = Depends(get_db),
@@ -281,11 +378,10 @@ def create_project(
     # Test if API key is valid
     try:
         client = Client(token=project.api_key)
-        client.server_types.get_all()
+        probe_api_key(client)
     except Exception as e:
         # Log failed project creation
         log_action(
-            db=db,
             action="PROJECT_CREATE",
             details=f"Failed to create project '{project.name}': Invalid API key: {str(e)}",
             status="failed",
@@ -300,9 +396,9 @@ def create_project(
         description=project.description,
         user_id=current_user.id
     )
+    token_cache.mark_valid(db_project.id, db_project.api_key)
     # Log successful project creation
     log_action(
-        db=db,
         action="PROJECT_CREATE",
         details=f"Project '{project.name}' created successfully",
         status="success",
@@ -312,6 +408,7 @@ def create_project(
     return db_project
 
 @router.put("/projects/{project_id}", response_model=ProjectResponse)
+@offload
 def update_project(
     project_id: int,
     project_data: ProjectUpdate,
@@ -323,11 +420,10 @@ def update_project(
     if project_data.api_key:
         try:
             client = Client(token=project_data.api_key)
-            client.server_types.get_all()
+            probe_api_key(client)
         except Exception as e:
             # Log failed project update
             log_action(
-                db=db,
                 action="PROJECT_UPDATE",
                 details=f"Failed to update project {project_id}: Invalid API key: {str(e)}",
                 status="failed",
@@ -344,9 +440,14 @@ def update_project(
     )
     if not updated_project:
         raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    # Drop the pooled client so the next request picks up the new API key
+    client_pool.invalidate(project_id)
+    if project_data.api_key:
+        token_cache.mark_valid(project_id, project_data.api_key)
+        # A new token comes with its own request budget
+        rate_limiter.reset(project_id)
     # Log successful project update
     log_action(
-        db=db,
         action="PROJECT_UPDATE",
         details=f"Project {project_id} updated successfully",
         status="success",
@@ -356,6 +457,7 @@ def update_project(
     return updated_project
 
 @router.delete("/projects/{project_id}")
+@offload
 def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
@@ -365,9 +467,13 @@ def delete_project(
     success = crud.delete_project(db, project_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    client_pool.invalidate(project_id)
+    token_cache.invalidate(project_id)
+    catalog_cache.invalidate_project(project_id)
+    inventory_sync.forget(project_id)
+    rate_limiter.reset(project_id)
     # Log project deletion
     log_action(
-        db=db,
         action="PROJECT_DELETE",
         details=f"Project {project_id} deleted successfully",
         status="success",
@@ -378,52 +484,352 @@ def delete_project(
 
 # Server endpoints
 @router.get("/projects/{project_id}/servers")
+@offload
 def list_servers(
     project_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get all servers for a project"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "servers", db, current_user)
+        if mirrored is not None:
+            servers, freshness = mirrored
+            # Log successful server list retrieval
+            log_action(
+                action="SERVER_LIST",
+                details=f"Retrieved {len(servers)} servers from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                "servers": servers,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
+        started = time.monotonic()
         servers = client.servers.get_all()
         # Log successful server list retrieval
         log_action(
-            db=db,
             action="SERVER_LIST",
             details=f"Retrieved {len(servers)} servers",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
+        items = [serialize_server(server) for server in servers]
+        freshness = inventory_sync.store(db, project.id, "servers", items, started)
         return {
-            "servers": [
-                {
-                    "id": server.id,
-                    "name": server.name,
-                    "status": server.status.lower(),  # Normalize status
-                    "ip": server.public_net.ipv4.ip if server.public_net and server.public_net.ipv4 else None,
-                    "location": server.datacenter.location.name if server.datacenter and server.datacenter.location else None,
-                    "server_type": server.server_type.name if server.server_type else None,
-                    "image": server.image.name if server.image else None,
-                    "created": server.created.isoformat() if server.created else None
-                }
-                for server in servers
-            ]
+            "servers": items,
+            **freshness
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_LIST",
             details=f"Error retrieving server list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving servers: {str(e)}")
+        raise http_error(e, f"Error retrieving servers: {str(e)}")
+
+@router.get("/projects/{project_id}/servers/events")
+async def stream_server_events(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_for_stream)
+):
+    """
+    Stream server status changes and action progress as Server-Sent Events.
+    Starts with a `snapshot` event, then sends `server`, `deleted`,
+    `progress` and `poll_error` events.
+    """
+    project = await async_crud.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    # The stream can stay open for hours, don't hold a database connection meanwhile
+    await db.close()
+    
+    # Log stream subscription
+    log_action(
+        action="SERVER_EVENTS",
+        details="Subscribed to server events",
+        status="success",
+        project_id=project_id,
+        user_id=current_user.id
+    )
+    return StreamingResponse(
+        server_events.stream(project_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/projects/{project_id}/servers/bulk")
+async def bulk_server_operation(
+    project_id: int,
+    bulk_data: ServerBulkOperation,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Apply one operation to many servers concurrently. Streams one JSON line
+    per server as it completes (with the started action), then a summary line.
+    """
+    if (bulk_data.server_ids is None) == (bulk_data.label_selector is None):
+        raise HTTPException(status_code=400, detail="Provide either server_ids or label_selector")
+    if bulk_data.operation == "labels" and not bulk_data.labels:
+        raise HTTPException(status_code=400, detail="The labels operation requires labels")
+    if bulk_data.operation in ("enable_protection", "disable_protection") and not (bulk_data.delete or bulk_data.rebuild):
+        raise HTTPException(status_code=400, detail="Select delete and/or rebuild protection")
+    client, project = await run_upstream(get_hetzner_client, project_id, db, current_user)
+    try:
+        servers, missing = await run_upstream(select_servers, client, bulk_data.server_ids, bulk_data.label_selector)
+    except Exception as e:
+        # Log error
+        log_action(
+            action="SERVER_BULK",
+            details=f"Error selecting servers for bulk {bulk_data.operation}: {str(e)}",
+            status="failed",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        raise http_error(e, f"Error selecting servers: {str(e)}")
+    concurrency = min(bulk_data.concurrency or settings.BULK_MAX_CONCURRENCY, settings.BULK_MAX_CONCURRENCY)
+    params = bulk_data.dict(include={"delete", "rebuild", "labels"})
+
+    async def results():
+        counts = {"success": 0, "failed": 0}
+        for server_id in missing:
+            counts["failed"] += 1
+            yield json.dumps({"server_id": server_id, "status": "failed", "error": "Server not found"}) + "\n"
+        async for result in run_bulk(project.id, client, servers, bulk_data.operation, params, concurrency):
+            counts[result["status"]] += 1
+            yield json.dumps(result) + "\n"
+        # Log bulk operation
+        log_action(
+            action="SERVER_BULK",
+            details=f"Bulk {bulk_data.operation} on {counts['success'] + counts['failed']} servers: "
+                    f"{counts['success']} succeeded, {counts['failed']} failed",
+            status="failed" if counts["failed"] else "success",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        yield json.dumps({"summary": {"operation": bulk_data.operation, "total": counts["success"] + counts["failed"], **counts}}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+def batch_server_names(batch_data: ServerBatchCreate) -> List[str]:
+    """Server names of a batch create request"""
+    if (batch_data.names is None) == (batch_data.count is None):
+        raise HTTPException(status_code=400, detail="Provide either names or count")
+    if batch_data.names is not None:
+        names = batch_data.names
+    else:
+        if not batch_data.name_pattern or "{n" not in batch_data.name_pattern:
+            raise HTTPException(status_code=400, detail="name_pattern must contain {n}")
+        try:
+            names = [
+                batch_data.name_pattern.format(n=n)
+                for n in range(batch_data.start_index, batch_data.start_index + batch_data.count)
+            ]
+        except (KeyError, IndexError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid name_pattern: {str(e)}")
+    if len(names) > settings.BATCH_CREATE_MAX_SERVERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_CREATE_MAX_SERVERS} servers per batch")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Server names must be unique")
+    return names
+
+@router.post("/projects/{project_id}/servers/batch", status_code=202)
+async def batch_create_servers(
+    project_id: int,
+    batch_data: ServerBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Create many servers from one template in the background. Returns a job
+    whose progress (and the root passwords) can be polled by its id.
+    """
+    names = batch_server_names(batch_data)
+    client, project = await run_upstream(get_hetzner_client, project_id, db, current_user)
+    template = batch_data.dict(include={
+        "server_type", "image", "location", "ssh_keys", "labels", "user_data", "start_after_create"
+    })
+    job = provisioning_jobs.start(project.id, current_user.id, client, template, names, batch_data.concurrency)
+    # Log batch creation start
+    log_action(
+        action="SERVER_BATCH_CREATE",
+        details=f"Batch create job {job['id']} started for {len(names)} servers of type '{batch_data.server_type}'",
+        status="success",
+        project_id=project.id,
+        user_id=current_user.id
+    )
+    return provisioning_jobs.get(job["id"])
+
+@router.get("/projects/{project_id}/servers/batch/{job_id}")
+async def get_batch_create_job(
+    project_id: int,
+    job_id: str,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the progress of a batch create job"""
+    job = provisioning_jobs.get(job_id)
+    if not job or job["project_id"] != project_id or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def get_project_rollout(db: Session, project_id: int, rollout_id: int, user: models.User) -> models.Rollout:
+    """Rollout of a project owned by the user, or 404"""
+    if not crud.get_project(db, project_id, user.id):
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    rollout = crud.get_rollout(db, rollout_id, project_id)
+    if not rollout:
+        raise HTTPException(status_code=404, detail="Rollout not found")
+    return rollout
+
+@router.post("/projects/{project_id}/rollouts", status_code=201)
+async def create_rollout(
+    project_id: int,
+    rollout_data: RolloutCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Start a rebuild, change_type or reboot of many servers in waves. Each
+    wave waits until every action of the previous one has finished; the
+    rollout can be paused, resumed and aborted, and continues after a
+    backend restart.
+    """
+    if (rollout_data.server_ids is None) == (rollout_data.label_selector is None):
+        raise HTTPException(status_code=400, detail="Provide either server_ids or label_selector")
+    if rollout_data.operation == "rebuild" and not rollout_data.image:
+        raise HTTPException(status_code=400, detail="The rebuild operation requires image")
+    if rollout_data.operation == "change_type" and not rollout_data.server_type:
+        raise HTTPException(status_code=400, detail="The change_type operation requires server_type")
+    client, project = await run_upstream(get_hetzner_client, project_id, db, current_user)
+    try:
+        servers, missing = await run_upstream(select_servers, client, rollout_data.server_ids, rollout_data.label_selector)
+    except Exception as e:
+        # Log error
+        log_action(
+            action="ROLLOUT",
+            details=f"Error selecting servers for {rollout_data.operation} rollout: {str(e)}",
+            status="failed",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        raise http_error(e, f"Error selecting servers: {str(e)}")
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Servers not found: {', '.join(map(str, missing))}")
+    if not servers:
+        raise HTTPException(status_code=400, detail="No servers match")
+    if len(servers) > settings.ROLLOUT_MAX_SERVERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.ROLLOUT_MAX_SERVERS} servers per rollout")
+    if rollout_data.server_ids is not None:
+        # Keep the requested order
+        order = {server_id: index for index, server_id in enumerate(rollout_data.server_ids)}
+        servers.sort(key=lambda server: order[server.id])
+    if rollout_data.operation == "rebuild":
+        params = {"image": rollout_data.image}
+    elif rollout_data.operation == "change_type":
+        params = {"server_type": rollout_data.server_type, "upgrade_disk": rollout_data.upgrade_disk}
+    else:
+        params = {}
+    max_unavailable = min(rollout_data.max_unavailable or rollout_data.wave_size, rollout_data.wave_size)
+
+    def create() -> Dict[str, Any]:
+        rollout = crud.create_rollout(
+            db, project.id, current_user.id, rollout_data.operation, params,
+            rollout_data.wave_size, max_unavailable, rollout_data.max_failures, rollout_data.wave_delay,
+            [(server.id, server.name) for server in servers]
+        )
+        return serialize_rollout(rollout)
+
+    rollout = await run_upstream(create)
+    rollout_orchestrator.start(rollout["id"])
+    # Log rollout start
+    log_action(
+        action="ROLLOUT",
+        details=f"Rollout {rollout['id']} started: {rollout_data.operation} of {len(servers)} servers "
+                f"in {rollout['waves']} waves",
+        status="success",
+        project_id=project.id,
+        user_id=current_user.id
+    )
+    return rollout
+
+@router.get("/projects/{project_id}/rollouts")
+@offload
+def list_rollouts(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the latest rollouts of a project (without their servers)"""
+    if not crud.get_project(db, project_id, current_user.id):
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    return [serialize_rollout(rollout, with_items=False) for rollout in crud.get_rollouts(db, project_id, limit)]
+
+@router.get("/projects/{project_id}/rollouts/{rollout_id}")
+@offload
+def get_rollout(
+    project_id: int,
+    rollout_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get a rollout with the progress of each server"""
+    return serialize_rollout(get_project_rollout(db, project_id, rollout_id, current_user))
+
+@router.post("/projects/{project_id}/rollouts/{rollout_id}/{command}")
+async def control_rollout(
+    project_id: int,
+    rollout_id: int,
+    command: str = Path(..., regex="^(pause|resume|abort)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Pause, resume or abort a rollout. Pausing and aborting stop servers
+    from starting; servers already in progress finish their current steps.
+    """
+    allowed = {"pause": ("running",), "resume": ("paused", "running"), "abort": ACTIVE_STATUSES}[command]
+
+    def apply() -> Dict[str, Any]:
+        rollout = get_project_rollout(db, project_id, rollout_id, current_user)
+        if rollout.status not in allowed:
+            raise HTTPException(status_code=409, detail=f"Cannot {command} a rollout that is {rollout.status}")
+        if command == "pause":
+            crud.update_rollout(db, rollout_id, status="paused")
+        elif command == "resume":
+            crud.update_rollout(db, rollout_id, status="running", error=None)
+        else:
+            crud.update_rollout(db, rollout_id, status="aborted")
+            crud.skip_pending_rollout_items(db, rollout_id)
+        db.refresh(rollout)
+        return serialize_rollout(rollout)
+
+    rollout = await run_upstream(apply)
+    if command == "resume":
+        rollout_orchestrator.start(rollout_id)
+    # Log rollout control
+    log_action(
+        action="ROLLOUT",
+        details=f"Rollout {rollout_id} {rollout['status'] if command != 'resume' else 'resumed'}",
+        status="success",
+        project_id=project_id,
+        user_id=current_user.id
+    )
+    return rollout
 
 @router.post("/projects/{project_id}/servers")
+@offload
 def create_server(
     project_id: int,
     server_data: ServerCreate,
@@ -442,7 +848,6 @@ def create_server(
         )
         # Log server creation
         log_action(
-            db=db,
             action="SERVER_CREATE",
             details=f"Server '{server_data.name}' created successfully",
             status="success",
@@ -456,34 +861,51 @@ def create_server(
                 "status": response.server.status.lower(),  # Normalize status
                 "ip": response.server.public_net.ipv4.ip if response.server.public_net and response.server.public_net.ipv4 else None,
             },
-            "root_password": response.root_password  # Only available on initial creation
+            "root_password": response.root_password,  # Only available on initial creation
+            "action": action_tracker.track(project.id, response.action) if response.action else None
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_CREATE",
             details=f"Error creating server '{server_data.name}': {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating server: {str(e)}")
+        raise http_error(e, f"Error creating server: {str(e)}")
 
 @router.get("/projects/{project_id}/servers/{server_id}")
+@offload
 def get_server(
     project_id: int,
     server_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get details of a specific server"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "servers", db, current_user, server_id)
+        if mirrored is not None:
+            server, freshness = mirrored
+            # Log server retrieval
+            log_action(
+                action="SERVER_GET",
+                details=f"Retrieved server details for '{server['name']}' from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                **server,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         server = client.servers.get_by_id(server_id)
         # Log server retrieval
         log_action(
-            db=db,
             action="SERVER_GET",
             details=f"Retrieved server details for '{server.name}'",
             status="success",
@@ -503,7 +925,6 @@ def get_server(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_GET",
             details=f"Error retrieving server {server_id}: {str(e)}",
             status="failed",
@@ -513,6 +934,7 @@ def get_server(
         raise HTTPException(status_code=404, detail=f"Server not found: {str(e)}")
 
 @router.delete("/projects/{project_id}/servers/{server_id}")
+@offload
 def delete_server(
     project_id: int,
     server_id: int,
@@ -527,7 +949,6 @@ def delete_server(
         server.delete()
         # Log server deletion
         log_action(
-            db=db,
             action="SERVER_DELETE",
             details=f"Server '{server_name}' deleted successfully",
             status="success",
@@ -538,17 +959,17 @@ def delete_server(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_DELETE",
             details=f"Error deleting server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error deleting server: {str(e)}")
+        raise http_error(e, f"Error deleting server: {str(e)}")
 
 # Server power operations
 @router.post("/projects/{project_id}/servers/{server_id}/power_on")
+@offload
 def power_on_server(
     project_id: int,
     server_id: int,
@@ -562,27 +983,29 @@ def power_on_server(
         response = server.power_on()
         # Log server power on
         log_action(
-            db=db,
             action="SERVER_POWER_ON",
             details=f"Server '{server.name}' powered on successfully",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Server '{server.name}' is powering on"}
+        return {
+            "message": f"Server '{server.name}' is powering on",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_POWER_ON",
             details=f"Error powering on server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error powering on server: {str(e)}")
+        raise http_error(e, f"Error powering on server: {str(e)}")
 
 @router.post("/projects/{project_id}/servers/{server_id}/power_off")
+@offload
 def power_off_server(
     project_id: int,
     server_id: int,
@@ -596,27 +1019,29 @@ def power_off_server(
         response = server.power_off()
         # Log server power off
         log_action(
-            db=db,
             action="SERVER_POWER_OFF",
             details=f"Server '{server.name}' powered off successfully",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Server '{server.name}' is powering off"}
+        return {
+            "message": f"Server '{server.name}' is powering off",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_POWER_OFF",
             details=f"Error powering off server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error powering off server: {str(e)}")
+        raise http_error(e, f"Error powering off server: {str(e)}")
 
 @router.post("/projects/{project_id}/servers/{server_id}/reboot")
+@offload
 def reboot_server(
     project_id: int,
     server_id: int,
@@ -630,28 +1055,30 @@ def reboot_server(
         response = server.reboot()
         # Log server reboot
         log_action(
-            db=db,
             action="SERVER_REBOOT",
             details=f"Server '{server.name}' rebooted successfully",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Server '{server.name}' is rebooting"}
+        return {
+            "message": f"Server '{server.name}' is rebooting",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_REBOOT",
             details=f"Error rebooting server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error rebooting server: {str(e)}")
+        raise http_error(e, f"Error rebooting server: {str(e)}")
 
 # Additional server operations (Rebuild)
 @router.post("/projects/{project_id}/servers/{server_id}/rebuild")
+@offload
 def rebuild_server(
     project_id: int,
     server_id: int,
@@ -666,7 +1093,6 @@ def rebuild_server(
         response = server.rebuild(image=rebuild_data.image)
         # Log server rebuild
         log_action(
-            db=db,
             action="SERVER_REBUILD",
             details=f"Server '{server.name}' rebuild initiated with image '{rebuild_data.image}'",
             status="success",
@@ -675,22 +1101,23 @@ def rebuild_server(
         )
         return {
             "message": f"Server '{server.name}' rebuild initiated",
-            "root_password": response.root_password if hasattr(response, "root_password") else None
+            "root_password": response.root_password if hasattr(response, "root_password") else None,
+            "action": action_tracker.track(project.id, response)
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_REBUILD",
             details=f"Error rebuilding server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error rebuilding server: {str(e)}")
+        raise http_error(e, f"Error rebuilding server: {str(e)}")
 
 # Enable rescue mode for a server
 @router.post("/projects/{project_id}/servers/{server_id}/enable_rescue")
+@offload
 def enable_rescue_mode(
     project_id: int,
     server_id: int,
@@ -713,7 +1140,6 @@ def enable_rescue_mode(
         )
         # Log rescue mode enablement
         log_action(
-            db=db,
             action="SERVER_ENABLE_RESCUE",
             details=f"Rescue mode enabled for server '{server.name}'",
             status="success",
@@ -722,22 +1148,23 @@ def enable_rescue_mode(
         )
         return {
             "message": f"Rescue mode enabled for server '{server.name}'",
-            "root_password": response.root_password if hasattr(response, "root_password") else None
+            "root_password": response.root_password if hasattr(response, "root_password") else None,
+            "action": action_tracker.track(project.id, response.action)
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_ENABLE_RESCUE",
             details=f"Error enabling rescue mode for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error enabling rescue mode: {str(e)}")
+        raise http_error(e, f"Error enabling rescue mode: {str(e)}")
 
 # Disable rescue mode for a server
 @router.post("/projects/{project_id}/servers/{server_id}/disable_rescue")
+@offload
 def disable_rescue_mode(
     project_id: int,
     server_id: int,
@@ -748,31 +1175,33 @@ def disable_rescue_mode(
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         server = client.servers.get_by_id(server_id)
-        server.disable_rescue()
+        response = server.disable_rescue()
         # Log rescue mode disablement
         log_action(
-            db=db,
             action="SERVER_DISABLE_RESCUE",
             details=f"Rescue mode disabled for server '{server.name}'",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Rescue mode disabled for server '{server.name}'"}
+        return {
+            "message": f"Rescue mode disabled for server '{server.name}'",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_DISABLE_RESCUE",
             details=f"Error disabling rescue mode for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error disabling rescue mode: {str(e)}")
+        raise http_error(e, f"Error disabling rescue mode: {str(e)}")
 
 # Attach ISO to a server
 @router.post("/projects/{project_id}/servers/{server_id}/attach_iso")
+@offload
 def attach_iso(
     project_id: int,
     server_id: int,
@@ -797,31 +1226,33 @@ def attach_iso(
                 iso_obj = iso_list[0]
         if not iso_obj:
             raise HTTPException(status_code=404, detail=f"ISO '{iso_name}' not found")
-        server.attach_iso(iso_obj)
+        response = server.attach_iso(iso_obj)
         # Log ISO attachment
         log_action(
-            db=db,
             action="SERVER_ATTACH_ISO",
             details=f"ISO '{iso_data.iso}' attached to server '{server.name}'",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"ISO '{iso_data.iso}' attached to server '{server.name}'"}
+        return {
+            "message": f"ISO '{iso_data.iso}' attached to server '{server.name}'",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_ATTACH_ISO",
             details=f"Error attaching ISO to server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error attaching ISO: {str(e)}")
+        raise http_error(e, f"Error attaching ISO: {str(e)}")
 
 # Detach ISO from a server
 @router.post("/projects/{project_id}/servers/{server_id}/detach_iso")
+@offload
 def detach_iso(
     project_id: int,
     server_id: int,
@@ -832,31 +1263,33 @@ def detach_iso(
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         server = client.servers.get_by_id(server_id)
-        server.detach_iso()
+        response = server.detach_iso()
         # Log ISO detachment
         log_action(
-            db=db,
             action="SERVER_DETACH_ISO",
             details=f"ISO detached from server '{server.name}'",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"ISO detached from server '{server.name}'"}
+        return {
+            "message": f"ISO detached from server '{server.name}'",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_DETACH_ISO",
             details=f"Error detaching ISO from server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error detaching ISO: {str(e)}")
+        raise http_error(e, f"Error detaching ISO: {str(e)}")
 
 # Reset server (like pressing the reset button)
 @router.post("/projects/{project_id}/servers/{server_id}/reset")
+@offload
 def reset_server(
     project_id: int,
     server_id: int,
@@ -867,31 +1300,33 @@ def reset_server(
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         server = client.servers.get_by_id(server_id)
-        server.reset()
+        response = server.reset()
         # Log server reset
         log_action(
-            db=db,
             action="SERVER_RESET",
             details=f"Server '{server.name}' reset successfully",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Server '{server.name}' is resetting"}
+        return {
+            "message": f"Server '{server.name}' is resetting",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_RESET",
             details=f"Error resetting server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error resetting server: {str(e)}")
+        raise http_error(e, f"Error resetting server: {str(e)}")
 
 # Project statistics endpoint (new)
 @router.get("/projects/{project_id}/stats")
+@offload
 def get_project_stats(
     project_id: int,
     db: Session = Depends(get_db),
@@ -901,18 +1336,16 @@ def get_project_stats(
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         servers = client.servers.get_all()
-        images = client.images.get_all()
-        server_types = client.server_types.get_all()
-        # Filter images for just system images with names
-        filtered_images = [img for img in images if img.name is not None]
+        # Catalogs only contain named images, so no filtering is needed here
+        images = catalog_cache.get("images", client)
+        server_types = catalog_cache.get("server_types", client)
         stats = {
             "servers_count": len(servers),
-            "images_count": len(filtered_images),
+            "images_count": len(images),
             "server_types_count": len(server_types)
         }
         # Log stats retrieval
         log_action(
-            db=db,
             action="PROJECT_STATS",
             details=f"Retrieved project statistics",
             status="success",
@@ -923,17 +1356,90 @@ def get_project_stats(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="PROJECT_STATS",
             details=f"Error retrieving project stats: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving project stats: {str(e)}")
+        raise http_error(e, f"Error retrieving project stats: {str(e)}")
+
+# Project overview endpoint (servers, volumes, IPs, firewalls, networks, SSH keys and stats in one call)
+@router.get("/projects/{project_id}/overview")
+async def get_project_overview(
+    project_id: int,
+    timeout: Optional[float] = Query(None, gt=0, le=60),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get every resource collection of a project concurrently, with a deadline per collection"""
+    client, project = await run_upstream(get_hetzner_client, project_id, db, current_user)
+    deadline = timeout or settings.OVERVIEW_COLLECTION_TIMEOUT
+    collections = {
+        "servers": lambda: [serialize_server(server) for server in client.servers.get_all()],
+        "volumes": lambda: [serialize_volume(volume) for volume in client.volumes.get_all()],
+        "floating_ips": lambda: [serialize_floating_ip(ip) for ip in client.floating_ips.get_all()],
+        "firewalls": lambda: [serialize_firewall(fw) for fw in client.firewalls.get_all()],
+        "networks": lambda: [serialize_network(network) for network in client.networks.get_all()],
+        "ssh_keys": lambda: [serialize_ssh_key(key) for key in client.ssh_keys.get_all()],
+        "images": lambda: catalog_cache.get("images", client),
+        "server_types": lambda: catalog_cache.get("server_types", client),
+    }
+
+    async def fetch(name, loader):
+        started = time.monotonic()
+        try:
+            items = await asyncio.wait_for(run_upstream(loader), timeout=deadline)
+            return name, items, None
+        except asyncio.TimeoutError:
+            return name, None, {
+                "code": "timeout",
+                "message": f"No response within {deadline:g}s",
+                "elapsed": round(time.monotonic() - started, 3)
+            }
+        except Exception as e:
+            return name, None, {
+                "code": "error",
+                "message": str(e),
+                "elapsed": round(time.monotonic() - started, 3)
+            }
+
+    results = await asyncio.gather(*(fetch(name, loader) for name, loader in collections.items()))
+    data = {name: items for name, items, _ in results}
+    errors = {name: error for name, _, error in results if error}
+    overview = {
+        "project": {
+            "id": project.id,
+            "name": project.name,
+            "description": project.description
+        },
+        "servers": data["servers"],
+        "volumes": data["volumes"],
+        "floating_ips": data["floating_ips"],
+        "firewalls": data["firewalls"],
+        "networks": data["networks"],
+        "ssh_keys": data["ssh_keys"],
+        "stats": {
+            "servers_count": len(data["servers"]) if data["servers"] is not None else None,
+            "images_count": len(data["images"]) if data["images"] is not None else None,
+            "server_types_count": len(data["server_types"]) if data["server_types"] is not None else None
+        },
+        "errors": errors,
+        "partial": bool(errors)
+    }
+    # Log overview retrieval
+    log_action(
+        action="PROJECT_OVERVIEW",
+        details=f"Retrieved project overview" + (f" (failed: {', '.join(errors)})" if errors else ""),
+        status="failed" if len(errors) == len(collections) else "success",
+        project_id=project.id,
+        user_id=current_user.id
+    )
+    return overview
 
 # Other Hetzner resources
 @router.get("/projects/{project_id}/images")
+@offload
 def list_images(
     project_id: int,
     db: Session = Depends(get_db),
@@ -942,10 +1448,9 @@ def list_images(
     """Get all available OS images"""
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
-        images = client.images.get_all()
+        images = catalog_cache.get("images", client)
         # Log images retrieval
         log_action(
-            db=db,
             action="IMAGES_LIST",
             details=f"Retrieved {len(images)} images",
             status="success",
@@ -953,30 +1458,21 @@ def list_images(
             user_id=current_user.id
         )
         return {
-            "images": [
-                {
-                    "id": image.id,
-                    "name": image.name,
-                    "description": image.description,
-                    "type": image.type,
-                    "os_flavor": image.os_flavor
-                }
-                for image in images if image.name is not None  # Filter out unnamed images
-            ]
+            "images": images
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="IMAGES_LIST",
             details=f"Error retrieving images: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving images: {str(e)}")
+        raise http_error(e, f"Error retrieving images: {str(e)}")
 
 @router.get("/projects/{project_id}/server_types")
+@offload
 def list_server_types(
     project_id: int,
     db: Session = Depends(get_db),
@@ -985,75 +1481,22 @@ def list_server_types(
     """Get all available server types"""
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
-        server_types = client.server_types.get_all()
+        server_types = catalog_cache.get("server_types", client)
         # Log server types retrieval
         log_action(
-            db=db,
             action="SERVER_TYPES_LIST",
             details=f"Retrieved {len(server_types)} server types",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        # Process server types with better error handling
-        result = []
-        for st in server_types:
-            server_type_data = {
-                "id": st.id,
-                "name": st.name,
-                "description": st.description or "",
-                "cores": st.cores,
-                "memory": st.memory,
-                "disk": st.disk,
-                "prices": []
-            }
-            # Safely handle prices
-            if hasattr(st, 'prices') and st.prices:
-                try:
-                    for price in st.prices:
-                        try:
-                            # Safely access price attributes
-                            location_name = "unknown"
-                            if hasattr(price, 'location') and price.location:
-                                location_name = price.location.name if hasattr(price.location, 'name') else "unknown"
-                            price_monthly = 0
-                            # Try multiple paths to get the price
-                            if hasattr(price, 'price_monthly'):
-                                if hasattr(price.price_monthly, 'gross'):
-                                    price_monthly = float(price.price_monthly.gross)
-                                elif hasattr(price.price_monthly, 'net'):
-                                    price_monthly = float(price.price_monthly.net)
-                                elif isinstance(price.price_monthly, (int, float, str)):
-                                    try:
-                                        price_monthly = float(price.price_monthly)
-                                    except (ValueError, TypeError):
-                                        pass
-                            # Also try direct pricing info if it exists
-                            if hasattr(price, 'gross') and price_monthly == 0:
-                                try:
-                                    price_monthly = float(price.gross)
-                                except (ValueError, TypeError):
-                                    pass
-                            # If we found a price via any method, add it
-                            price_data = {
-                                "location": location_name,
-                                "price_monthly": price_monthly
-                            }
-                            server_type_data["prices"].append(price_data)
-                        except Exception as e:
-                            print(f"Error processing price: {str(e)}")
-                            continue
-                except Exception as e:
-                    print(f"Error iterating prices: {str(e)}")
-            result.append(server_type_data)
         return {
-            "server_types": result
+            "server_types": server_types
         }
     except Exception as e:
         # Log error with more details
         error_detail = f"Error retrieving server types: {str(e)}"
         log_action(
-            db=db,
             action="SERVER_TYPES_LIST",
             details=error_detail,
             status="failed",
@@ -1061,53 +1504,186 @@ def list_server_types(
             user_id=current_user.id
         )
         print(f"Server types error: {error_detail}")
-        raise HTTPException(status_code=500, detail=error_detail)
+        raise http_error(e, error_detail)
+
+@router.get("/projects/{project_id}/locations")
+@offload
+def list_locations(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get all available locations"""
+    client, project = get_hetzner_client(project_id, db, current_user)
+    try:
+        locations = catalog_cache.get("locations", client)
+        # Log locations retrieval
+        log_action(
+            action="LOCATIONS_LIST",
+            details=f"Retrieved {len(locations)} locations",
+            status="success",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        return {
+            "locations": locations
+        }
+    except Exception as e:
+        # Log error
+        log_action(
+            action="LOCATIONS_LIST",
+            details=f"Error retrieving locations: {str(e)}",
+            status="failed",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        raise http_error(e, f"Error retrieving locations: {str(e)}")
+
+@router.get("/projects/{project_id}/datacenters")
+@offload
+def list_datacenters(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get all available datacenters"""
+    client, project = get_hetzner_client(project_id, db, current_user)
+    try:
+        datacenters = catalog_cache.get("datacenters", client)
+        # Log datacenters retrieval
+        log_action(
+            action="DATACENTERS_LIST",
+            details=f"Retrieved {len(datacenters)} datacenters",
+            status="success",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        return {
+            "datacenters": datacenters
+        }
+    except Exception as e:
+        # Log error
+        log_action(
+            action="DATACENTERS_LIST",
+            details=f"Error retrieving datacenters: {str(e)}",
+            status="failed",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        raise http_error(e, f"Error retrieving datacenters: {str(e)}")
+
+@router.post("/projects/{project_id}/catalogs/refresh")
+@offload
+def refresh_catalogs(
+    project_id: int,
+    catalog: Optional[str] = Query(None, regex="^(images|server_types|isos|locations|datacenters)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Force a refresh of the cached catalogs (all of them, or a single one)"""
+    client, project = get_hetzner_client(project_id, db, current_user)
+    try:
+        refreshed = catalog_cache.refresh(client, project.id, [catalog] if catalog else None)
+        # Log catalog refresh
+        log_action(
+            action="CATALOG_REFRESH",
+            details=f"Refreshed catalogs: {', '.join(refreshed)}",
+            status="success",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        return {"refreshed": refreshed}
+    except Exception as e:
+        # Log error
+        log_action(
+            action="CATALOG_REFRESH",
+            details=f"Error refreshing catalogs: {str(e)}",
+            status="failed",
+            project_id=project.id,
+            user_id=current_user.id
+        )
+        raise http_error(e, f"Error refreshing catalogs: {str(e)}")
+
+@router.get("/projects/{project_id}/rate_limit")
+@offload
+def get_rate_limit(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the remaining Hetzner API request budget of a project"""
+    project = crud.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    # Served from the local bucket, reading it must not cost budget itself
+    rate_limit = rate_limiter.status(project.id)
+    # Log rate limit retrieval
+    log_action(
+        action="RATE_LIMIT_GET",
+        details=f"Retrieved rate limit status ({rate_limit['remaining']}/{rate_limit['limit']} remaining)",
+        status="success",
+        project_id=project.id,
+        user_id=current_user.id
+    )
+    return rate_limit
 
 # SSH Keys endpoints
 @router.get("/projects/{project_id}/ssh_keys")
+@offload
 def list_ssh_keys(
     project_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get all SSH keys for a project"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "ssh_keys", db, current_user)
+        if mirrored is not None:
+            ssh_keys, freshness = mirrored
+            # Log successful SSH keys list retrieval
+            log_action(
+                action="SSH_KEYS_LIST",
+                details=f"Retrieved {len(ssh_keys)} SSH keys from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                "ssh_keys": ssh_keys,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
+        started = time.monotonic()
         ssh_keys = client.ssh_keys.get_all()
         # Log successful SSH keys list retrieval
         log_action(
-            db=db,
             action="SSH_KEYS_LIST",
             details=f"Retrieved {len(ssh_keys)} SSH keys",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
+        items = [serialize_ssh_key(key) for key in ssh_keys]
+        freshness = inventory_sync.store(db, project.id, "ssh_keys", items, started)
         return {
-            "ssh_keys": [
-                {
-                    "id": key.id,
-                    "name": key.name,
-                    "fingerprint": key.fingerprint,
-                    "public_key": key.public_key,
-                    "created": key.created.isoformat() if key.created else None
-                }
-                for key in ssh_keys
-            ]
+            "ssh_keys": items,
+            **freshness
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SSH_KEYS_LIST",
             details=f"Error retrieving SSH keys list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving SSH keys: {str(e)}")
+        raise http_error(e, f"Error retrieving SSH keys: {str(e)}")
 
 @router.post("/projects/{project_id}/ssh_keys")
+@offload
 def create_ssh_key(
     project_id: int,
     ssh_key_data: SSHKeyCreate,
@@ -1123,7 +1699,6 @@ def create_ssh_key(
         )
         # Log SSH key creation
         log_action(
-            db=db,
             action="SSH_KEY_CREATE",
             details=f"SSH key '{ssh_key_data.name}' created successfully",
             status="success",
@@ -1140,29 +1715,45 @@ def create_ssh_key(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SSH_KEY_CREATE",
             details=f"Error creating SSH key '{ssh_key_data.name}': {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating SSH key: {str(e)}")
+        raise http_error(e, f"Error creating SSH key: {str(e)}")
 
 @router.get("/projects/{project_id}/ssh_keys/{ssh_key_id}")
+@offload
 def get_ssh_key(
     project_id: int,
     ssh_key_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get details of a specific SSH key"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "ssh_keys", db, current_user, ssh_key_id)
+        if mirrored is not None:
+            ssh_key, freshness = mirrored
+            # Log SSH key retrieval
+            log_action(
+                action="SSH_KEY_GET",
+                details=f"Retrieved SSH key details for '{ssh_key['name']}' from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                **ssh_key,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         ssh_key = client.ssh_keys.get_by_id(ssh_key_id)
         # Log SSH key retrieval
         log_action(
-            db=db,
             action="SSH_KEY_GET",
             details=f"Retrieved SSH key details for '{ssh_key.name}'",
             status="success",
@@ -1179,7 +1770,6 @@ def get_ssh_key(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SSH_KEY_GET",
             details=f"Error retrieving SSH key {ssh_key_id}: {str(e)}",
             status="failed",
@@ -1189,6 +1779,7 @@ def get_ssh_key(
         raise HTTPException(status_code=404, detail=f"SSH key not found: {str(e)}")
 
 @router.put("/projects/{project_id}/ssh_keys/{ssh_key_id}")
+@offload
 def update_ssh_key(
     project_id: int,
     ssh_key_id: int,
@@ -1206,7 +1797,6 @@ def update_ssh_key(
             ssh_key.update_labels(ssh_key_data.labels)
         # Log SSH key update
         log_action(
-            db=db,
             action="SSH_KEY_UPDATE",
             details=f"SSH key '{ssh_key.name}' updated successfully",
             status="success",
@@ -1225,16 +1815,16 @@ def update_ssh_key(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SSH_KEY_UPDATE",
             details=f"Error updating SSH key {ssh_key_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error updating SSH key: {str(e)}")
+        raise http_error(e, f"Error updating SSH key: {str(e)}")
 
 @router.delete("/projects/{project_id}/ssh_keys/{ssh_key_id}")
+@offload
 def delete_ssh_key(
     project_id: int,
     ssh_key_id: int,
@@ -1249,7 +1839,6 @@ def delete_ssh_key(
         ssh_key.delete()
         # Log SSH key deletion
         log_action(
-            db=db,
             action="SSH_KEY_DELETE",
             details=f"SSH key '{ssh_key_name}' deleted successfully",
             status="success",
@@ -1260,63 +1849,71 @@ def delete_ssh_key(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SSH_KEY_DELETE",
             details=f"Error deleting SSH key {ssh_key_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error deleting SSH key: {str(e)}")
+        raise http_error(e, f"Error deleting SSH key: {str(e)}")
 
 # Floating IPs endpoints
 @router.get("/projects/{project_id}/floating_ips")
+@offload
 def list_floating_ips(
     project_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get all floating IPs for a project"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "floating_ips", db, current_user)
+        if mirrored is not None:
+            floating_ips, freshness = mirrored
+            # Log successful floating IPs list retrieval
+            log_action(
+                action="FLOATING_IPS_LIST",
+                details=f"Retrieved {len(floating_ips)} floating IPs from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                "floating_ips": floating_ips,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
+        started = time.monotonic()
         floating_ips = client.floating_ips.get_all()
         # Log successful floating IPs list retrieval
         log_action(
-            db=db,
             action="FLOATING_IPS_LIST",
             details=f"Retrieved {len(floating_ips)} floating IPs",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
+        items = [serialize_floating_ip(ip) for ip in floating_ips]
+        freshness = inventory_sync.store(db, project.id, "floating_ips", items, started)
         return {
-            "floating_ips": [
-                {
-                    "id": ip.id,
-                    "description": ip.description,
-                    "ip": ip.ip,
-                    "type": ip.type,
-                    "server": ip.server.id if ip.server else None,
-                    "location": ip.home_location.name if ip.home_location else None,
-                    "blocked": ip.blocked,
-                    "created": ip.created.isoformat() if ip.created else None
-                }
-                for ip in floating_ips
-            ]
+            "floating_ips": items,
+            **freshness
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IPS_LIST",
             details=f"Error retrieving floating IPs list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving floating IPs: {str(e)}")
+        raise http_error(e, f"Error retrieving floating IPs: {str(e)}")
 
 @router.post("/projects/{project_id}/floating_ips")
+@offload
 def create_floating_ip(
     project_id: int,
     floating_ip_data: FloatingIPCreate,
@@ -1337,7 +1934,6 @@ def create_floating_ip(
         response = client.floating_ips.create(**create_params)
         # Log floating IP creation
         log_action(
-            db=db,
             action="FLOATING_IP_CREATE",
             details=f"Floating IP created successfully",
             status="success",
@@ -1357,29 +1953,45 @@ def create_floating_ip(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IP_CREATE",
             details=f"Error creating floating IP: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating floating IP: {str(e)}")
+        raise http_error(e, f"Error creating floating IP: {str(e)}")
 
 @router.get("/projects/{project_id}/floating_ips/{floating_ip_id}")
+@offload
 def get_floating_ip(
     project_id: int,
     floating_ip_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get details of a specific floating IP"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "floating_ips", db, current_user, floating_ip_id)
+        if mirrored is not None:
+            floating_ip, freshness = mirrored
+            # Log floating IP retrieval
+            log_action(
+                action="FLOATING_IP_GET",
+                details=f"Retrieved floating IP details for ID {floating_ip_id} from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                **floating_ip,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         floating_ip = client.floating_ips.get_by_id(floating_ip_id)
         # Log floating IP retrieval
         log_action(
-            db=db,
             action="FLOATING_IP_GET",
             details=f"Retrieved floating IP details for ID {floating_ip_id}",
             status="success",
@@ -1399,7 +2011,6 @@ def get_floating_ip(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IP_GET",
             details=f"Error retrieving floating IP {floating_ip_id}: {str(e)}",
             status="failed",
@@ -1409,6 +2020,7 @@ def get_floating_ip(
         raise HTTPException(status_code=404, detail=f"Floating IP not found: {str(e)}")
 
 @router.put("/projects/{project_id}/floating_ips/{floating_ip_id}")
+@offload
 def update_floating_ip(
     project_id: int,
     floating_ip_id: int,
@@ -1426,7 +2038,6 @@ def update_floating_ip(
             floating_ip.update_labels(floating_ip_data.labels)
         # Log floating IP update
         log_action(
-            db=db,
             action="FLOATING_IP_UPDATE",
             details=f"Floating IP {floating_ip_id} updated successfully",
             status="success",
@@ -1448,16 +2059,16 @@ def update_floating_ip(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IP_UPDATE",
             details=f"Error updating floating IP {floating_ip_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error updating floating IP: {str(e)}")
+        raise http_error(e, f"Error updating floating IP: {str(e)}")
 
 @router.delete("/projects/{project_id}/floating_ips/{floating_ip_id}")
+@offload
 def delete_floating_ip(
     project_id: int,
     floating_ip_id: int,
@@ -1471,7 +2082,6 @@ def delete_floating_ip(
         floating_ip.delete()
         # Log floating IP deletion
         log_action(
-            db=db,
             action="FLOATING_IP_DELETE",
             details=f"Floating IP {floating_ip_id} deleted successfully",
             status="success",
@@ -1482,16 +2092,16 @@ def delete_floating_ip(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IP_DELETE",
             details=f"Error deleting floating IP {floating_ip_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error deleting floating IP: {str(e)}")
+        raise http_error(e, f"Error deleting floating IP: {str(e)}")
 
 @router.post("/projects/{project_id}/floating_ips/{floating_ip_id}/assign")
+@offload
 def assign_floating_ip(
     project_id: int,
     floating_ip_id: int,
@@ -1506,7 +2116,6 @@ def assign_floating_ip(
         floating_ip.assign(server=assign_data.server)
         # Log floating IP assignment
         log_action(
-            db=db,
             action="FLOATING_IP_ASSIGN",
             details=f"Floating IP {floating_ip_id} assigned to server {assign_data.server}",
             status="success",
@@ -1517,16 +2126,16 @@ def assign_floating_ip(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IP_ASSIGN",
             details=f"Error assigning floating IP {floating_ip_id} to server: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error assigning floating IP: {str(e)}")
+        raise http_error(e, f"Error assigning floating IP: {str(e)}")
 
 @router.post("/projects/{project_id}/floating_ips/{floating_ip_id}/unassign")
+@offload
 def unassign_floating_ip(
     project_id: int,
     floating_ip_id: int,
@@ -1540,7 +2149,6 @@ def unassign_floating_ip(
         floating_ip.unassign()
         # Log floating IP unassignment
         log_action(
-            db=db,
             action="FLOATING_IP_UNASSIGN",
             details=f"Floating IP {floating_ip_id} unassigned",
             status="success",
@@ -1551,66 +2159,71 @@ def unassign_floating_ip(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FLOATING_IP_UNASSIGN",
             details=f"Error unassigning floating IP {floating_ip_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error unassigning floating IP: {str(e)}")
+        raise http_error(e, f"Error unassigning floating IP: {str(e)}")
 
 # Volumes endpoints
 @router.get("/projects/{project_id}/volumes")
+@offload
 def list_volumes(
     project_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get all volumes for a project"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "volumes", db, current_user)
+        if mirrored is not None:
+            volumes, freshness = mirrored
+            # Log successful volumes list retrieval
+            log_action(
+                action="VOLUMES_LIST",
+                details=f"Retrieved {len(volumes)} volumes from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                "volumes": volumes,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
+        started = time.monotonic()
         volumes = client.volumes.get_all()
         # Log successful volumes list retrieval
         log_action(
-            db=db,
             action="VOLUMES_LIST",
             details=f"Retrieved {len(volumes)} volumes",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
+        items = [serialize_volume(volume) for volume in volumes]
+        freshness = inventory_sync.store(db, project.id, "volumes", items, started)
         return {
-            "volumes": [
-                {
-                    "id": volume.id,
-                    "name": volume.name,
-                    "size": volume.size,
-                    "location": volume.location.name if volume.location else None,
-                    "server": volume.server.id if volume.server else None,
-                    "linux_device": volume.linux_device,
-                    "protection": {
-                        "delete": volume.protection["delete"] if volume.protection else False
-                    },
-                    "format": volume.format,
-                    "created": volume.created.isoformat() if volume.created else None
-                }
-                for volume in volumes
-            ]
+            "volumes": items,
+            **freshness
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUMES_LIST",
             details=f"Error retrieving volumes list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving volumes: {str(e)}")
+        raise http_error(e, f"Error retrieving volumes: {str(e)}")
 
 @router.post("/projects/{project_id}/volumes")
+@offload
 def create_volume(
     project_id: int,
     volume_data: VolumeCreate,
@@ -1635,7 +2248,6 @@ def create_volume(
         response = client.volumes.create(**create_params)
         # Log volume creation
         log_action(
-            db=db,
             action="VOLUME_CREATE",
             details=f"Volume '{volume_data.name}' created successfully",
             status="success",
@@ -1658,29 +2270,45 @@ def create_volume(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_CREATE",
             details=f"Error creating volume '{volume_data.name}': {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating volume: {str(e)}")
+        raise http_error(e, f"Error creating volume: {str(e)}")
 
 @router.get("/projects/{project_id}/volumes/{volume_id}")
+@offload
 def get_volume(
     project_id: int,
     volume_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get details of a specific volume"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "volumes", db, current_user, volume_id)
+        if mirrored is not None:
+            volume, freshness = mirrored
+            # Log volume retrieval
+            log_action(
+                action="VOLUME_GET",
+                details=f"Retrieved volume details for '{volume['name']}' from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                **volume,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         volume = client.volumes.get_by_id(volume_id)
         # Log volume retrieval
         log_action(
-            db=db,
             action="VOLUME_GET",
             details=f"Retrieved volume details for '{volume.name}'",
             status="success",
@@ -1703,7 +2331,6 @@ def get_volume(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_GET",
             details=f"Error retrieving volume {volume_id}: {str(e)}",
             status="failed",
@@ -1713,6 +2340,7 @@ def get_volume(
         raise HTTPException(status_code=404, detail=f"Volume not found: {str(e)}")
 
 @router.put("/projects/{project_id}/volumes/{volume_id}")
+@offload
 def update_volume(
     project_id: int,
     volume_id: int,
@@ -1730,7 +2358,6 @@ def update_volume(
             volume.update_labels(volume_data.labels)
         # Log volume update
         log_action(
-            db=db,
             action="VOLUME_UPDATE",
             details=f"Volume {volume_id} updated successfully",
             status="success",
@@ -1755,16 +2382,16 @@ def update_volume(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_UPDATE",
             details=f"Error updating volume {volume_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error updating volume: {str(e)}")
+        raise http_error(e, f"Error updating volume: {str(e)}")
 
 @router.delete("/projects/{project_id}/volumes/{volume_id}")
+@offload
 def delete_volume(
     project_id: int,
     volume_id: int,
@@ -1779,7 +2406,6 @@ def delete_volume(
         volume.delete()
         # Log volume deletion
         log_action(
-            db=db,
             action="VOLUME_DELETE",
             details=f"Volume '{volume_name}' deleted successfully",
             status="success",
@@ -1790,16 +2416,16 @@ def delete_volume(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_DELETE",
             details=f"Error deleting volume {volume_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error deleting volume: {str(e)}")
+        raise http_error(e, f"Error deleting volume: {str(e)}")
 
 @router.post("/projects/{project_id}/volumes/{volume_id}/resize")
+@offload
 def resize_volume(
     project_id: int,
     volume_id: int,
@@ -1811,30 +2437,32 @@ def resize_volume(
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         volume = client.volumes.get_by_id(volume_id)
-        volume.resize(size=resize_data.size)
+        response = volume.resize(size=resize_data.size)
         # Log volume resize
         log_action(
-            db=db,
             action="VOLUME_RESIZE",
             details=f"Volume {volume_id} resized to {resize_data.size}GB",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Volume {volume_id} resized to {resize_data.size}GB"}
+        return {
+            "message": f"Volume {volume_id} resized to {resize_data.size}GB",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_RESIZE",
             details=f"Error resizing volume {volume_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error resizing volume: {str(e)}")
+        raise http_error(e, f"Error resizing volume: {str(e)}")
 
 @router.post("/projects/{project_id}/volumes/{volume_id}/attach")
+@offload
 def attach_volume(
     project_id: int,
     volume_id: int,
@@ -1851,30 +2479,32 @@ def attach_volume(
         }
         if attach_data.automount is not None:
             attach_params["automount"] = attach_data.automount
-        volume.attach(**attach_params)
+        response = volume.attach(**attach_params)
         # Log volume attachment
         log_action(
-            db=db,
             action="VOLUME_ATTACH",
             details=f"Volume {volume_id} attached to server {attach_data.server}",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Volume {volume_id} attached to server {attach_data.server}"}
+        return {
+            "message": f"Volume {volume_id} attached to server {attach_data.server}",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_ATTACH",
             details=f"Error attaching volume {volume_id} to server: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error attaching volume: {str(e)}")
+        raise http_error(e, f"Error attaching volume: {str(e)}")
 
 @router.post("/projects/{project_id}/volumes/{volume_id}/detach")
+@offload
 def detach_volume(
     project_id: int,
     volume_id: int,
@@ -1885,93 +2515,87 @@ def detach_volume(
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         volume = client.volumes.get_by_id(volume_id)
-        volume.detach()
+        response = volume.detach()
         # Log volume detachment
         log_action(
-            db=db,
             action="VOLUME_DETACH",
             details=f"Volume {volume_id} detached",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
-        return {"message": f"Volume {volume_id} detached"}
+        return {
+            "message": f"Volume {volume_id} detached",
+            "action": action_tracker.track(project.id, response)
+        }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="VOLUME_DETACH",
             details=f"Error detaching volume {volume_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error detaching volume: {str(e)}")
+        raise http_error(e, f"Error detaching volume: {str(e)}")
 
 # Firewalls endpoints
 @router.get("/projects/{project_id}/firewalls")
+@offload
 def list_firewalls(
     project_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get all firewalls for a project"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "firewalls", db, current_user)
+        if mirrored is not None:
+            firewalls, freshness = mirrored
+            # Log successful firewalls list retrieval
+            log_action(
+                action="FIREWALLS_LIST",
+                details=f"Retrieved {len(firewalls)} firewalls from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                "firewalls": firewalls,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
+        started = time.monotonic()
         firewalls = client.firewalls.get_all()
         # Log successful firewalls list retrieval
         log_action(
-            db=db,
             action="FIREWALLS_LIST",
             details=f"Retrieved {len(firewalls)} firewalls",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
+        items = [serialize_firewall(fw) for fw in firewalls]
+        freshness = inventory_sync.store(db, project.id, "firewalls", items, started)
         return {
-            "firewalls": [
-                {
-                    "id": fw.id,
-                    "name": fw.name,
-                    "rules": [
-                        {
-                            "direction": rule.direction,
-                            "protocol": rule.protocol,
-                            "source_ips": rule.source_ips if hasattr(rule, 'source_ips') else None,
-                            "destination_ips": rule.destination_ips if hasattr(rule, 'destination_ips') else None,
-                            "port": rule.port if hasattr(rule, 'port') else None,
-                            "description": rule.description if hasattr(rule, 'description') else None
-                        }
-                        for rule in fw.rules
-                    ],
-                    "applied_to": [
-                        {
-                            "type": applied.type,
-                            "server": {
-                                "id": applied.server.id,
-                                "name": applied.server.name
-                            } if applied.server else None
-                        }
-                        for applied in fw.applied_to
-                    ] if hasattr(fw, 'applied_to') else [],
-                    "created": fw.created.isoformat() if hasattr(fw, 'created') and fw.created else None
-                }
-                for fw in firewalls
-            ]
+            "firewalls": items,
+            **freshness
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FIREWALLS_LIST",
             details=f"Error retrieving firewalls list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving firewalls: {str(e)}")
+        raise http_error(e, f"Error retrieving firewalls: {str(e)}")
 
 @router.post("/projects/{project_id}/firewalls")
+@offload
 def create_firewall(
     project_id: int,
     firewall_data: FirewallCreate,
@@ -2004,7 +2628,6 @@ def create_firewall(
         )
         # Log firewall creation
         log_action(
-            db=db,
             action="FIREWALL_CREATE",
             details=f"Firewall '{firewall_data.name}' created successfully",
             status="success",
@@ -2030,29 +2653,45 @@ def create_firewall(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FIREWALL_CREATE",
             details=f"Error creating firewall '{firewall_data.name}': {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating firewall: {str(e)}")
+        raise http_error(e, f"Error creating firewall: {str(e)}")
 
 @router.get("/projects/{project_id}/firewalls/{firewall_id}")
+@offload
 def get_firewall(
     project_id: int,
     firewall_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get details of a specific firewall"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "firewalls", db, current_user, firewall_id)
+        if mirrored is not None:
+            firewall, freshness = mirrored
+            # Log firewall retrieval
+            log_action(
+                action="FIREWALL_GET",
+                details=f"Retrieved firewall details for '{firewall['name']}' from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                **firewall,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         firewall = client.firewalls.get_by_id(firewall_id)
         # Log firewall retrieval
         log_action(
-            db=db,
             action="FIREWALL_GET",
             details=f"Retrieved firewall details for '{firewall.name}'",
             status="success",
@@ -2088,7 +2727,6 @@ def get_firewall(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FIREWALL_GET",
             details=f"Error retrieving firewall {firewall_id}: {str(e)}",
             status="failed",
@@ -2098,6 +2736,7 @@ def get_firewall(
         raise HTTPException(status_code=404, detail=f"Firewall not found: {str(e)}")
 
 @router.put("/projects/{project_id}/firewalls/{firewall_id}")
+@offload
 def update_firewall(
     project_id: int,
     firewall_id: int,
@@ -2115,7 +2754,6 @@ def update_firewall(
             firewall.update_labels(firewall_data.labels)
         # Log firewall update
         log_action(
-            db=db,
             action="FIREWALL_UPDATE",
             details=f"Firewall {firewall_id} updated successfully",
             status="success",
@@ -2142,16 +2780,16 @@ def update_firewall(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FIREWALL_UPDATE",
             details=f"Error updating firewall {firewall_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error updating firewall: {str(e)}")
+        raise http_error(e, f"Error updating firewall: {str(e)}")
 
 @router.delete("/projects/{project_id}/firewalls/{firewall_id}")
+@offload
 def delete_firewall(
     project_id: int,
     firewall_id: int,
@@ -2166,7 +2804,6 @@ def delete_firewall(
         firewall.delete()
         # Log firewall deletion
         log_action(
-            db=db,
             action="FIREWALL_DELETE",
             details=f"Firewall '{firewall_name}' deleted successfully",
             status="success",
@@ -2177,77 +2814,71 @@ def delete_firewall(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="FIREWALL_DELETE",
             details=f"Error deleting firewall {firewall_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error deleting firewall: {str(e)}")
+        raise http_error(e, f"Error deleting firewall: {str(e)}")
 
 # Networks endpoints
 @router.get("/projects/{project_id}/networks")
+@offload
 def list_networks(
     project_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get all networks for a project"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "networks", db, current_user)
+        if mirrored is not None:
+            networks, freshness = mirrored
+            # Log successful networks list retrieval
+            log_action(
+                action="NETWORKS_LIST",
+                details=f"Retrieved {len(networks)} networks from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                "networks": networks,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
+        started = time.monotonic()
         networks = client.networks.get_all()
         # Log successful networks list retrieval
         log_action(
-            db=db,
             action="NETWORKS_LIST",
             details=f"Retrieved {len(networks)} networks",
             status="success",
             project_id=project.id,
             user_id=current_user.id
         )
+        items = [serialize_network(network) for network in networks]
+        freshness = inventory_sync.store(db, project.id, "networks", items, started)
         return {
-            "networks": [
-                {
-                    "id": network.id,
-                    "name": network.name,
-                    "ip_range": network.ip_range,
-                    "subnets": [
-                        {
-                            "type": subnet.type,
-                            "ip_range": subnet.ip_range,
-                            "network_zone": subnet.network_zone,
-                            "gateway": subnet.gateway
-                        }
-                        for subnet in network.subnets
-                    ],
-                    "routes": [
-                        {
-                            "destination": route.destination,
-                            "gateway": route.gateway
-                        }
-                        for route in network.routes
-                    ],
-                    "servers": [server.id for server in network.servers] if hasattr(network, 'servers') else [],
-                    "labels": network.labels,
-                    "created": network.created.isoformat() if hasattr(network, 'created') and network.created else None
-                }
-                for network in networks
-            ]
+            "networks": items,
+            **freshness
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="NETWORKS_LIST",
             details=f"Error retrieving networks list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving networks: {str(e)}")
+        raise http_error(e, f"Error retrieving networks: {str(e)}")
 
 @router.post("/projects/{project_id}/networks")
+@offload
 def create_network(
     project_id: int,
     network_data: NetworkCreate,
@@ -2276,7 +2907,6 @@ def create_network(
         response = client.networks.create(**create_params)
         # Log network creation
         log_action(
-            db=db,
             action="NETWORK_CREATE",
             details=f"Network '{network_data.name}' created successfully",
             status="success",
@@ -2301,29 +2931,45 @@ def create_network(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="NETWORK_CREATE",
             details=f"Error creating network '{network_data.name}': {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating network: {str(e)}")
+        raise http_error(e, f"Error creating network: {str(e)}")
 
 @router.get("/projects/{project_id}/networks/{network_id}")
+@offload
 def get_network(
     project_id: int,
     network_id: int,
+    fresh: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get details of a specific network"""
+    if not fresh:
+        mirrored = read_from_mirror(project_id, "networks", db, current_user, network_id)
+        if mirrored is not None:
+            network, freshness = mirrored
+            # Log network retrieval
+            log_action(
+                action="NETWORK_GET",
+                details=f"Retrieved network details for '{network['name']}' from local mirror",
+                status="success",
+                project_id=project_id,
+                user_id=current_user.id
+            )
+            return {
+                **network,
+                **freshness
+            }
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
         network = client.networks.get_by_id(network_id)
         # Log network retrieval
         log_action(
-            db=db,
             action="NETWORK_GET",
             details=f"Retrieved network details for '{network.name}'",
             status="success",
@@ -2357,7 +3003,6 @@ def get_network(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="NETWORK_GET",
             details=f"Error retrieving network {network_id}: {str(e)}",
             status="failed",
@@ -2367,6 +3012,7 @@ def get_network(
         raise HTTPException(status_code=404, detail=f"Network not found: {str(e)}")
 
 @router.put("/projects/{project_id}/networks/{network_id}")
+@offload
 def update_network(
     project_id: int,
     network_id: int,
@@ -2384,7 +3030,6 @@ def update_network(
             network.update_labels(network_data.labels)
         # Log network update
         log_action(
-            db=db,
             action="NETWORK_UPDATE",
             details=f"Network {network_id} updated successfully",
             status="success",
@@ -2411,16 +3056,16 @@ def update_network(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="NETWORK_UPDATE",
             details=f"Error updating network {network_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error updating network: {str(e)}")
+        raise http_error(e, f"Error updating network: {str(e)}")
 
 @router.delete("/projects/{project_id}/networks/{network_id}")
+@offload
 def delete_network(
     project_id: int,
     network_id: int,
@@ -2435,7 +3080,6 @@ def delete_network(
         network.delete()
         # Log network deletion
         log_action(
-            db=db,
             action="NETWORK_DELETE",
             details=f"Network '{network_name}' deleted successfully",
             status="success",
@@ -2446,17 +3090,17 @@ def delete_network(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="NETWORK_DELETE",
             details=f"Error deleting network {network_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error deleting network: {str(e)}")
+        raise http_error(e, f"Error deleting network: {str(e)}")
 
 # ISOs endpoints
 @router.get("/projects/{project_id}/isos")
+@offload
 def list_isos(
     project_id: int,
     db: Session = Depends(get_db),
@@ -2465,10 +3109,9 @@ def list_isos(
     """Get all ISOs available for a project"""
     client, project = get_hetzner_client(project_id, db, current_user)
     try:
-        isos = client.isos.get_all()
+        isos = catalog_cache.get("isos", client, project.id)
         # Log ISOs retrieval
         log_action(
-            db=db,
             action="ISOS_LIST",
             details=f"Retrieved {len(isos)} ISOs",
             status="success",
@@ -2476,32 +3119,21 @@ def list_isos(
             user_id=current_user.id
         )
         return {
-            "isos": [
-                {
-                    "id": iso.id,
-                    "name": iso.name,
-                    "description": iso.description,
-                    "type": iso.type,
-                    "architecture": getattr(iso, 'architecture', None),
-                    "deprecated": iso.deprecated,
-                    "size": getattr(iso, 'size', None)
-                }
-                for iso in isos
-            ]
+            "isos": isos
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="ISOS_LIST",
             details=f"Error retrieving ISOs list: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error retrieving ISOs: {str(e)}")
+        raise http_error(e, f"Error retrieving ISOs: {str(e)}")
 
 @router.get("/projects/{project_id}/pricing")
+@offload
 def get_pricing(
     project_id: int,
     db: Session = Depends(get_db),
@@ -2512,7 +3144,6 @@ def get_pricing(
     try:
         # ساده‌ترین روش: ارسال داده‌های ثابت برای جلوگیری از خطاهای پردازش
         log_action(
-            db=db,
             action="PRICING_GET",
             details=f"Retrieved pricing information",
             status="success",
@@ -2544,7 +3175,6 @@ def get_pricing(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="PRICING_GET",
             details=f"Error retrieving pricing information: {str(e)}",
             status="failed",
@@ -2552,9 +3182,52 @@ def get_pricing(
             user_id=current_user.id
         )
         print(f"Pricing error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error retrieving pricing information: {str(e)}")
+        raise http_error(e, f"Error retrieving pricing information: {str(e)}")
+
+# Limits of a single wait request (action ids, seconds)
+MAX_TRACKED_ACTIONS = 200
+MAX_ACTION_WAIT = 300
+
+@router.get("/projects/{project_id}/actions/track")
+async def track_actions(
+    project_id: int,
+    ids: List[int] = Query(..., min_items=1, max_items=MAX_TRACKED_ACTIONS),
+    timeout: float = Query(30, ge=0, le=MAX_ACTION_WAIT),
+    stream: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_for_stream)
+):
+    """
+    Wait for actions to finish. Returns when all of them have finished or
+    after `timeout` seconds; with `stream=true`, sends every state change as
+    an `action` Server-Sent Event and ends with `done`.
+    """
+    project = await async_crud.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    await db.close()
+    action_ids = list(dict.fromkeys(ids))
+    if not stream:
+        return await action_tracker.wait(project_id, action_ids, timeout)
+
+    async def events():
+        async for action in action_tracker.watch(project_id, action_ids):
+            yield format_event("action", action)
+        yield format_event("done", {"actions": action_tracker.get(project_id, action_ids)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/actions/tracker")
+async def get_action_tracker_stats(current_user: models.User = Depends(get_current_user)):
+    """Get the pending actions and poll intervals of the action tracker"""
+    return action_tracker.stats()
 
 @router.get("/projects/{project_id}/actions")
+@offload
 def list_actions(
     project_id: int,
     resource_type: Optional[str] = Query(None, regex="^(server|volume|firewall|load_balancer|network|floating_ip)$"),
@@ -2571,7 +3244,6 @@ def list_actions(
     try:
         # Log actions retrieval
         log_action(
-            db=db,
             action="ACTIONS_LIST",
             details=f"Retrieved action logs from Hetzner API",
             status="success",
@@ -2694,25 +3366,240 @@ def list_actions(
         }
 
 # Logs endpoint
+def encode_log_cursor(position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+def decode_log_cursor(cursor: str):
+    try:
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), int(log_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/projects/{project_id}/logs", response_model=List[LogResponse])
+@offload
 def get_project_logs(
     project_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100),
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Get logs for a project with filtering options"""
+    """
+    Get logs for a project with filtering options. Pass the X-Next-Cursor
+    header of a response as `cursor` to get the next page (keyset pagination,
+    `skip` is ignored then).
+    """
     # Check if project exists and belongs to user
     project = crud.get_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
-    logs = crud.get_logs(db, project_id, current_user.id, skip, limit, start_date, end_date)
+    # Make the records of the user's latest actions visible
+    log_writer.flush()
+    if cursor is None and skip:
+        # Offset pagination, kept for existing clients
+        return crud.get_logs(db, project_id, current_user.id, skip, limit, start_date, end_date)
+    after = decode_log_cursor(cursor) if cursor else None
+    logs, position = crud.get_logs_page(db, project_id, current_user.id, limit, after, start_date, end_date)
+    if position is not None:
+        response.headers["X-Next-Cursor"] = encode_log_cursor(position)
     return logs
 
+@router.get("/projects/{project_id}/logs/search")
+@offload
+def search_project_logs(
+    project_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=200),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Full-text search over the action and details of a project's logs, best
+    matches first. Matched words are wrapped in <mark> tags in the
+    action_highlight and details_highlight fields.
+    """
+    project = crud.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    match = build_match_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    log_writer.flush()
+    try:
+        results = crud.search_logs(db, project.id, current_user.id, match, limit, start_date, end_date)
+    except OperationalError as e:
+        db.rollback()
+        raise HTTPException(status_code=503, detail=f"Log search is not available: {str(e.orig)}")
+    return {
+        "query": q,
+        "results": results
+    }
+
+# Upper bound on the number of buckets of an analytics query
+MAX_ANALYTICS_BUCKETS = 2000
+
+def parse_bucket_size(bucket: str) -> timedelta:
+    """Parse a bucket size like '1h', '6h', '1d' or '7d' (whole hours only)"""
+    count, unit = int(bucket[:-1]), bucket[-1]
+    size = timedelta(hours=count) if unit == "h" else timedelta(days=count)
+    if size < timedelta(hours=1):
+        raise HTTPException(status_code=400, detail="Bucket size must be at least 1h")
+    return size
+
+def to_utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@router.get("/projects/{project_id}/logs/analytics")
+@offload
+def get_log_analytics(
+    project_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = Query("1h", regex="^[1-9][0-9]*[hd]$"),
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Log counts per time bucket and per action, with failure rates, answered
+    from the hourly rollups. Defaults to the last 24 hours; times are UTC.
+    """
+    project = crud.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    size = parse_bucket_size(bucket)
+    end = to_utc_naive(end) if end else datetime.utcnow()
+    start = to_utc_naive(start) if start else end - timedelta(days=1)
+    # Rollups are hourly, so the range is widened to whole hours
+    start = start.replace(minute=0, second=0, microsecond=0)
+    if end.replace(minute=0, second=0, microsecond=0) != end:
+        end = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / size > MAX_ANALYTICS_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Time range spans more than {MAX_ANALYTICS_BUCKETS} buckets")
+    log_writer.flush()
+    rollups = crud.get_log_rollups(db, project.id, start, end, action, status)
+
+    def summary() -> Dict[str, Any]:
+        return {"total": 0, "by_status": {}}
+
+    buckets: Dict[datetime, Dict[str, Any]] = {}
+    actions: Dict[str, Dict[str, Any]] = {}
+    for rollup in rollups:
+        bucket_start = start + ((rollup.bucket - start) // size) * size
+        for entry in (buckets.setdefault(bucket_start, summary()), actions.setdefault(rollup.action, summary())):
+            entry["total"] += rollup.count
+            entry["by_status"][rollup.status] = entry["by_status"].get(rollup.status, 0) + rollup.count
+
+    def with_failure_rate(entry: Dict[str, Any]) -> Dict[str, Any]:
+        failed = entry["by_status"].get("failed", 0)
+        entry["failure_rate"] = round(failed / entry["total"], 4) if entry["total"] else 0.0
+        return entry
+
+    # Every bucket of the range is returned, empty ones included, so charts need no gap filling
+    series = []
+    bucket_start = start
+    while bucket_start < end:
+        entry = with_failure_rate(buckets.get(bucket_start, summary()))
+        series.append({"start": bucket_start.isoformat(), **entry})
+        bucket_start += size
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket": bucket,
+        "buckets": series,
+        "actions": sorted(
+            ({"action": name, **with_failure_rate(entry)} for name, entry in actions.items()),
+            key=lambda entry: -entry["total"]
+        )
+    }
+
+LOG_EXPORT_BATCH_SIZE = 1000
+LOG_EXPORT_FIELDS = ["id", "created_at", "action", "status", "details", "project_id", "user_id"]
+
+def iter_log_export(project_id: int, user_id: int, fmt: str,
+                    start_date: Optional[str], end_date: Optional[str]):
+    """Yield the logs of a project as NDJSON lines or CSV rows, one batch in memory at a time"""
+    db = SessionLocal()
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(LOG_EXPORT_FIELDS)
+            yield buffer.getvalue()
+        after = None
+        while True:
+            logs, after = crud.get_logs_page(db, project_id, user_id, LOG_EXPORT_BATCH_SIZE, after, start_date, end_date)
+            rows = [
+                {
+                    "id": log.id,
+                    "created_at": log.created_at.isoformat() if log.created_at else None,
+                    "action": log.action,
+                    "status": log.status,
+                    "details": log.details,
+                    "project_id": log.project_id,
+                    "user_id": log.user_id
+                }
+                for log in logs
+            ]
+            # End the read transaction and drop the batch from the session between batches
+            db.rollback()
+            db.expunge_all()
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([row[field] for field in LOG_EXPORT_FIELDS] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(row) + "\n" for row in rows)
+            if after is None:
+                break
+    finally:
+        db.close()
+
+@router.get("/projects/{project_id}/logs/export")
+@offload
+def export_project_logs(
+    project_id: int,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Stream every log of a project as NDJSON or CSV"""
+    project = crud.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
+    log_writer.flush()
+    # Log export
+    log_action(
+        action="LOGS_EXPORT",
+        details=f"Exported logs as {format}",
+        status="success",
+        project_id=project.id,
+        user_id=current_user.id
+    )
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_log_export(project.id, current_user.id, format, start_date, end_date),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="project-{project.id}-logs.{format}"'}
+    )
+
 @router.put("/projects/{project_id}/servers/{server_id}/rename")
+@offload
 def rename_server(
     project_id: int,
     server_id: int,
@@ -2727,7 +3614,6 @@ def rename_server(
         server.update(name=rename_data.name)
         # Log server rename
         log_action(
-            db=db,
             action="SERVER_RENAME",
             details=f"Server {server_id} renamed to '{rename_data.name}'",
             status="success",
@@ -2752,17 +3638,17 @@ def rename_server(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_RENAME",
             details=f"Error renaming server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error renaming server: {str(e)}")
+        raise http_error(e, f"Error renaming server: {str(e)}")
 
 # تغییر پسورد سرور
 @router.post("/projects/{project_id}/servers/{server_id}/change_password")
+@offload
 def change_server_password(
     project_id: int,
     server_id: int,
@@ -2777,7 +3663,6 @@ def change_server_password(
         response = server.change_password(password_data.password)
         # Log password change
         log_action(
-            db=db,
             action="SERVER_CHANGE_PASSWORD",
             details=f"Password changed for server '{server.name}'",
             status="success",
@@ -2791,17 +3676,17 @@ def change_server_password(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_CHANGE_PASSWORD",
             details=f"Error changing password for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error changing server password: {str(e)}")
+        raise http_error(e, f"Error changing server password: {str(e)}")
 
 # تغییر نوع سرور (ارتقا/کاهش)
 @router.post("/projects/{project_id}/servers/{server_id}/change_type")
+@offload
 def change_server_type(
     project_id: int,
     server_id: int,
@@ -2815,31 +3700,30 @@ def change_server_type(
         server = client.servers.get_by_id(server_id)
         current_server_type = server.server_type
         new_server_type = None
-        try:
-            new_server_type = client.server_types.get_by_name(type_data.server_type)
-        except:
-            # اگر نتونستیم با نام پیدا کنیم، همه سرور تایپ‌ها رو بررسی می‌کنیم
-            all_types = client.server_types.get_all()
-            for st in all_types:
-                if st.name == type_data.server_type:
+        # سرور تایپ‌ها از کش کاتالوگ خوانده می‌شوند و در صورت نبودن، کش تازه می‌شود
+        # (at most once per CATALOG_MISS_REFRESH_INTERVAL, so unknown names don't bypass the cache)
+        for max_age in (None, settings.CATALOG_MISS_REFRESH_INTERVAL):
+            for st in catalog_cache.get("server_types", client, max_age=max_age):
+                if st["name"] == type_data.server_type:
                     new_server_type = st
                     break
+            if new_server_type:
+                break
         if not new_server_type:
             raise HTTPException(status_code=404, detail=f"Server type '{type_data.server_type}' not found")
         # بررسی محدودیت دیسک
-        if hasattr(new_server_type, 'disk') and hasattr(current_server_type, 'disk'):
-            if new_server_type.disk < current_server_type.disk:
+        if new_server_type.get('disk') is not None and hasattr(current_server_type, 'disk'):
+            if new_server_type['disk'] < current_server_type.disk:
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Cannot change to a server type with smaller disk. Current: {current_server_type.disk}GB, Target: {new_server_type.disk}GB"
+                    detail=f"Cannot change to a server type with smaller disk. Current: {current_server_type.disk}GB, Target: {new_server_type['disk']}GB"
                 )
-        server.change_type(
+        response = server.change_type(
             server_type=type_data.server_type,
             upgrade_disk=type_data.upgrade_disk
         )
         # Log server type change
         log_action(
-            db=db,
             action="SERVER_CHANGE_TYPE",
             details=f"Server '{server.name}' type changed to '{type_data.server_type}'",
             status="success",
@@ -2847,22 +3731,23 @@ def change_server_type(
             user_id=current_user.id
         )
         return {
-            "message": f"Server type changing to '{type_data.server_type}'. This may take a few minutes to complete."
+            "message": f"Server type changing to '{type_data.server_type}'. This may take a few minutes to complete.",
+            "action": action_tracker.track(project.id, response)
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_CHANGE_TYPE",
             details=f"Error changing type for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error changing server type: {str(e)}")
+        raise http_error(e, f"Error changing server type: {str(e)}")
 
 # فعال کردن محافظت سرور
 @router.post("/projects/{project_id}/servers/{server_id}/enable_protection")
+@offload
 def enable_server_protection(
     project_id: int,
     server_id: int,
@@ -2882,7 +3767,6 @@ def enable_server_protection(
         if protection_data.rebuild:
             protections.append("rebuild")
         log_action(
-            db=db,
             action="SERVER_ENABLE_PROTECTION",
             details=f"Enabled {', '.join(protections)} protection for server '{server.name}'",
             status="success",
@@ -2895,17 +3779,17 @@ def enable_server_protection(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_ENABLE_PROTECTION",
             details=f"Error enabling protection for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error enabling server protection: {str(e)}")
+        raise http_error(e, f"Error enabling server protection: {str(e)}")
 
 # غیرفعال کردن محافظت سرور
 @router.post("/projects/{project_id}/servers/{server_id}/disable_protection")
+@offload
 def disable_server_protection(
     project_id: int,
     server_id: int,
@@ -2925,7 +3809,6 @@ def disable_server_protection(
         if protection_data.rebuild:
             protections.append("rebuild")
         log_action(
-            db=db,
             action="SERVER_DISABLE_PROTECTION",
             details=f"Disabled {', '.join(protections)} protection for server '{server.name}'",
             status="success",
@@ -2938,17 +3821,17 @@ def disable_server_protection(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_DISABLE_PROTECTION",
             details=f"Error disabling protection for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error disabling server protection: {str(e)}")
+        raise http_error(e, f"Error disabling server protection: {str(e)}")
 
 # تنظیم DNS معکوس
 @router.post("/projects/{project_id}/servers/{server_id}/change_rdns")
+@offload
 def change_server_rdns(project_id: int, server_id: int,
                         rdns: ServerRdnsSettings,
                         db: Session = Depends(get_db),
@@ -2958,18 +3841,19 @@ def change_server_rdns(project_id: int, server_id: int,
     try:
         server = client.servers.get_by_id(server_id)
         server.change_dns_ptr(ip=rdns.ip, dns_ptr=rdns.dns_ptr)  # use correct method
-        log_action(db=db, action="SERVER_CHANGE_RDNS",
+        log_action(action="SERVER_CHANGE_RDNS",
                    details=f"Changed reverse DNS for server '{server.name}' IP {rdns.ip} to '{rdns.dns_ptr}'",
                    status="success", project_id=project.id, user_id=current_user.id)
         return {"message": f"RDNS updated for IP {rdns.ip} on server '{server.name}'."}
     except Exception as e:
-        log_action(db=db, action="SERVER_CHANGE_RDNS",
+        log_action(action="SERVER_CHANGE_RDNS",
                    details=f"Error changing reverse DNS for server {server_id}: {str(e)}",
                    status="failed", project_id=project.id, user_id=current_user.id)
-        raise HTTPException(status_code=500, detail=f"Error changing reverse DNS: {str(e)}")
+        raise http_error(e, f"Error changing reverse DNS: {str(e)}")
 
 # به‌روزرسانی برچسب‌های سرور
 @router.put("/projects/{project_id}/servers/{server_id}/labels")
+@offload
 def update_server_labels(project_id: int, server_id: int,
                           labels_data: ServerLabels,
                           db: Session = Depends(get_db),
@@ -2979,18 +3863,19 @@ def update_server_labels(project_id: int, server_id: int,
     try:
         server = client.servers.get_by_id(server_id)
         server.update(labels=labels_data.labels)  # use update method for labels
-        log_action(db=db, action="SERVER_UPDATE_LABELS",
+        log_action(action="SERVER_UPDATE_LABELS",
                    details=f"Updated labels for server '{server.name}'",
                    status="success", project_id=project.id, user_id=current_user.id)
         return {"message": f"Labels updated for server '{server.name}'."}
     except Exception as e:
-        log_action(db=db, action="SERVER_UPDATE_LABELS",
+        log_action(action="SERVER_UPDATE_LABELS",
                    details=f"Error updating labels for server {server_id}: {str(e)}",
                    status="failed", project_id=project.id, user_id=current_user.id)
-        raise HTTPException(status_code=500, detail=f"Error updating server labels: {str(e)}")
+        raise http_error(e, f"Error updating server labels: {str(e)}")
 
 # ایجاد تصویر/اسنپ‌شات از سرور
 @router.post("/projects/{project_id}/servers/{server_id}/create_image")
+@offload
 def create_server_image(
     project_id: int,
     server_id: int,
@@ -3009,7 +3894,6 @@ def create_server_image(
         )
         # Log image creation
         log_action(
-            db=db,
             action="SERVER_CREATE_IMAGE",
             details=f"Created {image_data.type} image for server '{server.name}': {response.image.description}",
             status="success",
@@ -3025,22 +3909,23 @@ def create_server_image(
                 "status": response.image.status,
                 "created": response.image.created.isoformat() if response.image.created else None
             },
-            "root_password": response.root_password if hasattr(response, "root_password") else None
+            "root_password": response.root_password if hasattr(response, "root_password") else None,
+            "action": action_tracker.track(project.id, response.action)
         }
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_CREATE_IMAGE",
             details=f"Error creating image for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error creating server image: {str(e)}")
+        raise http_error(e, f"Error creating server image: {str(e)}")
 
 # دریافت URL دسترسی به کنسول
 @router.get("/projects/{project_id}/servers/{server_id}/request_console")
+@offload
 def request_server_console(
     project_id: int,
     server_id: int,
@@ -3054,7 +3939,6 @@ def request_server_console(
         response = server.request_console()
         # ثبت لاگ موفقیت
         log_action(
-            db=db,
             action="SERVER_REQUEST_CONSOLE",
             details=f"Requested console access for server '{server.name}'",
             status="success",
@@ -3084,7 +3968,6 @@ def request_server_console(
         # ثبت خطا با جزئیات بیشتر
         error_message = f"Error requesting console for server {server_id}: {str(e)}"
         log_action(
-            db=db,
             action="SERVER_REQUEST_CONSOLE",
             details=error_message,
             status="failed",
@@ -3092,10 +3975,11 @@ def request_server_console(
             user_id=current_user.id
         )
         print(error_message)  # اضافه کردن لاگ در کنسول سرور برای عیب‌یابی
-        raise HTTPException(status_code=500, detail=error_message)
+        raise http_error(e, error_message)
 
 # بازنشانی پسورد
 @router.post("/projects/{project_id}/servers/{server_id}/reset_password")
+@offload
 def reset_server_password(
     project_id: int,
     server_id: int,
@@ -3109,7 +3993,6 @@ def reset_server_password(
         response = server.reset_password()
         # Log password reset
         log_action(
-            db=db,
             action="SERVER_RESET_PASSWORD",
             details=f"Reset password for server '{server.name}'",
             status="success",
@@ -3123,11 +4006,10 @@ def reset_server_password(
     except Exception as e:
         # Log error
         log_action(
-            db=db,
             action="SERVER_RESET_PASSWORD",
             details=f"Error resetting password for server {server_id}: {str(e)}",
             status="failed",
             project_id=project.id,
             user_id=current_user.id
         )
-        raise HTTPException(status_code=500, detail=f"Error resetting server password: {str(e)}")
\ No newline at end of file
+        raise http_error(e, f"Error resetting server password: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,117 @@
+from typing import Any, Dict
+
+# Convert hcloud domain objects to the dictionaries returned by the API
+
+def serialize_server(server) -> Dict[str, Any]:
+    return {
+        "id": server.id,
+        "name": server.name,
+        "status": server.status.lower(),  # Normalize status
+        "ip": server.public_net.ipv4.ip if server.public_net and server.public_net.ipv4 else None,
+        "location": server.datacenter.location.name if server.datacenter and server.datacenter.location else None,
+        "server_type": server.server_type.name if server.server_type else None,
+        "image": server.image.name if server.image else None,
+        "created": server.created.isoformat() if server.created else None
+    }
+
+def serialize_action(action) -> Dict[str, Any]:
+    return {
+        "id": action.id,
+        "command": action.command,
+        "status": action.status,
+        "progress": action.progress,
+        "started": action.started.isoformat() if action.started else None,
+        "finished": action.finished.isoformat() if action.finished else None,
+        "resources": [{"id": r.get("id"), "type": r.get("type")} for r in action.resources or []],
+        "error": action.error
+    }
+
+def serialize_ssh_key(key) -> Dict[str, Any]:
+    return {
+        "id": key.id,
+        "name": key.name,
+        "fingerprint": key.fingerprint,
+        "public_key": key.public_key,
+        "created": key.created.isoformat() if key.created else None
+    }
+
+def serialize_floating_ip(ip) -> Dict[str, Any]:
+    return {
+        "id": ip.id,
+        "description": ip.description,
+        "ip": ip.ip,
+        "type": ip.type,
+        "server": ip.server.id if ip.server else None,
+        "location": ip.home_location.name if ip.home_location else None,
+        "blocked": ip.blocked,
+        "created": ip.created.isoformat() if ip.created else None
+    }
+
+def serialize_volume(volume) -> Dict[str, Any]:
+    return {
+        "id": volume.id,
+        "name": volume.name,
+        "size": volume.size,
+        "location": volume.location.name if volume.location else None,
+        "server": volume.server.id if volume.server else None,
+        "linux_device": volume.linux_device,
+        "protection": {
+            "delete": volume.protection["delete"] if volume.protection else False
+        },
+        "format": volume.format,
+        "created": volume.created.isoformat() if volume.created else None
+    }
+
+def serialize_firewall_rule(rule) -> Dict[str, Any]:
+    return {
+        "direction": rule.direction,
+        "protocol": rule.protocol,
+        "source_ips": rule.source_ips if hasattr(rule, 'source_ips') else None,
+        "destination_ips": rule.destination_ips if hasattr(rule, 'destination_ips') else None,
+        "port": rule.port if hasattr(rule, 'port') else None,
+        "description": rule.description if hasattr(rule, 'description') else None
+    }
+
+def serialize_firewall(fw) -> Dict[str, Any]:
+    return {
+        "id": fw.id,
+        "name": fw.name,
+        "rules": [serialize_firewall_rule(rule) for rule in fw.rules],
+        "applied_to": [
+            {
+                "type": applied.type,
+                "server": {
+                    "id": applied.server.id,
+                    "name": applied.server.name
+                } if applied.server else None
+            }
+            for applied in fw.applied_to
+        ] if hasattr(fw, 'applied_to') else [],
+        "created": fw.created.isoformat() if hasattr(fw, 'created') and fw.created else None
+    }
+
+def serialize_network(network) -> Dict[str, Any]:
+    return {
+        "id": network.id,
+        "name": network.name,
+        "ip_range": network.ip_range,
+        "subnets": [
+            {
+                "type": subnet.type,
+                "ip_range": subnet.ip_range,
+                "network_zone": subnet.network_zone,
+                "gateway": subnet.gateway
+            }
+            for subnet in network.subnets
+        ],
+        "routes": [
+            {
+                "destination": route.destination,
+                "gateway": route.gateway
+            }
+            for route in network.routes
+        ],
+        "servers": [server.id for server in network.servers] if hasattr(network, 'servers') else [],
+        "labels": network.labels,
+        "created": network.created.isoformat() if hasattr(network, 'created') and network.created else None
+    }
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from hcloud.actions.client import BoundAction
+from hcloud.servers.client import BoundServer
+from ..config import settings
+from ..database import models
+from ..database.database import AsyncSessionLocal, SessionLocal
+from .async_api import PER_PAGE, hetzner_api, model_client
+from .client_pool import client_pool
+from .rate_limit import background_priority
+from .serializers import serialize_server
+from .sync import inventory_sync
+from .transport import run_upstream
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+# Events a subscriber may fall behind by before its backlog is replaced by a snapshot
+SUBSCRIBER_QUEUE_SIZE = 100
+
+def format_event(event: str, data: Any) -> str:
+    """Encode an event in the Server-Sent Events wire format"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _action_progress(action, server_id: int) -> Dict[str, Any]:
+    return {
+        "server_id": server_id,
+        "action_id": action.id,
+        "command": action.command,
+        "status": action.status,
+        "progress": action.progress
+    }
+
+class ServerEventHub:
+    """
+    Pushes server status and action progress of a project to every open
+    event stream. A single poller runs per project while it has subscribers
+    and publishes only what changed, so upstream calls don't grow with the
+    number of open pages. It polls faster while actions are running, and
+    writes to the project's servers wake it up immediately.
+    """
+
+    def __init__(self, interval: float, active_interval: float, heartbeat: float):
+        self.interval = interval
+        self.active_interval = active_interval
+        self.heartbeat = heartbeat
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._pollers: Dict[int, asyncio.Task] = {}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        # project_id -> server id -> serialized server, as last published
+        self._servers: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        # project_id -> running action id -> progress, as last published
+        self._progress: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _snapshot(self, project_id: int) -> Dict[str, Any]:
+        return {
+            "servers": list(self._servers[project_id].values()),
+            "actions": list(self._progress.get(project_id, {}).values())
+        }
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        """Register a stream for a project; its queue receives (event, data) tuples"""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        if project_id in self._servers:
+            queue.put_nowait(("snapshot", self._snapshot(project_id)))
+        if project_id not in self._pollers:
+            self._wakeups[project_id] = asyncio.Event()
+            self._pollers[project_id] = self._loop.create_task(self._poll(project_id))
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            # Last stream closed, stop polling the project
+            del self._subscribers[project_id]
+            poller = self._pollers.pop(project_id, None)
+            if poller is not None:
+                poller.cancel()
+            self._wakeups.pop(project_id, None)
+            self._servers.pop(project_id, None)
+            self._progress.pop(project_id, None)
+
+    def subscriber_count(self, project_id: int) -> int:
+        return len(self._subscribers.get(project_id, ()))
+
+    def on_write(self, project_id: int, method: str, url: str):
+        """Write listener for the client pool (called from worker threads)"""
+        if not url.startswith("/servers") or self._loop is None:
+            return
+        wakeup = self._wakeups.get(project_id)
+        if wakeup is not None:
+            self._loop.call_soon_threadsafe(wakeup.set)
+
+    def _publish(self, project_id: int, event: str, data: Any):
+        for queue in list(self._subscribers.get(project_id, ())):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Too slow to keep up: replace its backlog with the current state
+                while not queue.empty():
+                    queue.get_nowait()
+                if project_id in self._servers:
+                    queue.put_nowait(("snapshot", self._snapshot(project_id)))
+
+    @staticmethod
+    def _store(project_id: int, servers: List[Dict[str, Any]], started: float):
+        db = SessionLocal()
+        try:
+            inventory_sync.store(db, project_id, "servers", servers, started)
+        finally:
+            db.close()
+
+    async def _fetch(self, project_id: int, tracked_action_ids: List[int]) -> Tuple[List[Dict[str, Any]], List[Any], List[Any]]:
+        """List servers, running actions and the tracked actions that finished since"""
+        async with AsyncSessionLocal() as db:
+            project = await db.get(models.Project, project_id)
+        if project is None:
+            raise ValueError("Project not found")
+        await hetzner_api.validate(project)
+        started = time.monotonic()
+        servers = [
+            serialize_server(BoundServer(model_client.servers, data))
+            for data in await hetzner_api.get_all(project, "/servers", "servers")
+        ]
+        # Keep the inventory mirror current while we have a fresh listing
+        await run_upstream(self._store, project_id, servers, started)
+        running = [
+            BoundAction(model_client.actions, data)
+            for data in await hetzner_api.get_all(project, "/actions", "actions", {"status": "running"})
+        ]
+        running_ids = {action.id for action in running}
+        finished_ids = [action_id for action_id in tracked_action_ids if action_id not in running_ids]
+        finished = []
+        # A request per page of ids instead of one per action
+        for start in range(0, len(finished_ids), PER_PAGE):
+            response = await hetzner_api.request(
+                project, "GET", "/actions", params={"id": finished_ids[start:start + PER_PAGE], "per_page": PER_PAGE}
+            )
+            finished.extend(BoundAction(model_client.actions, data) for data in response["actions"])
+        return servers, running, finished
+
+    def _apply(self, project_id: int, servers: List[Dict[str, Any]], running: List[Any], finished: List[Any]):
+        """Publish the differences to the previous poll"""
+        first_poll = project_id not in self._servers
+        previous = self._servers.get(project_id, {})
+        current = {server["id"]: server for server in servers}
+        progress: Dict[int, Dict[str, Any]] = {}
+        for action in running:
+            for resource in action.resources or []:
+                if resource.get("type") == "server":
+                    progress[action.id] = _action_progress(action, resource["id"])
+        self._servers[project_id] = current
+        previous_progress = self._progress.get(project_id, {})
+        self._progress[project_id] = progress
+
+        if first_poll:
+            self._publish(project_id, "snapshot", self._snapshot(project_id))
+            return
+        for server_id, server in current.items():
+            if previous.get(server_id) != server:
+                self._publish(project_id, "server", server)
+        for server_id in previous.keys() - current.keys():
+            self._publish(project_id, "deleted", {"id": server_id})
+        for action_id, entry in progress.items():
+            if previous_progress.get(action_id) != entry:
+                self._publish(project_id, "progress", entry)
+        for action in finished:
+            entry = previous_progress.get(action.id)
+            if entry is not None:
+                self._publish(project_id, "progress", _action_progress(action, entry["server_id"]))
+
+    async def _poll(self, project_id: int):
+        wakeup = self._wakeups[project_id]
+        while True:
+            wakeup.clear()
+            tracked = list(self._progress.get(project_id, {}))
+            try:
+                # Shares the project's request budget with sync, yields to interactive calls
+                with background_priority():
+                    servers, running, finished = await self._fetch(project_id, tracked)
+                self._apply(project_id, servers, running, finished)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Server event poll of project {project_id} failed: {str(e)}")
+                self._publish(project_id, "poll_error", {"detail": str(e)})
+            interval = self.active_interval if self._progress.get(project_id) else self.interval
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=interval)
+                # Give the write a moment to show up in the listing
+                await asyncio.sleep(min(self.active_interval, 1))
+            except asyncio.TimeoutError:
+                pass
+
+    async def stream(self, project_id: int):
+        """Yield a project's events as Server-Sent Events, with keep-alive comments"""
+        queue = self.subscribe(project_id)
+        try:
+            yield f"retry: {int(self.active_interval * 1000)}\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(event, data)
+        finally:
+            self.unsubscribe(project_id, queue)
+
+    async def stop(self):
+        pollers = list(self._pollers.values())
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        self._pollers.clear()
+
+server_events = ServerEventHub(
+    interval=settings.SERVER_EVENTS_INTERVAL,
+    active_interval=settings.SERVER_EVENTS_ACTIVE_INTERVAL,
+    heartbeat=settings.SERVER_EVENTS_HEARTBEAT
+)
+client_pool.add_write_listener(server_events.on_write)
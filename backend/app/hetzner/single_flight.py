@@ -0,0 +1,95 @@
+import asyncio
+import copy
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs the
+    function, callers arriving while it is in flight wait for it and receive
+    the same result (or exception). Results are handed out as deep copies, as
+    the hcloud models mutate the JSON they are built from.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # No waiter can join once the call is unregistered
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            if shared and call.error is None:
+                # Keep a pristine copy for the waiters, the leader's copy gets mutated
+                call.result = copy.deepcopy(call.result)
+            call.done.set()
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: callers of a key in flight await the leader's result"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def do(self, key: Hashable, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self._waiters[key] += 1
+            # Shielded, so a waiter giving up doesn't cancel the leader's call
+            return copy.deepcopy(await asyncio.shield(future))
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self._waiters[key] = 0
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            if self._waiters[key]:
+                future.set_exception(e if isinstance(e, Exception) else RuntimeError("Upstream read was cancelled"))
+            raise
+        else:
+            # Keep a pristine copy for the waiters, the leader's copy gets mutated
+            future.set_result(copy.deepcopy(result) if self._waiters[key] else result)
+            return result
+        finally:
+            del self._calls[key]
+            del self._waiters[key]
+            if not future.done():
+                future.cancel()
+
+def request_key(project_id: int, token: str, url: str, params: Optional[Dict[str, Any]],
+                generation: int = 0) -> Hashable:
+    """Key identifying an upstream read: same project, token, endpoint and query"""
+    return (project_id, token, generation, url, json.dumps(params or {}, sort_keys=True, default=str))
+
+# Shared by every pooled client, so identical reads from concurrent requests hit the API once
+upstream_reads = SingleFlight()
@@ -0,0 +1,337 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import crud, models
+from ..database.database import SessionLocal
+from hcloud import APIException
+from .client_pool import client_pool, get_validated_client
+from .transport import run_upstream
+from .rate_limit import background_priority
+from .serializers import (
+    serialize_server, serialize_ssh_key, serialize_floating_ip,
+    serialize_volume, serialize_firewall, serialize_network
+)
+import logging as python_logging
+
+logger = python_logging.getLogger("hetznerdock")
+
+# resource type -> loader returning the serialized resources of a project
+SYNCED_RESOURCES: Dict[str, Callable[[Any], List[Dict[str, Any]]]] = {
+    "servers": lambda client: [serialize_server(s) for s in client.servers.get_all()],
+    "volumes": lambda client: [serialize_volume(v) for v in client.volumes.get_all()],
+    "networks": lambda client: [serialize_network(n) for n in client.networks.get_all()],
+    "floating_ips": lambda client: [serialize_floating_ip(ip) for ip in client.floating_ips.get_all()],
+    "firewalls": lambda client: [serialize_firewall(fw) for fw in client.firewalls.get_all()],
+    "ssh_keys": lambda client: [serialize_ssh_key(key) for key in client.ssh_keys.get_all()],
+}
+
+# resource type -> loader returning a single serialized resource
+RESOURCE_GETTERS: Dict[str, Callable[[Any, int], Dict[str, Any]]] = {
+    "servers": lambda client, id: serialize_server(client.servers.get_by_id(id)),
+    "volumes": lambda client, id: serialize_volume(client.volumes.get_by_id(id)),
+    "networks": lambda client, id: serialize_network(client.networks.get_by_id(id)),
+    "floating_ips": lambda client, id: serialize_floating_ip(client.floating_ips.get_by_id(id)),
+    "firewalls": lambda client, id: serialize_firewall(client.firewalls.get_by_id(id)),
+}
+
+# Resource type used in the actions feed -> mirrored resource type. SSH keys
+# have no actions, they are only refreshed by full reconciles and live reads.
+_ACTION_RESOURCE_TYPES = {
+    "server": "servers",
+    "volume": "volumes",
+    "network": "networks",
+    "floating_ip": "floating_ips",
+    "firewall": "firewalls",
+}
+
+# Page size and page limit when reading new actions, a longer backlog falls
+# back to a full reconcile
+ACTIONS_PER_PAGE = 50
+MAX_ACTION_PAGES = 10
+
+# API path prefix -> mirrored resource type, used to spot writes that make the mirror stale
+_WRITE_PATHS = {
+    "/servers": "servers",
+    "/volumes": "volumes",
+    "/networks": "networks",
+    "/floating_ips": "floating_ips",
+    "/firewalls": "firewalls",
+    "/ssh_keys": "ssh_keys",
+}
+
+class InventorySync:
+    """
+    Background worker that periodically mirrors every project's resources
+    into local tables, so list and detail endpoints can answer without
+    calling the Hetzner API. Writes made through the pooled clients mark the
+    affected resource type as dirty until it has been fetched again.
+
+    After a full listing, projects are kept up to date from the actions feed:
+    only resources referenced by new (or since finished) actions, or written
+    to directly (renames and label changes create no action), are fetched
+    again, and a full reconcile runs every full_sync_interval seconds.
+    """
+
+    def __init__(self, interval: int, stale_after: int, max_concurrency: int,
+                 full_sync_interval: int):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.max_concurrency = max(max_concurrency, 1)
+        self.full_sync_interval = full_sync_interval
+        # (project_id, resource_type) -> monotonic time it was marked dirty
+        self._dirty: Dict[Tuple[int, str], float] = {}
+        # project_id -> running action id -> resources it touches
+        self._running: Dict[int, Dict[int, List[Tuple[str, int]]]] = {}
+        # project_id -> resources written to since the last sync
+        self._written: Dict[int, Set[Tuple[str, int]]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def mark_dirty(self, project_id: int, resource_type: str):
+        with self._lock:
+            self._dirty[(project_id, resource_type)] = time.monotonic()
+
+    def is_dirty(self, project_id: int, resource_type: str) -> bool:
+        with self._lock:
+            return (project_id, resource_type) in self._dirty
+
+    def forget(self, project_id: int):
+        """Drop the in-memory state of a deleted project"""
+        with self._lock:
+            for key in [key for key in self._dirty if key[0] == project_id]:
+                del self._dirty[key]
+            self._running.pop(project_id, None)
+            self._written.pop(project_id, None)
+
+    def on_write(self, project_id: int, method: str, url: str):
+        """Write listener for the client pool"""
+        for prefix, resource_type in _WRITE_PATHS.items():
+            if url.startswith(prefix):
+                self.mark_dirty(project_id, resource_type)
+                # Writes to one resource (/servers/42, /servers/42/actions/...) get it refetched on the next sync
+                resource_id = url[len(prefix):].strip("/").split("/")[0]
+                if resource_id.isdigit() and resource_type in RESOURCE_GETTERS:
+                    with self._lock:
+                        self._written.setdefault(project_id, set()).add((resource_type, int(resource_id)))
+                break
+
+    def _take_written(self, project_id: int) -> Set[Tuple[str, int]]:
+        with self._lock:
+            return self._written.pop(project_id, set())
+
+    def freshness(self, synced_at: datetime, source: str = "mirror") -> Dict[str, Any]:
+        stale_after = synced_at + timedelta(seconds=self.stale_after)
+        return {
+            "source": source,
+            "synced_at": synced_at.isoformat(),
+            "stale_after": stale_after.isoformat(),
+            "stale": datetime.utcnow() > stale_after
+        }
+
+    def store(self, db: Session, project_id: int, resource_type: str,
+              items: List[Dict[str, Any]], fetch_started: float) -> Dict[str, Any]:
+        """
+        Write a full listing fetched from the API into the mirror. The dirty
+        flag is only cleared if no write happened after the fetch started.
+        """
+        if not self.enabled:
+            return self.freshness(datetime.utcnow(), source="live")
+        try:
+            state = crud.replace_mirrored_resources(db, project_id, resource_type, items)
+            synced_at = state.synced_at
+            with self._lock:
+                marked_at = self._dirty.get((project_id, resource_type))
+                if marked_at is not None and marked_at < fetch_started:
+                    del self._dirty[(project_id, resource_type)]
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Error updating {resource_type} mirror of project {project_id}: {str(e)}")
+            synced_at = datetime.utcnow()
+        return self.freshness(synced_at, source="live")
+
+    @staticmethod
+    def _action_resources(action) -> List[Tuple[str, int]]:
+        resources = []
+        for resource in action.resources or []:
+            resource_type = _ACTION_RESOURCE_TYPES.get(resource.get("type"))
+            if resource_type:
+                resources.append((resource_type, resource["id"]))
+        return resources
+
+    def _running_actions(self, client) -> Dict[int, List[Tuple[str, int]]]:
+        return {
+            action.id: self._action_resources(action)
+            for action in client.actions.get_all(status=["running"])
+        }
+
+    def _new_actions(self, client, last_action_id: int) -> Optional[list]:
+        """Actions newer than the cursor (newest first), or None if there are too many"""
+        actions = []
+        for page in range(1, MAX_ACTION_PAGES + 1):
+            result = client.actions.get_list(sort=["id:desc"], page=page, per_page=ACTIONS_PER_PAGE)
+            for action in result.actions:
+                if action.id <= last_action_id:
+                    return actions
+                actions.append(action)
+            if len(result.actions) < ACTIONS_PER_PAGE:
+                return actions
+        return None
+
+    def _latest_action_id(self, client) -> int:
+        result = client.actions.get_list(sort=["id:desc"], page=1, per_page=1)
+        return result.actions[0].id if result.actions else 0
+
+    def _full_sync(self, db: Session, client, project_id: int, resource_types: Iterable[str],
+                   record_cursor: bool):
+        # Read the feed position first, so actions that happen while listing are replayed later
+        if record_cursor:
+            last_action_id = self._latest_action_id(client)
+            running = self._running_actions(client)
+            # The listings below cover earlier writes, later ones are refetched by the next sync
+            self._take_written(project_id)
+        for resource_type in resource_types:
+            started = time.monotonic()
+            try:
+                items = SYNCED_RESOURCES[resource_type](client)
+            except Exception as e:
+                logger.warning(f"Error syncing {resource_type} of project {project_id}: {str(e)}")
+                crud.set_sync_error(db, project_id, resource_type, str(e))
+                continue
+            self.store(db, project_id, resource_type, items, started)
+        if record_cursor:
+            with self._lock:
+                self._running[project_id] = running
+            crud.save_sync_cursor(db, project_id, last_action_id, full_sync=True)
+
+    def _refetch(self, db: Session, client, project_id: int, resource_type: str, resource_id: int):
+        try:
+            item = RESOURCE_GETTERS[resource_type](client, resource_id)
+        except APIException as e:
+            if e.code == "not_found":
+                crud.delete_mirrored_resource(db, project_id, resource_type, resource_id)
+                return
+            raise
+        crud.upsert_mirrored_resource(db, project_id, resource_type, item)
+
+    def _incremental_sync(self, db: Session, client, project_id: int, last_action_id: int) -> bool:
+        """Apply new actions to the mirror, returns False if a full reconcile is needed"""
+        actions = self._new_actions(client, last_action_id)
+        if actions is None:
+            return False
+        with self._lock:
+            tracked = self._running.setdefault(project_id, {})
+        changed = self._take_written(project_id)
+        # Actions that were running on the last poll may have changed resources since
+        if tracked:
+            still_running = self._running_actions(client)
+            for action_id, resources in list(tracked.items()):
+                if action_id not in still_running:
+                    changed.update(resources)
+                    del tracked[action_id]
+        for action in actions:
+            resources = self._action_resources(action)
+            changed.update(resources)
+            if action.status == "running":
+                tracked[action.id] = resources
+        for resource_type, resource_id in changed:
+            self._refetch(db, client, project_id, resource_type, resource_id)
+        crud.touch_sync_states(db, project_id, list(RESOURCE_GETTERS))
+        if actions:
+            crud.save_sync_cursor(db, project_id, actions[0].id)
+        return True
+
+    def _full_sync_due(self, project_id: int, cursor: Optional[models.SyncCursor]) -> bool:
+        if cursor is None or cursor.last_action_id is None or cursor.full_synced_at is None:
+            return True
+        # Running actions are only tracked in memory, reconcile once after a restart
+        with self._lock:
+            if project_id not in self._running:
+                return True
+        full_synced_at = cursor.full_synced_at.replace(tzinfo=None)
+        return datetime.utcnow() - full_synced_at > timedelta(seconds=self.full_sync_interval)
+
+    def sync_project(self, project_id: int, resource_types: Optional[Iterable[str]] = None):
+        """Mirror the resources of a single project (blocking)"""
+        db = SessionLocal()
+        try:
+            project = db.get(models.Project, project_id)
+            if project is None:
+                return
+            client = get_validated_client(project)
+            if resource_types:
+                self._full_sync(db, client, project_id, resource_types, record_cursor=False)
+                return
+            cursor = crud.get_sync_cursor(db, project_id)
+            if not self._full_sync_due(project_id, cursor):
+                try:
+                    if self._incremental_sync(db, client, project_id, cursor.last_action_id):
+                        return
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Incremental sync of project {project_id} failed: {str(e)}")
+            self._full_sync(db, client, project_id, SYNCED_RESOURCES, record_cursor=True)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _project_ids() -> List[int]:
+        db = SessionLocal()
+        try:
+            return [project.id for project in crud.get_all_projects(db)]
+        finally:
+            db.close()
+
+    async def sync_all(self):
+        """Mirror every project, a bounded number of projects at a time"""
+        project_ids = await run_upstream(self._project_ids)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def sync_one(project_id: int):
+            async with semaphore:
+                try:
+                    # Sync calls yield to interactive requests when budget runs low
+                    with background_priority():
+                        await run_upstream(self.sync_project, project_id)
+                except Exception as e:
+                    logger.warning(f"Inventory sync of project {project_id} failed: {str(e)}")
+
+        await asyncio.gather(*(sync_one(project_id) for project_id in project_ids))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Inventory sync failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+inventory_sync = InventorySync(
+    interval=settings.INVENTORY_SYNC_INTERVAL,
+    stale_after=settings.INVENTORY_STALE_AFTER,
+    max_concurrency=settings.INVENTORY_SYNC_CONCURRENCY,
+    full_sync_interval=settings.INVENTORY_FULL_SYNC_INTERVAL
+)
+client_pool.add_write_listener(inventory_sync.on_write)
@@ -0,0 +1,51 @@
+import hashlib
+import threading
+import time
+from typing import Dict, Tuple
+from ..config import settings
+
+def _fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+class TokenValidityCache:
+    """
+    Remembers which project API tokens were recently confirmed to work, so
+    requests don't have to probe the Hetzner API before doing real work.
+    Entries expire after `ttl` seconds and are dropped as soon as a real
+    call comes back with 401.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        # project_id -> (api key fingerprint, validated at)
+        self._validated: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def is_valid(self, project_id: int, api_key: str) -> bool:
+        """Return True if the token was validated within the TTL"""
+        with self._lock:
+            entry = self._validated.get(project_id)
+        if entry is None:
+            return False
+        fingerprint, validated_at = entry
+        if fingerprint != _fingerprint(api_key):
+            return False
+        return time.monotonic() - validated_at < self.ttl
+
+    def mark_valid(self, project_id: int, api_key: str):
+        with self._lock:
+            self._validated[project_id] = (_fingerprint(api_key), time.monotonic())
+
+    def mark_invalid(self, project_id: int, api_key: str):
+        """Forget a token after the API rejected it, forcing a re-validation"""
+        fingerprint = _fingerprint(api_key)
+        with self._lock:
+            entry = self._validated.get(project_id)
+            if entry is not None and entry[0] == fingerprint:
+                del self._validated[project_id]
+
+    def invalidate(self, project_id: int):
+        with self._lock:
+            self._validated.pop(project_id, None)
+
+token_cache = TokenValidityCache(ttl=settings.HETZNER_TOKEN_VALIDATION_TTL)
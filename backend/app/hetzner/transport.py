@@ -0,0 +1,41 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+from ..config import settings
+
+T = TypeVar("T")
+
+# The hcloud SDK is built on requests and only offers blocking calls, so
+# upstream work runs on a dedicated executor sized for slow API calls instead
+# of Starlette's shared threadpool (~40 threads), which also serves sync
+# dependencies and file responses. Paths that fan out to many calls use the
+# asyncio client in async_api instead and don't take threads from here.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.HETZNER_MAX_CONCURRENT_CALLS,
+    thread_name_prefix="hetzner-upstream"
+)
+
+async def run_upstream(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking Hetzner call on the upstream executor and await its result"""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. call priority) over to the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+def offload(handler: Callable[..., T]) -> Callable[..., Any]:
+    """
+    Turn a blocking route handler into an async one whose body runs on the
+    upstream executor. FastAPI still resolves dependencies from the wrapped
+    handler's signature.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_upstream(handler, *args, **kwargs)
+    return wrapper
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
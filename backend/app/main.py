@@ -8,12 +8,30 @@ from sqlalchemy.orm import Session
 
 from .auth import routes as auth_routes
 from .hetzner import routes as hetzner_routes
-from .database import models
-from .database.database import engine, get_db
+from .hetzner import fleet as fleet_routes
+from .database import crud, models
+from .database.database import engine, async_engine, get_db
+from .database.search import setup_log_search
 from .auth.routes import setup_admin_user
+from .auth.password import password_hasher
+from .hetzner.client_pool import client_pool
+from .hetzner import transport
+from .hetzner.sync import inventory_sync
+from .hetzner.server_events import server_events
+from .hetzner.action_tracker import action_tracker
+from .hetzner.provisioning import provisioning_jobs
+from .hetzner.rollout import rollout_orchestrator
+from .hetzner.async_api import hetzner_api
+from .app_logger.writer import log_writer
 
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
+# create_all skips existing tables, add indexes introduced since they were created
+for table in models.Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+# Full-text index over the logs, maintained by triggers
+setup_log_search(engine)
 
 # Create FastAPI application
 app = FastAPI(
@@ -29,6 +47,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let cross-origin frontends read the logs pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add routers
@@ -44,11 +64,39 @@ app.include_router(
     tags=["Hetzner Cloud"]
 )
 
+app.include_router(
+    fleet_routes.router,
+    prefix="/api",
+    tags=["Fleet"]
+)
+
 # Initialize admin user 
 @app.on_event("startup")
 async def startup_event():
+    log_writer.start()
     db = next(get_db())
     setup_admin_user(db)
+    # Analytics rollups of the logs written before rollups existed
+    crud.backfill_log_rollups(db)
+    inventory_sync.start()
+    action_tracker.start()
+    # Continue the rollouts that were running before the restart
+    await rollout_orchestrator.resume_all()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await inventory_sync.stop()
+    await server_events.stop()
+    await provisioning_jobs.stop()
+    await rollout_orchestrator.stop()
+    await action_tracker.stop()
+    transport.shutdown()
+    await hetzner_api.close()
+    password_hasher.shutdown()
+    client_pool.clear()
+    # Flush the queued log records last, the steps above may still log
+    log_writer.stop()
+    await async_engine.dispose()
 
 # Get frontend build path
 frontend_path = Path("../frontend/build")
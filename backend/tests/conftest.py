@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# The engine is created when app.database is imported, so point it at a
+# throwaway database before any test module imports the app
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from datetime import datetime
+import pytest
+from sqlalchemy import update
+from app.database import crud, models
+from app.database.database import AsyncSessionLocal, SessionLocal, engine, write_lock
+from app.database.search import setup_log_search
+
+WRITERS = 8
+READERS = 8
+LOGS_PER_WRITER = 50
+
+@pytest.fixture(scope="module")
+def project_ids():
+    models.Base.metadata.create_all(bind=engine)
+    setup_log_search(engine)
+    db = SessionLocal()
+    try:
+        user = crud.create_user(db, "stress", "stress@example.com", "stress")
+        return user.id, [crud.create_project(db, f"stress-{i}", "key", None, user.id).id for i in range(2)]
+    finally:
+        db.close()
+
+def assert_write_lock_free():
+    assert write_lock.acquire(blocking=False), "write lock is still held"
+    write_lock.release()
+
+def test_concurrent_log_writes_and_reads(project_ids):
+    user_id, projects = project_ids
+    db = SessionLocal()
+    before = sum(crud.count_logs(db, project_id) for project_id in projects)
+    db.close()
+    errors = []
+    writers_done = threading.Event()
+
+    def writer(index):
+        db = SessionLocal()
+        try:
+            for n in range(LOGS_PER_WRITER):
+                crud.create_log(db, "STRESS_WRITE", f"writer {index} #{n}", "success", projects[n % 2], user_id)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    def reader():
+        db = SessionLocal()
+        try:
+            while not writers_done.is_set():
+                for project_id in projects:
+                    crud.get_logs_page(db, project_id, user_id, limit=20)
+                    crud.search_logs(db, project_id, user_id, "writer", limit=20)
+                    crud.count_logs(db, project_id)
+                db.rollback()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    readers = [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writers_done.set()
+    for thread in readers:
+        thread.join()
+
+    assert not [e for e in errors if "database is locked" in str(e)]
+    assert not errors
+    db = SessionLocal()
+    assert sum(crud.count_logs(db, project_id) for project_id in projects) == before + WRITERS * LOGS_PER_WRITER
+    db.close()
+    assert_write_lock_free()
+
+def test_async_writers_share_the_write_lock(project_ids):
+    user_id, projects = project_ids
+
+    async def write(n):
+        async with AsyncSessionLocal() as db:
+            db.add(models.Log(action="ASYNC_WRITE", details=f"#{n}", status="success",
+                              project_id=projects[0], user_id=user_id, created_at=datetime.utcnow()))
+            await db.commit()
+
+    async def main():
+        # Hold the lock from a sync session: async writers must wait for it without blocking the loop
+        db = SessionLocal()
+        crud.create_log(db, "SYNC_WRITE", None, "success", projects[0], user_id)
+        db.execute(update(models.Log).where(models.Log.action == "SYNC_WRITE").values(status="failed"))
+        assert not write_lock.acquire(blocking=False)
+        tasks = [asyncio.create_task(write(n)) for n in range(10)]
+        await asyncio.sleep(0.2)
+        assert not any(task.done() for task in tasks)
+        db.commit()
+        db.close()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    db = SessionLocal()
+    assert db.query(models.Log).filter(models.Log.action == "ASYNC_WRITE").count() == 10
+    db.close()
+    assert_write_lock_free()
+
+def test_write_lock_released_when_session_closes_without_commit(project_ids):
+    user_id, projects = project_ids
+    db = SessionLocal()
+    db.add(models.Log(action="UNCOMMITTED", status="success", project_id=projects[0], user_id=user_id))
+    db.flush()
+    db.close()
+    assert_write_lock_free()
+
+    db = SessionLocal()
+    db.execute(update(models.Log).where(models.Log.action == "UNCOMMITTED").values(status="failed"))
+    db.close()
+    assert_write_lock_free()
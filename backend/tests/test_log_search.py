@@ -0,0 +1,36 @@
+import pytest
+from app.database import crud, models
+from app.database.database import SessionLocal, engine
+from app.database.search import build_match_query, setup_log_search
+
+@pytest.fixture(scope="module")
+def search_db():
+    models.Base.metadata.create_all(bind=engine)
+    setup_log_search(engine)
+    db = SessionLocal()
+    user = crud.create_user(db, "search", "search@example.com", "search")
+    project = crud.create_project(db, "search", "key", None, user.id)
+    try:
+        yield db, user.id, project.id
+    finally:
+        db.close()
+
+def test_highlight_escapes_log_text(search_db):
+    db, user_id, project_id = search_db
+    crud.create_log(db, "RENAME_SERVER", "renamed to <img src=x onerror=alert(1)> & web", "success", project_id, user_id)
+    results = crud.search_logs(db, project_id, user_id, build_match_query("web"))
+    assert len(results) == 1
+    assert results[0]["details_highlight"] == (
+        "renamed to &lt;img src=x onerror=alert(1)&gt; &amp; <mark>web</mark>"
+    )
+    assert results[0]["action_highlight"] == "RENAME_SERVER"
+
+def test_search_is_scoped_to_the_project(search_db):
+    db, user_id, project_id = search_db
+    other = crud.create_project(db, "search-other", "key", None, user_id)
+    crud.create_log(db, "CREATE_SERVER", "scoped-term in project", "success", project_id, user_id)
+    crud.create_log(db, "CREATE_SERVER", "scoped-term in other project", "success", other.id, user_id)
+    results = crud.search_logs(db, project_id, user_id, build_match_query("scoped-term"))
+    assert [row["details"] for row in results] == ["scoped-term in project"]
+    # The scope tokens themselves are not searchable
+    assert crud.search_logs(db, project_id, user_id, build_match_query(f"p{project_id}")) == []
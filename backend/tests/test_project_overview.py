@@ -0,0 +1,91 @@
+import copy
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.database import crud
+from app.database.database import SessionLocal
+from app.hetzner.client_pool import PooledClient, client_pool
+from app.main import app
+
+SERVER = {
+    "id": 1, "name": "web-1", "status": "running", "created": "2024-01-01T00:00:00+00:00",
+    "public_net": {"ipv4": {"id": 10, "ip": "10.0.0.1", "blocked": False, "dns_ptr": ""},
+                   "ipv6": None, "floating_ips": [], "firewalls": []},
+    "server_type": {"id": 1, "name": "cx22"},
+    "datacenter": {"id": 1, "name": "fsn1-dc14", "location": {"id": 1, "name": "fsn1"}},
+    "image": {"id": 5, "name": "ubuntu-24.04"},
+    "labels": {}, "private_net": [], "volumes": []
+}
+SSH_KEY = {"id": 7, "name": "deploy", "fingerprint": "aa:bb", "public_key": "ssh-ed25519 AAAA", "created": None}
+IMAGE = {"id": 5, "name": "ubuntu-24.04", "type": "system", "status": "available", "description": "Ubuntu 24.04"}
+SERVER_TYPE = {"id": 1, "name": "cx22", "description": "CX22", "cores": 2, "memory": 4.0, "disk": 40, "prices": []}
+
+# url -> (key, items) of the collections the fake API serves
+COLLECTIONS = {
+    "/servers": ("servers", [SERVER]),
+    "/volumes": ("volumes", []),
+    "/floating_ips": ("floating_ips", []),
+    "/firewalls": ("firewalls", []),
+    "/networks": ("networks", []),
+    "/ssh_keys": ("ssh_keys", [SSH_KEY]),
+    "/images": ("images", [IMAGE]),
+    "/server_types": ("server_types", [SERVER_TYPE]),
+}
+
+@pytest.fixture
+def api(monkeypatch):
+    """Fake Hetzner API; the returned dict maps urls to seconds their responses are delayed by"""
+    delays = {}
+
+    def request(self, method, url, tries=1, **kwargs):
+        time.sleep(delays.get(url, 0))
+        key, items = COLLECTIONS[url]
+        # hcloud's models replace nested dicts of the payload in place
+        return {key: copy.deepcopy(items), "meta": {"pagination": {"page": 1, "per_page": 50, "next_page": None}}}
+
+    monkeypatch.setattr(PooledClient, "request", request)
+    client_pool.clear()
+    return delays
+
+# The app's shutdown stops the upstream executor, so it's started once per module
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        token = client.post(
+            "/api/auth/token", data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD}
+        ).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        db = SessionLocal()
+        try:
+            user = crud.get_user_by_username(db, settings.ADMIN_USERNAME)
+            project = crud.create_project(db, "overview", "key", None, user.id)
+            client.project_id = project.id
+        finally:
+            db.close()
+        yield client
+
+def test_overview_combines_every_collection(api, client):
+    response = client.get(f"/api/projects/{client.project_id}/overview")
+    assert response.status_code == 200
+    overview = response.json()
+    assert overview["project"]["name"] == "overview"
+    assert [server["name"] for server in overview["servers"]] == ["web-1"]
+    assert overview["servers"][0]["ip"] == "10.0.0.1"
+    assert [key["name"] for key in overview["ssh_keys"]] == ["deploy"]
+    assert overview["volumes"] == [] and overview["networks"] == []
+    assert overview["stats"] == {"servers_count": 1, "images_count": 1, "server_types_count": 1}
+    assert overview["errors"] == {}
+    assert overview["partial"] is False
+
+def test_overview_marks_a_slow_collection(api, client):
+    api["/volumes"] = 1.5
+    response = client.get(f"/api/projects/{client.project_id}/overview", params={"timeout": 0.5})
+    assert response.status_code == 200
+    overview = response.json()
+    assert overview["partial"] is True
+    assert list(overview["errors"]) == ["volumes"]
+    assert overview["errors"]["volumes"]["code"] == "timeout"
+    assert overview["volumes"] is None
+    # The other collections are still served
+    assert [server["name"] for server in overview["servers"]] == ["web-1"]
@@ -1,6 +1,11 @@
 import api from '../axios';
 
-export const getLogs = async (projectId, params) => {
+// One page of logs; pass the returned nextCursor as params.cursor to get the next page
+// (nextCursor is null on the last page)
+export const getLogsPage = async (projectId, params) => {
   const response = await api.get(`/projects/${projectId}/logs`, { params });
-  return response.data;
-};
\ No newline at end of file
+  return {
+    logs: response.data,
+    nextCursor: response.headers['x-next-cursor'] || null
+  };
+};
@@ -5,6 +5,56 @@ export const getServers = async (projectId) => {
   return response.data;
 };
 
+// Delay before re-subscribing after the event stream drops
+const RECONNECT_DELAY = 3000;
+
+// Live server status and action progress (Server-Sent Events).
+// handlers maps event names (snapshot, server, deleted, progress, poll_error) to callbacks;
+// returns a function that closes the stream.
+export const subscribeServerEvents = (projectId, handlers) => {
+  const baseURL = process.env.REACT_APP_API_URL || '/api';
+  let source = null;
+  let retryTimer = null;
+  let closed = false;
+
+  const reconnect = () => {
+    if (!closed) {
+      retryTimer = setTimeout(connect, RECONNECT_DELAY);
+    }
+  };
+
+  const connect = async () => {
+    try {
+      // EventSource can't send the Authorization header, so the stream takes a short-lived, single-use ticket
+      const response = await api.post('/auth/stream-ticket');
+      if (closed) return;
+      source = new EventSource(
+        `${baseURL}/projects/${projectId}/servers/events?ticket=${encodeURIComponent(response.data.ticket)}`
+      );
+      Object.entries(handlers).forEach(([event, handler]) => {
+        source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+      });
+      // The ticket was used up, so re-subscribe with a new one instead of letting EventSource retry it
+      source.onerror = () => {
+        source.close();
+        reconnect();
+      };
+    } catch (error) {
+      // A 401 means the session ended, the axios interceptor sends the user to the login page
+      if (!error.response || error.response.status !== 401) {
+        reconnect();
+      }
+    }
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    if (source) source.close();
+  };
+};
+
 export const getServer = async (projectId, serverId) => {
   const response = await api.get(`/projects/${projectId}/servers/${serverId}`);
   return response.data;
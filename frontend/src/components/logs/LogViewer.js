@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Table, Card, Button, Tag, Space, Tooltip, DatePicker } from 'antd';
 import { ReloadOutlined, FilterOutlined } from '@ant-design/icons';
 import moment from 'moment';
@@ -13,6 +13,13 @@ function LogViewer({ projectId }) {
     pageSize: 20,
     total: 0
   });
+  // cursors[i] fetches page i + 1; pages are only reachable one after another
+  const cursors = useRef([null]);
+  
+  useEffect(() => {
+    cursors.current = [null];
+    setPagination((current) => ({ ...current, current: 1 }));
+  }, [projectId]);
   
   useEffect(() => {
     if (projectId) {
@@ -28,9 +35,12 @@ function LogViewer({ projectId }) {
       
       // Build params
       const params = {
-        skip: (pagination.current - 1) * pagination.pageSize,
         limit: pagination.pageSize
       };
+      const cursor = cursors.current[pagination.current - 1];
+      if (cursor) {
+        params.cursor = cursor;
+      }
       
       // Add date filtering if applicable - with proper ISO date format
       if (dateRange && dateRange[0] && dateRange[1]) {
@@ -38,13 +48,14 @@ function LogViewer({ projectId }) {
         params.end_date = dateRange[1].format('YYYY-MM-DD');
       }
       
-      const logsData = await logService.getLogs(projectId, params);
+      const { logs: logsData, nextCursor } = await logService.getLogsPage(projectId, params);
       setLogs(logsData || []);
+      cursors.current[pagination.current] = nextCursor;
       
-      // Update pagination
+      // Update pagination, offering the next page only while there is a cursor for it
       setPagination({
         ...pagination,
-        total: logsData.length >= pagination.pageSize ? 
+        total: nextCursor ? 
           (pagination.current + 1) * pagination.pageSize : 
           (pagination.current * pagination.pageSize - pagination.pageSize) + logsData.length
       });
@@ -56,13 +67,24 @@ function LogViewer({ projectId }) {
   };
   
   const handleTableChange = (newPagination) => {
+    const pageSizeChanged = newPagination.pageSize !== pagination.pageSize;
+    if (pageSizeChanged) {
+      cursors.current = [null];
+    }
     setPagination({
       ...pagination,
-      current: newPagination.current,
+      current: pageSizeChanged ? 1 : newPagination.current,
       pageSize: newPagination.pageSize
     });
   };
   
+  // Cursors depend on the filters, so a new date range starts over from the first page
+  const handleDateRangeChange = (range) => {
+    cursors.current = [null];
+    setPagination({ ...pagination, current: 1 });
+    setDateRange(range);
+  };
+  
   const getStatusColor = (status) => {
     switch (status.toLowerCase()) {
       case 'success':
@@ -135,12 +157,13 @@ function LogViewer({ projectId }) {
         <Space>
           <DatePicker.RangePicker 
             allowClear
-            onChange={setDateRange}
+            value={dateRange}
+            onChange={handleDateRangeChange}
             style={{ marginRight: 8 }}
           />
           <Button 
             icon={<FilterOutlined />} 
-            onClick={() => setDateRange(null)}
+            onClick={() => handleDateRangeChange(null)}
             disabled={!dateRange}
           >
             Clear Filters
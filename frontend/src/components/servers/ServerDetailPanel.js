@@ -48,9 +48,12 @@ function ServerDetailPanel({ projectId, serverId }) {
 
   useEffect(() => {
     fetchServerDetails();
-    // Set up polling for status updates
-    const intervalId = setInterval(fetchServerDetails, 5000);
-    return () => clearInterval(intervalId);
+    // Reload the details when the server's status changes
+    return serverService.subscribeServerEvents(projectId, {
+      server: (server) => {
+        if (server.id === Number(serverId)) fetchServerDetails();
+      }
+    });
   }, [projectId, serverId]);
 
   const fetchServerDetails = async () => {
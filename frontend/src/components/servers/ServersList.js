@@ -23,6 +23,24 @@ function ServersList({ projectId }) {
     }
   }, [projectId]);
   
+  // Status changes are pushed by the server instead of re-polling the list
+  useEffect(() => {
+    if (!projectId) return;
+    return serverService.subscribeServerEvents(projectId, {
+      snapshot: (data) => {
+        setServers(data.servers);
+        setLoading(false);
+      },
+      server: (server) => setServers((current) => {
+        const exists = current.some((s) => s.id === server.id);
+        return exists
+          ? current.map((s) => (s.id === server.id ? server : s))
+          : [...current, server];
+      }),
+      deleted: ({ id }) => setServers((current) => current.filter((s) => s.id !== id))
+    });
+  }, [projectId]);
+  
   const fetchServers = async () => {
     if (!projectId) return;
     
@@ -56,8 +74,6 @@ function ServersList({ projectId }) {
       }
       
       message.success(`Server ${actionName} initiated successfully`);
-      // Give a moment for the action to take effect
-      setTimeout(fetchServers, 1000);
     } catch (error) {
       message.error(`Failed to ${actionName.toLowerCase()} server: ${error.response?.data?.detail || error.message}`);
     }